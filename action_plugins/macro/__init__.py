@@ -489,6 +489,9 @@ class MacroFunctor(AbstractFunctor):
                     self.data.repeat_data.delay
                 )
 
+        # Compile the macro once instead of every time it is queued
+        self.macro.compile(macro.MacroManager().default_delay)
+
     def __call__(
         self,
         event: event_handler.Event,
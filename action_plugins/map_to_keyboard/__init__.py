@@ -43,11 +43,13 @@ class MapToKeyboardFunctor(AbstractFunctor):
         super().__init__(action)
 
         self.press = macro.Macro()
-        for key in self.data.keys:
-            self.press.press(key)
+        self.press.chord(self.data.keys, True)
         self.release = macro.Macro()
-        for key in reversed(self.data.keys):
-            self.release.release(key)
+        self.release.chord(list(reversed(self.data.keys)), False)
+
+        default_delay = macro.MacroManager().default_delay
+        self.press.compile(default_delay)
+        self.release.compile(default_delay)
 
     def __call__(
         self,
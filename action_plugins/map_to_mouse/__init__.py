@@ -28,6 +28,7 @@ from PySide6.QtCore import Property, Signal, Slot
 from gremlin import event_handler, sendinput, util
 from gremlin.base_classes import AbstractActionData, AbstractFunctor, \
     DataCreationMode, Value
+from gremlin.config import Configuration
 from gremlin.error import GremlinError
 from gremlin.profile import Library
 from gremlin.types import ActionProperty, InputType, MouseButton, PropertyType
@@ -60,6 +61,9 @@ class MapToMouseFunctor(AbstractFunctor):
         super().__init__(action)
 
         self.mouse_controller = sendinput.MouseController()
+        self.mouse_controller.tick_rate = Configuration().value(
+            "action", "map-to-mouse", "update-rate"
+        )
 
     def __call__(self, event: event_handler.Event, value: Value) -> None:
         """Processes the provided event.
@@ -367,3 +371,17 @@ class MapToMouseData(AbstractActionData):
 
 
 create = MapToMouseData
+
+Configuration().register(
+    "action",
+    "map-to-mouse",
+    "update-rate",
+    PropertyType.Int,
+    100,
+    "Number of mouse motion updates sent per second.",
+    {
+        "min": 10,
+        "max": 1000
+    },
+    True
+)
@@ -18,15 +18,14 @@
 
 from __future__ import annotations
 
-import threading
-import time
 from typing import List, TYPE_CHECKING
 from xml.etree import ElementTree
 
 from PySide6 import QtCore
 from PySide6.QtCore import Property, Signal
 
-from gremlin import error, event_handler, input_devices, joystick_handling, util
+from gremlin import error, event_handler, input_devices, joystick_handling, \
+    output_arbiter, util
 from gremlin.base_classes import AbstractActionData, AbstractFunctor, \
     DataCreationMode, Value
 from gremlin.profile import Library
@@ -46,12 +45,6 @@ class MapToVjoyFunctor(AbstractFunctor):
         super().__init__(action)
 
         self.needs_auto_release = False #self._check_for_auto_release(action)
-        self.thread_running = False
-        self.should_stop_thread = False
-        self.thread_last_update = time.time()
-        self.thread = None
-        self.axis_delta_value = 0.0
-        self.axis_value = 0.0
 
     def __call__(self, event: event_handler.Event, value: Value) -> None:
         if not self._should_execute(value):
@@ -59,72 +52,51 @@ class MapToVjoyFunctor(AbstractFunctor):
 
         if self.data.vjoy_input_type == InputType.JoystickAxis:
             if self.data.axis_mode == AxisMode.Absolute:
-                joystick_handling.VJoyProxy()[self.data.vjoy_device_id] \
-                    .axis(self.data.vjoy_input_id).value = value.current
+                output_arbiter.OutputArbiter().write(
+                    self.data.vjoy_device_id,
+                    InputType.JoystickAxis,
+                    self.data.vjoy_input_id,
+                    value.current,
+                    self
+                )
             else:
-                self.should_stop_thread = abs(event.value) < 0.05
-                self.axis_delta_value = \
-                    value.current * (self.data.axis_scaling / 1000.0)
-                self.thread_last_update = time.time()
-                if self.thread_running is False:
-                    if isinstance(self.thread, threading.Thread):
-                        self.thread.join()
-                    self.thread = threading.Thread(
-                        target=self.relative_axis_thread
-                    )
-                    self.thread.start()
+                # The axis scaling specifies the change, in thousandths of
+                # the axis range, for every 10 ms of full input deflection
+                input_devices.RelativeAxisIntegrator().set_rate(
+                    self.data.vjoy_device_id,
+                    self.data.vjoy_input_id,
+                    value.current * (self.data.axis_scaling / 1000.0) / 0.01,
+                    abs(event.value) < 0.05
+                )
 
         elif self.data.vjoy_input_type == InputType.JoystickButton:
             is_pressed = value.current
             if self.data.button_inverted:
                 is_pressed = not is_pressed
-            joystick_handling.VJoyProxy()[self.data.vjoy_device_id] \
-                .button(self.data.vjoy_input_id).is_pressed = is_pressed
+            output_arbiter.OutputArbiter().write(
+                self.data.vjoy_device_id,
+                InputType.JoystickButton,
+                self.data.vjoy_input_id,
+                is_pressed,
+                self
+            )
 
             if is_pressed:
                 input_devices.ButtonReleaseActions().register_button_release(
                     (self.data.vjoy_device_id, self.data.vjoy_input_id),
                     event,
-                    self.data.button_inverted
+                    self.data.button_inverted,
+                    self
                 )
 
         elif self.data.vjoy_input_type == InputType.JoystickHat:
-            joystick_handling.VJoyProxy()[self.data.vjoy_device_id] \
-                .hat(self.data.vjoy_input_id).direction = value.current
-
-    def relative_axis_thread(self) -> None:
-        self.thread_running = True
-        vjoy_dev = joystick_handling.VJoyProxy()[self.data.vjoy_device_id]
-        self.axis_value = vjoy_dev.axis(self.data.vjoy_input_id).value
-        while self.thread_running:
-            # Abort if the vJoy device is no longer valid
-            if not vjoy_dev.is_owned():
-                self.thread_running = False
-                return
-
-            try:
-                # If the vjoy value has was changed from what we set it to
-                # in the last iteration, terminate the thread
-                change = vjoy_dev.axis(self.data.vjoy_input_id).value - \
-                        self.axis_value
-                if abs(change) > 0.0001:
-                    self.thread_running = False
-                    self.should_stop_thread = True
-                    return
-
-                self.axis_value = util.clamp(
-                    self.axis_value + self.axis_delta_value,
-                    -1.0,
-                    1.0
-                )
-                vjoy_dev.axis(self.data.vjoy_input_id).value = self.axis_value
-
-                if self.should_stop_thread and \
-                        self.thread_last_update + 1.0 < time.time():
-                    self.thread_running = False
-                time.sleep(0.01)
-            except error.VJoyError:
-                self.thread_running = False
+            output_arbiter.OutputArbiter().write(
+                self.data.vjoy_device_id,
+                InputType.JoystickHat,
+                self.data.vjoy_input_id,
+                value.current,
+                self
+            )
 
     # def _check_for_auto_release(self, action):
     #     activation_condition = None
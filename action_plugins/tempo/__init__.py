@@ -20,15 +20,13 @@ from __future__ import annotations
 
 import copy
 import logging
-import threading
-import time
 from typing import Any, List, Optional, TYPE_CHECKING
 from xml.etree import ElementTree
 
 from PySide6 import QtCore
 from PySide6.QtCore import Property, Signal, Slot
 
-from gremlin import event_handler, util
+from gremlin import event_handler, gesture, scheduler, util
 from gremlin.error import GremlinError, ProfileError
 from gremlin.base_classes import AbstractActionData, AbstractFunctor, Value, DataCreationMode
 from gremlin.config import Configuration
@@ -47,10 +45,17 @@ class TempoFunctor(AbstractFunctor):
     def __init__(self, action: TempoData):
         super().__init__(action)
 
-        self.start_time = 0
-        self.timer = None
         self.value_press = None
         self.event_press = None
+        self.value_release = None
+        self.event_release = None
+
+        # When activating on press the short actions receive the input
+        # directly, otherwise a short press is recognized as a tap
+        gestures = [gesture.Hold(self.data.threshold)]
+        if self.data.activate_on == "release":
+            gestures.append(gesture.Tap(1))
+        self.recognizer = gesture.GestureRecognizer(gestures, self._gesture)
 
     def __call__(self, event: event_handler.Event, value: Value) -> None:
         if not isinstance(value.current, bool):
@@ -65,12 +70,6 @@ class TempoFunctor(AbstractFunctor):
             self.value_press = copy.deepcopy(value)
             self.event_press = event.clone()
 
-        # Execute tempo logic
-        if value.current:
-            self.start_time = time.time()
-            self.timer = threading.Timer(self.data.threshold, self._long_press)
-            self.timer.start()
-
             if self.data.activate_on == "press":
                 self._process_event(
                     self.functors["short"],
@@ -78,26 +77,53 @@ class TempoFunctor(AbstractFunctor):
                     self.value_press
                 )
         else:
-            # Short press
-            if (self.start_time + self.data.threshold) > time.time():
-                self.timer.cancel()
-
-                if self.data.activate_on == "release":
-                    threading.Thread(target=lambda: self._short_press(
-                        self.event_press,
-                        self.value_press,
-                        event,
-                        value
-                    )).start()
-                else:
-                    self._process_event(self.functors["short"], event, value)
-            # Long press
-            else:
-                self._process_event(self.functors["long"], event, value)
-                if self.data.activate_on == "press":
-                    self._process_event(self.functors["short"], event, value)
+            self.value_release = value
+            self.event_release = event
+
+        self.recognizer.process(value.current)
+
+        if not value.current and self.data.activate_on == "press":
+            self._process_event(self.functors["short"], event, value)
+
+    def _gesture(self, index: int, is_active: bool) -> None:
+        """Callback executed when a long or short press is recognized.
+
+        Gestures recognized by a timeout are reported by the scheduler
+        thread, the actions are therefore run in the event thread.
+
+        :param index index of the recognized gesture, 0 being the long press
+        :param is_active whether the gesture activated or released
+        """
+        event_handler.EventHandler().call_in_event_thread(
+            lambda: self._run_gesture(index, is_active)
+        )
+
+    def _run_gesture(self, index: int, is_active: bool) -> None:
+        """Runs the actions of a recognized long or short press.
 
-            self.timer = None
+        :param index index of the recognized gesture, 0 being the long press
+        :param is_active whether the gesture activated or released
+        """
+        if index == 0:
+            if is_active:
+                self._process_event(
+                    self.functors["long"],
+                    self.event_press,
+                    self.value_press
+                )
+            else:
+                self._process_event(
+                    self.functors["long"],
+                    self.event_release,
+                    self.value_release
+                )
+        else:
+            self._short_press(
+                self.event_press,
+                self.value_press,
+                self.event_release,
+                self.value_release
+            )
 
     def _short_press(
         self,
@@ -114,15 +140,13 @@ class TempoFunctor(AbstractFunctor):
         :param value_r value to release the action
         """
         self._process_event(self.functors["short"], event_p, value_p)
-        time.sleep(0.05)
-        self._process_event(self.functors["short"], event_r, value_r)
-
-    def _long_press(self):
-        """Callback executed, when the delay expires."""
-        self._process_event(
-            self.functors["long"],
-            self.event_press,
-            self.value_press
+        scheduler.schedule(
+            0.05,
+            lambda: event_handler.EventHandler().call_in_event_thread(
+                lambda: self._process_event(
+                    self.functors["short"], event_r, value_r
+                )
+            )
         )
 
     def _process_event(
@@ -102,6 +102,8 @@ class AbstractActionData(ABC):
         self._id = uuid.uuid4()
         self._behavior_type = behavior_type
         self._action_label = ""
+        # Library storing the action, kept informed of child changes
+        self._library = None
 
         self._activation_mode = ActionActivationMode.Deactivated
         for prop in self.properties:
@@ -327,6 +329,8 @@ class AbstractActionData(ABC):
                 anchor += 1
 
         container.insert(anchor, action)
+        if self._library is not None:
+            self._library._add_reference(self, action)
 
     def remove_action(self, index: int, selector: str) -> None:
         """Removes the provided action from this action's children.
@@ -339,7 +343,9 @@ class AbstractActionData(ABC):
 
         container = self._get_container(selector)
         if 0 <= index < len(container):
-            del container[index]
+            action = container.pop(index)
+            if self._library is not None:
+                self._library._remove_reference(self, action)
         else:
             raise GremlinError(
                 f"{self.name}: attempting to remove action with invalid " +
@@ -352,8 +358,10 @@ class AbstractActionData(ABC):
         Returns:
             Copy of the action with a new unique id
         """
-        clone = copy.deepcopy(self)
+        # Share the library rather than copying it along with the action
+        clone = copy.deepcopy(self, {id(self._library): self._library})
         clone._id = uuid.uuid4()
+        clone._library = None
         return clone
 
     @classmethod
@@ -0,0 +1,200 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Source of time for all time-dependent parts of Gremlin.
+
+By default the system clock is used. Installing a VirtualClock via set_clock
+replaces it with simulated time which only advances when requested. Instead
+of running their own threads, time-driven subsystems register themselves as
+timer sources with a virtual clock, which runs them as time is advanced.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import threading
+import time
+from typing import Optional, Protocol
+
+
+class TimerSource(Protocol):
+
+    """Interface of subsystems driven by a virtual clock."""
+
+    def next_deadline(self) -> Optional[float]:
+        """Returns the time at which the source next needs to run.
+
+        Returns:
+            Time of the next deadline or None if nothing is scheduled
+        """
+        ...
+
+    def run_due(self, now: float) -> None:
+        """Runs everything whose deadline has been reached.
+
+        Args:
+            now: the current time
+        """
+        ...
+
+
+class Clock(ABC):
+
+    """Provides the current time and the means to wait."""
+
+    # Whether time only advances when explicitly requested
+    is_virtual = False
+
+    @abstractmethod
+    def now(self) -> float:
+        """Returns the current time.
+
+        Returns:
+            Monotonic time in seconds
+        """
+        pass
+
+    @abstractmethod
+    def sleep(self, duration: float) -> None:
+        """Waits for the given duration.
+
+        Args:
+            duration: time in seconds to wait for
+        """
+        pass
+
+
+class SystemClock(Clock):
+
+    """Clock based on the system's high resolution performance counter."""
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, duration: float) -> None:
+        time.sleep(duration)
+
+
+class VirtualClock(Clock):
+
+    """Simulated clock which advances only when told to.
+
+    Registered timer sources are run in the order of their deadlines while
+    advancing time, with the clock showing each deadline as the current time.
+    """
+
+    is_virtual = True
+
+    def __init__(self, start: float=0.0) -> None:
+        """Creates a new virtual clock.
+
+        Args:
+            start: initial time of the clock
+        """
+        self._now = start
+        self._sources = []
+        self._lock = threading.RLock()
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, duration: float) -> None:
+        self.advance(duration)
+
+    def register(self, source: TimerSource) -> None:
+        """Adds a source to be run as time advances.
+
+        Args:
+            source: the timer source to add
+        """
+        with self._lock:
+            if source not in self._sources:
+                self._sources.append(source)
+
+    def unregister(self, source: TimerSource) -> None:
+        """Removes a timer source.
+
+        Args:
+            source: the timer source to remove
+        """
+        with self._lock:
+            if source in self._sources:
+                self._sources.remove(source)
+
+    def advance(self, duration: float) -> None:
+        """Advances time, running all timer sources that become due.
+
+        Args:
+            duration: time in seconds to advance the clock by
+        """
+        with self._lock:
+            target = self._now + max(0.0, duration)
+            while True:
+                source, deadline = self._next_source(target)
+                if source is None:
+                    break
+                self._now = max(self._now, deadline)
+                source.run_due(self._now)
+            self._now = target
+
+    def _next_source(
+            self,
+            target: float
+    ) -> tuple[Optional[TimerSource], float]:
+        """Returns the source with the earliest deadline before a time.
+
+        Args:
+            target: latest deadline to consider
+
+        Returns:
+            The source and its deadline, the source is None if no source is
+            due before the target time
+        """
+        best_source = None
+        best_deadline = target
+        for source in list(self._sources):
+            deadline = source.next_deadline()
+            if deadline is not None and deadline <= best_deadline:
+                if best_source is None or deadline < best_deadline:
+                    best_source = source
+                    best_deadline = deadline
+        return best_source, best_deadline
+
+
+_clock = SystemClock()
+
+
+def get_clock() -> Clock:
+    """Returns the clock used by Gremlin.
+
+    Returns:
+        The currently installed clock
+    """
+    return _clock
+
+
+def set_clock(clock: Optional[Clock]) -> None:
+    """Installs the clock to be used by Gremlin.
+
+    Subsystems pick up the clock when they are started, i.e. the clock has
+    to be installed before starting them.
+
+    Args:
+        clock: the clock to use, None restores the system clock
+    """
+    global _clock
+    _clock = clock if clock is not None else SystemClock()
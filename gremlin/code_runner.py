@@ -17,7 +17,9 @@
 
 from abc import ABCMeta, abstractmethod
 import copy
+import hashlib
 import importlib
+import itertools
 import logging
 import os
 import random
@@ -25,6 +27,7 @@ import string
 import sys
 import time
 from typing import List, Tuple
+from xml.etree import ElementTree
 
 import dill
 
@@ -32,7 +35,8 @@ import gremlin
 from gremlin.base_classes import Value
 import gremlin.fsm
 from gremlin import error, event_handler, input_devices, joystick_handling, \
-    macro, mode_manager, profile, sendinput, user_plugin, util
+    macro, mode_manager, output_arbiter, profile, sendinput, user_plugin, \
+    util
 from gremlin.types import ActionProperty, AxisButtonDirection, HatDirection, \
     InputType
 
@@ -44,6 +48,8 @@ class VirtualButton(metaclass=ABCMeta):
     def __init__(self):
         """Creates a new instance."""
         self._fsm = self._initialize_fsm()
+        self._press_id = self._fsm.action_id("press")
+        self._release_id = self._fsm.action_id("release")
 
     def _initialize_fsm(self):
         """Initializes the state of the button FSM."""
@@ -55,7 +61,12 @@ class VirtualButton(metaclass=ABCMeta):
             ("down", "release"): gremlin.fsm.Transition(self._release, "up"),
             ("down", "press"): gremlin.fsm.Transition(self._noop, "down")
         }
-        return gremlin.fsm.FiniteStateMachine("up", states, actions, transitions)
+        return gremlin.fsm.CompiledFiniteStateMachine(
+            "up",
+            states,
+            actions,
+            transitions
+        )
 
     @abstractmethod
     def __call__(self, event: event_handler.Event) -> List[bool]:
@@ -123,16 +134,16 @@ class VirtualAxisButton(VirtualButton):
         # forced by returning a pulse signal.
         states = []
         if forced_activation:
-            self._fsm.perform("press")
-            self._fsm.perform("release")
+            self._fsm.perform(self._press_id)
+            self._fsm.perform(self._release_id)
             states = [True, False]
         inside_range = self._lower_limit <= event.value <= self._upper_limit
         valid_direction = direction == self._direction or \
             self._direction == AxisButtonDirection.Anywhere
         if inside_range and valid_direction:
-            states = [True] if self._fsm.perform("press") else []
+            states = [True] if self._fsm.perform(self._press_id) else []
         else:
-            states = [False] if self._fsm.perform("release") else []
+            states = [False] if self._fsm.perform(self._release_id) else []
 
         return states
 
@@ -147,7 +158,7 @@ class VirtualHatButton(VirtualButton):
 
     def __call__(self, event: event_handler.Event) -> List[bool]:
         is_pressed = HatDirection.to_enum(event.value) in self._directions
-        action = "press" if is_pressed else "release"
+        action = self._press_id if is_pressed else self._release_id
         has_changed = self._fsm.perform(action)
         return [is_pressed] if has_changed else []
 
@@ -186,6 +197,8 @@ class CallbackObject:
         self._binding = binding
         self._functor = None
         self._virtual_identifier = 0
+        # Registration of the callback handling the virtual button events
+        self._virtual_callback = None
 
         # Differentiate between bindings utilizing virtual buttons and those
         # that react to raw physical inputs
@@ -211,10 +224,20 @@ class CallbackObject:
         ]
         return any(values)
 
+    def uninstall(self) -> None:
+        """Removes the callbacks this instance installed by itself."""
+        if self._virtual_callback is not None:
+            event_handler.EventHandler().remove_callback(
+                *self._virtual_callback
+            )
+            self._virtual_callback = None
+
     def __call__(self, event: event_handler.Event) -> None:
         values = self._generate_values(event)
         for i, value in enumerate(values):
-            self._functor(event, value)
+            # Submit all keyboard and mouse outputs of the dispatch at once
+            with sendinput.batched_output():
+                self._functor(event, value)
 
             # Pause between the execution of subsequent bindings
             if i < len(values)-1:
@@ -287,12 +310,18 @@ class CallbackObject:
         # Create callback reacting to the virtual button event using the new
         # virtual binding that mirrors the original physical one
         eh = event_handler.EventHandler()
-        eh.add_callback(
+        installed = eh.add_callback(
             dill.GUID_Virtual,
             self._binding.input_item.mode,
             virtual_event,
             CallbackObject(virt_binding)
         )
+        self._virtual_callback = (
+            dill.GUID_Virtual,
+            self._binding.input_item.mode,
+            virtual_event,
+            installed
+        )
 
     def _generate_values(self, event):
         if event.event_type in [InputType.JoystickAxis, InputType.JoystickHat]:
@@ -322,6 +351,11 @@ class CodeRunner:
 
         self._profile = None
         self._running = False
+        # Fingerprint, event, callback, and installed callback of every
+        # active binding
+        self._bindings = {}
+        # Name and parent name of every mode the callbacks were built for
+        self._mode_structure = []
 
     def is_running(self) -> bool:
         """Returns whether the code runner is executing code.
@@ -351,6 +385,11 @@ class CodeRunner:
         # Set default macro action delay
         gremlin.macro.MacroManager().default_delay = settings.default_delay
 
+        # Set how concurrent writes to the same vJoy output are combined
+        arbiter = output_arbiter.OutputArbiter()
+        for key, (policy, priorities) in settings.output_policies.items():
+            arbiter.set_policy(*key, policy, priorities)
+
         try:
             # Process actions define in user plugins
             self._setup_plugins()
@@ -371,23 +410,9 @@ class CodeRunner:
                             )
                             callback_count += 1
 
-            # Add a fake keyboard action which does nothing to the callbacks
-            # in every mode in order to have empty modes be "present"
-            for mode_name in self._profile.modes.mode_names():
-                self.event_handler.add_callback(
-                    0,
-                    mode_name,
-                    None,
-                    lambda x: x
-                )
-
             # Process action sequences defined via the UI
             self._setup_profile()
 
-            # Use inheritance to build duplicate parent actions in children
-            # if the child mode does not override the parent's action
-            self.event_handler.build_event_lookup(self._profile.modes)
-
             # Set vJoy axis default values
             for vid, data in settings.vjoy_initial_values.items():
                 vjoy_proxy = joystick_handling.VJoyProxy()[vid]
@@ -408,6 +433,7 @@ class CodeRunner:
             evt_listener.gremlin_active = True
 
             input_devices.periodic_registry.start()
+            input_devices.RelativeAxisIntegrator().start()
             macro.MacroManager().start()
 
             mode_manager.ModeManager().switch_to(
@@ -437,17 +463,107 @@ class CodeRunner:
         # Empty callback registry
         input_devices.callback_registry.clear()
         self.event_handler.clear()
+        self._bindings = {}
+        self._mode_structure = []
 
         # Stop periodic events and clear registry
         input_devices.periodic_registry.stop()
         input_devices.periodic_registry.clear()
 
+        input_devices.RelativeAxisIntegrator().stop()
         macro.MacroManager().stop()
         sendinput.MouseController().stop()
+        output_arbiter.OutputArbiter().reset()
 
         # Remove all claims on VJoy devices
         joystick_handling.VJoyProxy.reset()
 
+    def reload(self) -> None:
+        """Applies the changes made to the profile since it was started.
+
+        Only the callbacks of bindings that were added, removed, or changed
+        are created or removed. Everything else, such as the vJoy devices,
+        the mode stack, user plugins, and the state of unchanged callbacks,
+        is left as it is.
+        """
+        if not self._running:
+            return
+
+        start = time.perf_counter()
+        bindings = self._profile_bindings()
+        needs_rebuild = False
+        added = changed = removed = 0
+
+        current = set(bindings)
+        for binding in [b for b in self._bindings if b not in current]:
+            self._remove_binding(binding)
+            needs_rebuild = True
+            removed += 1
+
+        for binding in bindings:
+            try:
+                fingerprint = self._fingerprint(binding)
+            except error.ProfileError as e:
+                logging.getLogger("system").warning(
+                    f"Not applying incomplete binding of "
+                    f"{binding.input_item.descriptor()}: {e}"
+                )
+                continue
+
+            if binding not in self._bindings:
+                self._add_binding(binding, fingerprint)
+                needs_rebuild = True
+                added += 1
+                continue
+
+            # Renaming a mode changes the event without changing the
+            # binding's content
+            old_fingerprint, event, callback, installed = \
+                self._bindings[binding]
+            new_event = self._binding_event(binding)
+            same_event = (new_event.device_guid, new_event.mode, new_event) == \
+                (event.device_guid, event.mode, event)
+            if same_event and fingerprint == old_fingerprint:
+                continue
+            if same_event:
+                callback.uninstall()
+                callback = CallbackObject(binding)
+                installed = self.event_handler.replace_callback(
+                    event.device_guid,
+                    event.mode,
+                    event,
+                    installed,
+                    callback
+                )
+                self._bindings[binding] = \
+                    (fingerprint, event, callback, installed)
+            else:
+                self._remove_binding(binding)
+                self._add_binding(binding, fingerprint)
+                needs_rebuild = True
+            changed += 1
+
+        # Ensure newly created modes are present
+        for mode_name in self._profile.modes.mode_names():
+            if mode_name not in self.event_handler.callbacks.get(0, {}):
+                self.event_handler.add_callback(0, mode_name, None, lambda x: x)
+                needs_rebuild = True
+
+        # Inherited callbacks depend on the parent of every mode
+        mode_structure = self._current_mode_structure()
+        if mode_structure != self._mode_structure:
+            self._mode_structure = mode_structure
+            needs_rebuild = True
+
+        if needs_rebuild:
+            self.event_handler.rebuild_event_lookup(self._profile.modes)
+
+        logging.getLogger("system").info(
+            f"Reloaded profile with {added} added, {changed} changed, and "
+            f"{removed} removed bindings in "
+            f"{(time.perf_counter() - start) * 1000.0:.1f} ms"
+        )
+
     def _reset_state(self):
         """Resets all states to their default values."""
         self.event_handler._active_mode = self._profile.modes.first_mode
@@ -501,25 +617,121 @@ class CodeRunner:
         sys.path = system_paths
 
     def _setup_profile(self):
-        # Collect action sequences from physical inputs and intermediate
-        # output entries
-        item_list = sum(self._profile.inputs.values(), [])
-        action_sequences = sum([e.action_sequences for e in item_list], [])
-
-        # Create executable unit for each action
-        for action in action_sequences:
-            # Event on which to trigger this action
-            event = event_handler.Event(
-                event_type=action.input_item.input_type,
-                device_guid=action.input_item.device_id,
-                identifier=action.input_item.input_id,
-                mode=action.input_item.mode
-            )
-
-            # Generate executable unit for the linked library item
+        # Add a fake keyboard action which does nothing to the callbacks
+        # in every mode in order to have empty modes be "present"
+        for mode_name in self._profile.modes.mode_names():
             self.event_handler.add_callback(
-                event.device_guid,
-                action.input_item.mode,
-                event,
-                CallbackObject(action)
+                0,
+                mode_name,
+                None,
+                lambda x: x
             )
+
+        # Create executable unit for each action sequence of the physical
+        # inputs and intermediate output entries
+        for binding in self._profile_bindings():
+            # Incomplete bindings are compared again on the next reload
+            try:
+                fingerprint = self._fingerprint(binding)
+            except error.ProfileError:
+                fingerprint = None
+            self._add_binding(binding, fingerprint)
+
+        # Use inheritance to build duplicate parent actions in children
+        # if the child mode does not override the parent's action
+        self.event_handler.build_event_lookup(self._profile.modes)
+        self._mode_structure = self._current_mode_structure()
+
+    def _profile_bindings(self) -> List[profile.InputItemBinding]:
+        """Returns all bindings of the profile.
+
+        Returns:
+            Bindings of all input items
+        """
+        return list(itertools.chain.from_iterable(
+            item.action_sequences for item in self._profile.all_input_items()
+        ))
+
+    def _current_mode_structure(self) -> List[Tuple[str, str]]:
+        """Returns the structure of the profile's mode hierarchy.
+
+        Returns:
+            Sorted list of the name and parent name of every mode
+        """
+        return sorted(
+            (node.value, node.parent.value)
+            for node in self._profile.modes.mode_list()
+        )
+
+    def _binding_event(
+            self,
+            binding: profile.InputItemBinding
+    ) -> event_handler.Event:
+        """Returns the event triggering a binding.
+
+        Args:
+            binding: the binding for which to create the event
+
+        Returns:
+            Event on which to execute the binding
+        """
+        return event_handler.Event(
+            event_type=binding.input_item.input_type,
+            device_guid=binding.input_item.device_id,
+            identifier=binding.input_item.input_id,
+            mode=binding.input_item.mode
+        )
+
+    def _add_binding(
+            self,
+            binding: profile.InputItemBinding,
+            fingerprint: bytes
+    ) -> None:
+        """Creates and installs the callback executing a binding.
+
+        Args:
+            binding: the binding to execute
+            fingerprint: fingerprint of the binding's content
+        """
+        event = self._binding_event(binding)
+        callback = CallbackObject(binding)
+        installed = self.event_handler.add_callback(
+            event.device_guid,
+            event.mode,
+            event,
+            callback
+        )
+        self._bindings[binding] = (fingerprint, event, callback, installed)
+
+    def _remove_binding(self, binding: profile.InputItemBinding) -> None:
+        """Removes the callback executing a binding.
+
+        Args:
+            binding: the binding whose callback to remove
+        """
+        _, event, callback, installed = self._bindings.pop(binding)
+        callback.uninstall()
+        self.event_handler.remove_callback(
+            event.device_guid,
+            event.mode,
+            event,
+            installed
+        )
+
+    def _fingerprint(self, binding: profile.InputItemBinding) -> bytes:
+        """Returns a digest of everything determining a binding's behavior.
+
+        Args:
+            binding: the binding to compute the fingerprint of
+
+        Returns:
+            Digest of the binding's and all its actions' XML representation
+        """
+        digest = hashlib.sha256()
+        digest.update(ElementTree.tostring(binding.to_xml()))
+        actions = [binding.root_action]
+        while len(actions) > 0:
+            action = actions.pop()
+            digest.update(ElementTree.tostring(action.to_xml()))
+            actions.extend(action.get_actions()[0])
+        return digest.digest()
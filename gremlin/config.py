@@ -17,15 +17,16 @@
 
 import json
 import logging
-import time
 import os
 import re
+import tempfile
+import threading
 
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from PySide6 import QtCore
 
-from gremlin import common, error, util
+from gremlin import common, error, scheduler, util
 from gremlin.types import PropertyType
 
 _config_file_path = os.path.join(util.userprofile_path(), "configuration.json")
@@ -42,19 +43,93 @@ _required_properties = {
 }
 
 
+class ConfigValue:
+
+    """Current value of a single configuration parameter.
+
+    Instances are obtained via Configuration.accessor and are kept up to
+    date by the configuration, allowing the value to be read as a plain
+    attribute. Subscribers are notified whenever the value changes.
+    """
+
+    __slots__ = ("key", "value", "_subscribers")
+
+    def __init__(self, key: Tuple[str, str, str], value: Any) -> None:
+        """Creates a new accessor.
+
+        Args:
+            key: section, group, and name of the parameter
+            value: current value of the parameter
+        """
+        self.key = key
+        self.value = value
+        self._subscribers = []
+
+    def subscribe(self, callback: Callable[[Any], None]) -> None:
+        """Registers a function to call when the value changes.
+
+        Args:
+            callback: function called with the new value
+        """
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Any], None]) -> None:
+        """Removes a previously registered function.
+
+        Args:
+            callback: the function to remove
+        """
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _update(self, value: Any) -> None:
+        """Stores a new value, notifying subscribers if it changed.
+
+        Args:
+            value: the new value of the parameter
+        """
+        if value == self.value and type(value) == type(self.value):
+            return
+        self.value = value
+        for callback in list(self._subscribers):
+            try:
+                callback(value)
+            except Exception:
+                logging.getLogger("system").exception(
+                    f"Error in configuration subscriber of {self.key}"
+                )
+
+
 @common.SingletonDecorator
 class Configuration:
 
-    """Responsible for loading and saving configuration data."""
+    """Responsible for loading and saving configuration data.
+
+    Changes are collected and written to disk in the background shortly
+    after the first of them. The file is replaced atomically, and changes of
+    the file caused by these writes do not trigger a reload.
+    """
+
+    # Time in seconds after a change before pending changes are written
+    save_delay = 0.5
 
     def __init__(self):
         """Creates a new instance, loading the current configuration."""
         self._data = {}
-        self._last_reload = None
+        self._accessors = {}
+        self._lock = threading.RLock()
+        self._is_dirty = False
+        self._save_timer = None
+        # Status of the file as last read or written by this instance
+        self._file_state = None
         self.load()
+        # The file has to exist for it to be watched
+        if not os.path.isfile(_config_file_path):
+            self.save()
 
         self.watcher = QtCore.QFileSystemWatcher([_config_file_path])
-        self.watcher.fileChanged.connect(self.load)
+        self.watcher.fileChanged.connect(self._file_changed)
 
     def count(self) -> int:
         """Returns the number of parameters stored.
@@ -65,77 +140,115 @@ class Configuration:
         return len(self._data)
 
     def load(self):
-        """Loads the configuration file's content."""
-        if self._last_reload is not None and \
-                time.time() - self._last_reload < 1:
+        """Loads the configuration file's content.
+
+        Nothing is loaded if the file did not change since it was last read
+        or written.
+        """
+        file_state = self._file_stat()
+        if file_state is not None and file_state == self._file_state:
             return
 
         # Attempt to load the configuration file if this fails set
         # default empty values.
-        load_successful = False
         json_data = {}
         if os.path.isfile(_config_file_path):
             with open(_config_file_path) as hdl:
                 try:
                     decoder = json.JSONDecoder()
                     json_data = decoder.decode(hdl.read())
-                    load_successful = True
                 except ValueError:
                     pass
-        if not load_successful:
-            self._data = {}
 
-        # Convert data based on property types
-        self._data = {}
+        # Convert data based on property types, only parsing values which
+        # differ from the ones currently held
+        data = {}
         for section, sec_data in json_data.items():
             for group, grp_data in sec_data.items():
                for name, entry in grp_data.items():
+                    key = (section, group, name)
                     data_type = PropertyType.to_enum(entry["data_type"])
-                    self._data[(section, group, name)] = {
-                        "value": util.property_from_string(
+                    current = self._data.get(key)
+                    if current is not None and \
+                            current["data_type"] == data_type and \
+                            util.property_to_string(
+                                data_type,
+                                current["value"]
+                            ) == entry["value"]:
+                        value = current["value"]
+                    else:
+                        value = util.property_from_string(
                             data_type,
                             entry["value"]
-                        ),
+                        )
+                    data[key] = {
+                        "value": value,
                         "data_type": data_type,
                         "description": entry["description"],
                         "properties": entry["properties"],
                         "expose": entry["expose"]
                     }
-
-        # Save all data
-        self._last_reload = time.time()
-        self.save()
+        with self._lock:
+            self._data = data
+            self._file_state = file_state
+        for key in list(self._accessors.keys()):
+            self._notify(key)
 
     def save(self):
         """Writes the configuration file to disk."""
-        # Convert all data to string representations
-        json_data = {}
-        for key, entry in self._data.items():
-            section = key[0]
-            group = key[1]
-            name = key[2]
-            if section not in json_data:
-                json_data[section] = {}
-            if group not in json_data[section]:
-                json_data[section][group] = {}
-            json_data[section][group][name] = {
-                "value": util.property_to_string(
-                    entry["data_type"],
-                    entry["value"],
-                ),
-                "data_type": PropertyType.to_string(entry["data_type"]),
-                "description": entry["description"],
-                "properties": entry["properties"],
-                "expose": entry["expose"]
-            }
-
-        # Write data to file
-        with open(_config_file_path, "w") as hdl:
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._is_dirty = False
+
+            # Convert all data to string representations
+            json_data = {}
+            for key, entry in self._data.items():
+                section = key[0]
+                group = key[1]
+                name = key[2]
+                if section not in json_data:
+                    json_data[section] = {}
+                if group not in json_data[section]:
+                    json_data[section][group] = {}
+                json_data[section][group][name] = {
+                    "value": util.property_to_string(
+                        entry["data_type"],
+                        entry["value"],
+                    ),
+                    "data_type": PropertyType.to_string(entry["data_type"]),
+                    "description": entry["description"],
+                    "properties": entry["properties"],
+                    "expose": entry["expose"]
+                }
+
+            # Write data to a temporary file which then replaces the
+            # configuration file, such that the file is never incomplete
             encoder = json.JSONEncoder(
                 sort_keys=True,
                 indent=4
             )
-            hdl.write(encoder.encode(json_data))
+            directory = os.path.dirname(os.path.abspath(_config_file_path))
+            fd, tmp_path = tempfile.mkstemp(
+                prefix="configuration.",
+                suffix=".tmp",
+                dir=directory
+            )
+            try:
+                with os.fdopen(fd, "w") as hdl:
+                    hdl.write(encoder.encode(json_data))
+                os.replace(tmp_path, _config_file_path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._file_state = self._file_stat()
+
+    def flush(self):
+        """Writes pending changes to disk immediately."""
+        if self._is_dirty:
+            self.save()
 
     def register(
         self,
@@ -192,7 +305,7 @@ class Configuration:
                     f"Properties for parameter '{key}' changed, updating"
                 )
                 self._data[key]["properties"] = properties
-                self.save()
+                self._mark_dirty()
 
             if data_type != old_data_type:
                 logging.warning(
@@ -202,14 +315,16 @@ class Configuration:
                 return
 
         # Store new entry
-        self._data[key] = {
-            "value": initial_value,
-            "data_type": data_type,
-            "description": description,
-            "properties": properties,
-            "expose": expose
-        }
-        self.save()
+        with self._lock:
+            self._data[key] = {
+                "value": initial_value,
+                "data_type": data_type,
+                "description": description,
+                "properties": properties,
+                "expose": expose
+            }
+        self._mark_dirty()
+        self._notify(key)
 
     def get(self, section: str, group: str, name: str, entry: str) -> Any:
         """Gets the value of a specific parameter entry.
@@ -244,7 +359,8 @@ class Configuration:
         )
         if is_valid:
             self._data[key]["value"] = value
-            self.save()
+            self._mark_dirty()
+            self._notify(key)
         else:
             data_type = self._data[key]["data_type"]
             raise error.GremlinError(
@@ -252,6 +368,27 @@ class Configuration:
                 f"'{data_type}' got '{type(value)}'"
             )
 
+    def accessor(self, section: str, group: str, name: str) -> ConfigValue:
+        """Returns an object holding the current value of a parameter.
+
+        Args:
+            section: overall section this parameter is associated with
+            group: grouping into which the parameter belongs
+            name: name by which the new parameter will be accessed
+
+        Returns:
+            Accessor whose value attribute always holds the parameter's
+            current value
+        """
+        key = (section, group, name)
+        if key not in self._data:
+            raise error.GremlinError(f"No parameter with key {key} exists")
+        with self._lock:
+            if key not in self._accessors:
+                self._accessors[key] = \
+                    ConfigValue(key, self._data[key]["value"])
+            return self._accessors[key]
+
     def sections(self) -> List[str]:
         """Returns the list of all sections.
 
@@ -353,6 +490,49 @@ class Configuration:
         """
         return self._retrieve_value(section, group, name, "expose")
 
+    def _notify(self, key: Tuple[str, str, str]) -> None:
+        """Updates the accessor of a parameter with its current value.
+
+        Args:
+            key: section, group, and name of the parameter
+        """
+        accessor = self._accessors.get(key)
+        if accessor is not None and key in self._data:
+            accessor._update(self._data[key]["value"])
+
+    def _mark_dirty(self) -> None:
+        """Schedules a write of the modified configuration."""
+        with self._lock:
+            self._is_dirty = True
+            if self._save_timer is None or not self._save_timer.is_pending:
+                self._save_timer = scheduler.schedule(
+                    self.save_delay,
+                    self.flush
+                )
+
+    def _file_stat(self) -> Optional[Tuple[int, int]]:
+        """Returns the modification time and size of the configuration file.
+
+        Returns:
+            Modification time and size or None if the file does not exist
+        """
+        try:
+            stat = os.stat(_config_file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _file_changed(self, path: str) -> None:
+        """Reloads the configuration if the file was modified externally.
+
+        Args:
+            path: path of the modified file
+        """
+        # Replacing the file can remove it from the set of watched files
+        if path not in self.watcher.files() and os.path.isfile(path):
+            self.watcher.addPath(path)
+        self.load()
+
     def _retrieve_value(
         self,
         section: str,
@@ -21,7 +21,7 @@ import functools
 import inspect
 import logging
 import time
-from threading import Thread, Timer
+from threading import Thread
 from typing import Any, Callable, TYPE_CHECKING
 import uuid
 
@@ -31,7 +31,7 @@ import dill
 
 import gremlin.keyboard
 from gremlin import common, config, error, joystick_handling, mode_manager, \
-    profile, util, shared_state, windows_event_hook
+    output_arbiter, profile, util, shared_state, windows_event_hook
 from gremlin.input_cache import Joystick, Keyboard
 from gremlin.types import InputType
 
@@ -172,6 +172,8 @@ class EventListener(QtCore.QObject):
     virtual_event = QtCore.Signal(Event)
     # Signal emitted when a joystick is attached or removed
     device_change_event = QtCore.Signal()
+    # Signal requesting a device list update from the Qt thread
+    _device_change_pending = QtCore.Signal()
 
     def __init__(self):
         """Creates a new instance."""
@@ -185,8 +187,18 @@ class EventListener(QtCore.QObject):
         self._calibrations = {}
         self._modes = mode_manager.ModeManager()
 
-        # Joystick device change update timeout timer
-        self._device_update_timer = None
+        # Joystick device change update timeout timer, the update runs in
+        # the Qt thread as it probes every vJoy device
+        self._device_update_timer = QtCore.QTimer(self)
+        self._device_update_timer.setSingleShot(True)
+        self._device_update_timer.setInterval(200)
+        self._device_update_timer.timeout.connect(
+            self._run_device_list_update
+        )
+        self._device_change_pending.connect(
+            self._restart_device_update_timer,
+            QtCore.Qt.QueuedConnection
+        )
         self._joystick = Joystick()
         self._keyboard = Keyboard()
 
@@ -288,11 +300,14 @@ class EventListener(QtCore.QObject):
             data: information about the device changing state
             action: whether the device was added or removed
         """
-        if self._device_update_timer is not None:
-            self._device_update_timer.cancel()
-        self._device_update_timer = Timer(0.2, self._run_device_list_update)
+        self._device_change_pending.emit()
+
+    @QtCore.Slot()
+    def _restart_device_update_timer(self) -> None:
+        """Delays the device update until no further changes occur."""
         self._device_update_timer.start()
 
+    @QtCore.Slot()
     def _run_device_list_update(self) -> None:
         """Performs the update of the devices connected."""
         joystick_handling.joystick_devices_initialization()
@@ -410,6 +425,8 @@ class EventHandler(QtCore.QObject):
     mode_changed = QtCore.Signal(str)
     # Signal emitted when the application is pause / resumed
     is_active = QtCore.Signal(bool)
+    # Signal carrying functions to run in the thread processing events
+    _deferred_call = QtCore.Signal(object)
 
     def __init__(self):
         """Initializes the EventHandler instance."""
@@ -418,6 +435,26 @@ class EventHandler(QtCore.QObject):
         self.plugins = {}
         self.callbacks = {}
         self._event_lookup = {}
+        # Entries of the callback table copied from a parent mode
+        self._inherited = set()
+        self._deferred_call.connect(
+            self._run_deferred,
+            QtCore.Qt.QueuedConnection
+        )
+
+    def call_in_event_thread(self, function: Callable[[], None]) -> None:
+        """Runs a function in the thread processing input events.
+
+        Functions passed from other threads, such as timeouts run by the
+        shared scheduler, are queued behind the events already pending.
+
+        Args:
+            function: the function to run
+        """
+        if QtCore.QThread.currentThread() is self.thread():
+            self._run_deferred(function)
+        else:
+            self._deferred_call.emit(function)
 
     def add_plugin(self, plugin: Any) -> None:
         """Adds a new plugin to be attached to event callbacks.
@@ -435,7 +472,7 @@ class EventHandler(QtCore.QObject):
             mode: str,
             event: Event,
             callback: Callable[[Event, Value], None]
-    ) -> None:
+    ) -> Callable[[Event, Value], None]:
         """Installs the provided callback for the given event.
 
         Args:
@@ -443,16 +480,75 @@ class EventHandler(QtCore.QObject):
             mode: the mode the callback belongs to
             event: the event for which to install the callback
             callback: the callback function to link to the provided event
+
+        Returns:
+            The installed callback
         """
         if device_guid not in self.callbacks:
             self.callbacks[device_guid] = {}
         if mode not in self.callbacks[device_guid]:
             self.callbacks[device_guid][mode] = {}
+        # Callbacks inherited from a parent mode are replaced by the mode's
+        # own callbacks
+        if (device_guid, mode, event) in self._inherited:
+            self._inherited.discard((device_guid, mode, event))
+            del self.callbacks[device_guid][mode][event]
         if event not in self.callbacks[device_guid][mode]:
             self.callbacks[device_guid][mode][event] = []
-        self.callbacks[device_guid][mode][event].append(
-            self._install_plugins(callback)
-        )
+        installed = self._install_plugins(callback)
+        self.callbacks[device_guid][mode][event].append(installed)
+        return installed
+
+    def replace_callback(
+            self,
+            device_guid: uuid.UUID,
+            mode: str,
+            event: Event,
+            old_callback: Callable[[Event, Value], None],
+            new_callback: Callable[[Event, Value], None]
+    ) -> Callable[[Event, Value], None]:
+        """Replaces an installed callback with a new one.
+
+        The callback is replaced in place, thus modes inheriting it use the
+        new callback as well.
+
+        Args:
+            device_guid: the GUID of the device the callback is associated with
+            mode: the mode the callback belongs to
+            event: the event the callback is installed for
+            old_callback: the installed callback to replace
+            new_callback: the callback to install in its place
+
+        Returns:
+            The installed callback
+        """
+        callbacks = self.callbacks[device_guid][mode][event]
+        installed = self._install_plugins(new_callback)
+        callbacks[callbacks.index(old_callback)] = installed
+        return installed
+
+    def remove_callback(
+            self,
+            device_guid: uuid.UUID,
+            mode: str,
+            event: Event,
+            callback: Callable[[Event, Value], None]
+    ) -> None:
+        """Removes an installed callback.
+
+        Removing the last callback of an event requires the lookup table to
+        be rebuilt for modes inheriting it to no longer use it.
+
+        Args:
+            device_guid: the GUID of the device the callback is associated with
+            mode: the mode the callback belongs to
+            event: the event the callback is installed for
+            callback: the installed callback to remove
+        """
+        callbacks = self.callbacks[device_guid][mode][event]
+        callbacks.remove(callback)
+        if len(callbacks) == 0:
+            del self.callbacks[device_guid][mode][event]
 
     def build_event_lookup(self, modes: profile.ModeHierarchy) -> None:
         """Builds the lookup table linking events to callbacks.
@@ -479,6 +575,20 @@ class EventHandler(QtCore.QObject):
                         for event, callbacks in mode_cb.items():
                             if event not in device_cb[child]:
                                 device_cb[child][event] = callbacks
+                                self._inherited.add(
+                                    (device_guid, child, event)
+                                )
+
+    def rebuild_event_lookup(self, modes: profile.ModeHierarchy) -> None:
+        """Rebuilds the lookup table after callbacks were added or removed.
+
+        Args:
+            modes: information about the mode hierarchy
+        """
+        for device_guid, mode, event in self._inherited:
+            self.callbacks[device_guid][mode].pop(event, None)
+        self._inherited = set()
+        self.build_event_lookup(modes)
 
     def resume(self) -> None:
         """Resumes the processing of callbacks."""
@@ -498,6 +608,7 @@ class EventHandler(QtCore.QObject):
     def clear(self) -> None:
         """Removes all attached callbacks."""
         self.callbacks = {}
+        self._inherited = set()
 
     @QtCore.Slot(Event)
     def process_event(self, event: Event) -> None:
@@ -507,13 +618,39 @@ class EventHandler(QtCore.QObject):
         Args:
             event: the event to process
         """
-        for cb in self._matching_callbacks(event):
-            try:
-                cb(event)
-            except error.VJoyError as e:
-                util.display_error(str(e))
-                logging.getLogger("system").exception(f"VJoy error: '{e}'")
-                self.pause()
+        try:
+            # Combine the vJoy outputs of all callbacks into one update
+            with output_arbiter.OutputArbiter().tick():
+                for cb in self._matching_callbacks(event):
+                    try:
+                        cb(event)
+                    except error.VJoyError as e:
+                        self._handle_vjoy_error(e)
+        except error.VJoyError as e:
+            self._handle_vjoy_error(e)
+
+    @QtCore.Slot(object)
+    def _run_deferred(self, function: Callable[[], None]) -> None:
+        """Runs a function passed to call_in_event_thread.
+
+        Args:
+            function: the function to run
+        """
+        try:
+            with output_arbiter.OutputArbiter().tick():
+                function()
+        except error.VJoyError as e:
+            self._handle_vjoy_error(e)
+
+    def _handle_vjoy_error(self, e: error.VJoyError) -> None:
+        """Reports a vJoy error and stops the processing of callbacks.
+
+        Args:
+            e: the error raised while writing to vJoy
+        """
+        util.display_error(str(e))
+        logging.getLogger("system").exception(f"VJoy error: '{e}'")
+        self.pause()
 
     def _matching_callbacks(
             self,
@@ -19,6 +19,8 @@
 
 import logging
 
+from gremlin import error
+
 
 class Transition:
 
@@ -75,3 +77,78 @@ class FiniteStateMachine:
             ))
         self.current_state = self.transitions[key].new_state
         return value
+
+
+class CompiledFiniteStateMachine:
+
+    """Finite state machine with integer encoded states and actions.
+
+    The transitions are validated once on construction and stored in flat
+    lists indexed by state * action count + action, turning a transition into
+    a single list lookup. Actions are passed to perform as their index in the
+    list of actions, see action_id.
+    """
+
+    def __init__(self, start_state, states, actions, transitions):
+        """Creates a new finite state machine object.
+
+        :param start_state the state in which the FSM starts in
+        :param states the list of states
+        :param actions the list of possible actions of the FSM
+        :param transitions the states x actions transition matrix, every
+            combination of state and action has to be present
+        """
+        self.states = list(states)
+        self.actions = list(actions)
+        state_ids = {state: i for i, state in enumerate(self.states)}
+        self._action_ids = {action: i for i, action in enumerate(self.actions)}
+        if start_state not in state_ids:
+            raise error.GremlinError(f"Invalid start state {start_state}")
+
+        self._action_count = len(self.actions)
+        self._next_state = []
+        self._callbacks = []
+        for state in self.states:
+            for action in self.actions:
+                transition = transitions.get((state, action))
+                if transition is None:
+                    raise error.GremlinError(
+                        f"Missing transition for action {action} "
+                        f"in state {state}"
+                    )
+                if transition.new_state not in state_ids:
+                    raise error.GremlinError(
+                        f"Invalid target state {transition.new_state}"
+                    )
+                self._next_state.append(state_ids[transition.new_state])
+                self._callbacks.append(transition.callback)
+        self._state = state_ids[start_state]
+
+    @property
+    def current_state(self):
+        """Returns the name of the current state.
+
+        :return name of the state the FSM is in
+        """
+        return self.states[self._state]
+
+    def action_id(self, action):
+        """Returns the integer identifier of an action.
+
+        :param action the name of the action
+        :return identifier to pass to perform
+        """
+        if action not in self._action_ids:
+            raise error.GremlinError(f"Invalid action {action}")
+        return self._action_ids[action]
+
+    def perform(self, action):
+        """Performs a state transition on the FSM.
+
+        :param action the identifier of the action to perform
+        :return returns the state transition function's return value
+        """
+        index = self._state * self._action_count + action
+        value = self._callbacks[index]()
+        self._state = self._next_state[index]
+        return value
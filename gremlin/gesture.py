@@ -0,0 +1,409 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Recognition of button gestures such as multi-taps, holds, and chords.
+
+The gestures bound to an input are compiled into an integer transition
+table which is driven by press and release events as well as timeouts.
+Timeouts are run by the shared scheduler, i.e. no threads are created per
+input, and every event costs a constant number of table lookups.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from gremlin import clock, error, scheduler
+
+
+# Events driving the transition table
+PRESS = 0
+RELEASE = 1
+TIMEOUT = 2
+_EVENT_COUNT = 3
+
+# Timer operations performed by a transition
+_TIMER_CANCEL = 0
+_TIMER_HOLD = 1
+_TIMER_TAP = 2
+_TIMER_REPEAT = 3
+_TIMER_KEEP = 4
+
+# Number of integers describing a single transition
+_ENTRY_SIZE = 4
+
+
+class Tap:
+
+    """Gesture formed by a number of quick press and release cycles."""
+
+    def __init__(self, count: int=1) -> None:
+        """Creates a new tap gesture.
+
+        Args:
+            count: number of taps, e.g. 2 for a double tap
+        """
+        if count < 1:
+            raise error.GremlinError("Tap count has to be at least one")
+        self.count = count
+
+
+class Hold:
+
+    """Gesture formed by holding an input down for some time."""
+
+    def __init__(
+            self,
+            duration: float,
+            repeat_interval: Optional[float]=None
+    ) -> None:
+        """Creates a new hold gesture.
+
+        Args:
+            duration: time in seconds the input has to be held
+            repeat_interval: if given the gesture is activated again at
+                this interval in seconds for as long as the input is held
+        """
+        if repeat_interval is not None and repeat_interval <= 0.0:
+            raise error.GremlinError("Hold repeat interval has to be positive")
+        self.duration = duration
+        self.repeat_interval = repeat_interval
+
+
+# Receives the index of the gesture and whether it activated or released
+GestureCallback = Callable[[int, bool], None]
+
+
+class GestureRecognizer:
+
+    """Recognizes the gestures bound to a single button.
+
+    Tap gestures only report their activation, hold gestures report their
+    activation, every repetition, and their release. A tap gesture is
+    reported once the time for further taps has elapsed, unless no gesture
+    with more taps exists, in which case it is reported on release.
+
+    The state is encoded as an integer with 0 being idle, states 1 to N
+    the input being down for the n-th time, states N+1 to 2N-1 the input
+    being up after n taps, 2N a hold being active and 2N+1 the input being
+    down without any gesture remaining possible.
+    """
+
+    def __init__(
+            self,
+            gestures: Sequence[Tap | Hold],
+            callback: GestureCallback,
+            tap_window: float=0.25
+    ) -> None:
+        """Creates a new recognizer for the given gestures.
+
+        Args:
+            gestures: the gestures to recognize
+            callback: function called with the index of a gesture in the
+                list of gestures and whether it activated or released
+            tap_window: maximum time in seconds between consecutive taps
+                and duration of a press that is part of a multi-tap
+        """
+        self._callback = callback
+        self._delays = [
+            None,
+            None,
+            tap_window,
+            None
+        ]
+        self._table = self._compile(gestures)
+
+        self._lock = threading.Lock()
+        self._state = 0
+        self._deadline = None
+        self._timer = None
+
+    @property
+    def is_idle(self) -> bool:
+        """Returns whether no gesture is in progress.
+
+        Returns:
+            True if no gesture is being recognized, False otherwise
+        """
+        return self._state == 0
+
+    def process(
+            self,
+            is_pressed: bool,
+            timestamp: Optional[float]=None
+    ) -> None:
+        """Processes a change of the button's state.
+
+        Args:
+            is_pressed: whether the button is pressed
+            timestamp: time of the change, the current time if None
+        """
+        if timestamp is None:
+            timestamp = clock.get_clock().now()
+        emitted = []
+        with self._lock:
+            # Handle timeouts that are due but whose timer has not yet run
+            while self._deadline is not None and timestamp >= self._deadline:
+                self._step(TIMEOUT, self._deadline, emitted)
+            self._step(PRESS if is_pressed else RELEASE, timestamp, emitted)
+        self._emit(emitted)
+
+    def reset(self) -> None:
+        """Returns to the idle state without reporting anything."""
+        with self._lock:
+            self._state = 0
+            self._set_timer(None)
+
+    def _timeout(self, deadline: float) -> None:
+        """Runs the timeout transition if the timer is still current.
+
+        Args:
+            deadline: the deadline of the timer that expired
+        """
+        emitted = []
+        with self._lock:
+            if self._deadline != deadline:
+                return
+            self._timer = None
+            self._step(TIMEOUT, deadline, emitted)
+        self._emit(emitted)
+
+    def _step(
+            self,
+            event: int,
+            timestamp: float,
+            emitted: List[Tuple[int, bool]]
+    ) -> None:
+        """Performs a single transition of the state machine.
+
+        Args:
+            event: the event triggering the transition
+            timestamp: time at which the event occurred
+            emitted: list to which reported gestures are appended
+        """
+        offset = (self._state * _EVENT_COUNT + event) * _ENTRY_SIZE
+        self._state = self._table[offset]
+        gesture = self._table[offset + 1]
+        if gesture >= 0:
+            emitted.append((gesture, self._table[offset + 2] == 1))
+
+        timer = self._table[offset + 3]
+        if timer == _TIMER_CANCEL:
+            self._set_timer(None)
+        elif timer != _TIMER_KEEP:
+            self._set_timer(timestamp + self._delays[timer])
+
+    def _set_timer(self, deadline: Optional[float]) -> None:
+        """Replaces the pending timeout.
+
+        Args:
+            deadline: time of the new timeout, None to only cancel
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._deadline = deadline
+        if deadline is not None:
+            self._timer = scheduler.schedule(
+                deadline - clock.get_clock().now(),
+                lambda: self._timeout(deadline)
+            )
+
+    def _emit(self, emitted: List[Tuple[int, bool]]) -> None:
+        """Reports recognized gestures outside of the lock.
+
+        Args:
+            emitted: gestures and their activation state to report
+        """
+        for gesture, is_active in emitted:
+            self._callback(gesture, is_active)
+
+    def _compile(self, gestures: Sequence[Tap | Hold]) -> List[int]:
+        """Creates the transition table for the given gestures.
+
+        Args:
+            gestures: the gestures to recognize
+
+        Returns:
+            Flat transition table holding next state, reported gesture,
+            activation flag, and timer operation of every transition
+        """
+        taps = {}
+        hold = None
+        for i, gesture in enumerate(gestures):
+            if isinstance(gesture, Tap):
+                if gesture.count in taps:
+                    raise error.GremlinError(
+                        f"Duplicate tap gesture with count {gesture.count}"
+                    )
+                taps[gesture.count] = i
+            elif isinstance(gesture, Hold):
+                if hold is not None:
+                    raise error.GremlinError("Only one hold gesture allowed")
+                hold = i
+                self._delays[_TIMER_HOLD] = gesture.duration
+                self._delays[_TIMER_REPEAT] = gesture.repeat_interval
+            else:
+                raise error.GremlinError(
+                    f"Invalid gesture type {type(gesture).__name__}"
+                )
+
+        count = max(taps.keys(), default=1)
+        holding = 2 * count
+        swallow = 2 * count + 1
+        repeat = _TIMER_REPEAT if hold is not None and \
+            self._delays[_TIMER_REPEAT] is not None else _TIMER_CANCEL
+
+        def down(n):
+            return n
+
+        def up(n):
+            return count + n
+
+        table = [0] * ((swallow + 1) * _EVENT_COUNT * _ENTRY_SIZE)
+
+        def set_entry(state, event, next_state, gesture=-1, active=1,
+                      timer=_TIMER_KEEP):
+            offset = (state * _EVENT_COUNT + event) * _ENTRY_SIZE
+            table[offset:offset + _ENTRY_SIZE] = \
+                [next_state, gesture, active, timer]
+
+        # Idle
+        set_entry(
+            0, PRESS, down(1),
+            timer=_TIMER_HOLD if hold is not None else _TIMER_CANCEL
+        )
+        set_entry(0, RELEASE, 0, timer=_TIMER_CANCEL)
+        set_entry(0, TIMEOUT, 0, timer=_TIMER_CANCEL)
+
+        for n in range(1, count + 1):
+            # Input down for the n-th time
+            set_entry(down(n), PRESS, down(n))
+            if n == count:
+                set_entry(
+                    down(n), RELEASE, 0, taps.get(n, -1),
+                    timer=_TIMER_CANCEL
+                )
+            else:
+                set_entry(down(n), RELEASE, up(n), timer=_TIMER_TAP)
+            if n == 1 and hold is not None:
+                set_entry(down(n), TIMEOUT, holding, hold, timer=repeat)
+            else:
+                set_entry(down(n), TIMEOUT, swallow, timer=_TIMER_CANCEL)
+
+            # Input up after n taps
+            if n < count:
+                set_entry(up(n), PRESS, down(n + 1), timer=_TIMER_TAP)
+                set_entry(up(n), RELEASE, up(n))
+                set_entry(
+                    up(n), TIMEOUT, 0, taps.get(n, -1),
+                    timer=_TIMER_CANCEL
+                )
+
+        # Active hold gesture
+        set_entry(holding, PRESS, holding)
+        set_entry(holding, RELEASE, 0, hold, 0, _TIMER_CANCEL)
+        set_entry(holding, TIMEOUT, holding, hold, timer=repeat)
+
+        # Waiting for a release without any possible gesture
+        set_entry(swallow, PRESS, swallow)
+        set_entry(swallow, RELEASE, 0, timer=_TIMER_CANCEL)
+        set_entry(swallow, TIMEOUT, swallow, timer=_TIMER_CANCEL)
+
+        return table
+
+
+class ChordRecognizer:
+
+    """Recognizes a set of buttons being pressed together.
+
+    The chord activates once all buttons are down, provided they were
+    pressed within the time window, and releases as soon as any of them is
+    released. The pressed buttons are tracked as a bit mask.
+    """
+
+    def __init__(
+            self,
+            size: int,
+            window: float,
+            callback: Callable[[bool], None]
+    ) -> None:
+        """Creates a new chord recognizer.
+
+        Args:
+            size: number of buttons forming the chord
+            window: maximum time in seconds between the first and the last
+                button press
+            callback: function called with the activation state of the chord
+        """
+        if size < 2:
+            raise error.GremlinError("A chord requires at least two buttons")
+        self._full = (1 << size) - 1
+        self._window = window
+        self._callback = callback
+
+        self._lock = threading.Lock()
+        self._mask = 0
+        self._start = 0.0
+        self._is_active = False
+
+    @property
+    def is_active(self) -> bool:
+        """Returns whether the chord is currently active.
+
+        Returns:
+            True if the chord is active, False otherwise
+        """
+        return self._is_active
+
+    def process(
+            self,
+            index: int,
+            is_pressed: bool,
+            timestamp: Optional[float]=None
+    ) -> None:
+        """Processes a change of state of one of the chord's buttons.
+
+        Args:
+            index: index of the button within the chord
+            is_pressed: whether the button is pressed
+            timestamp: time of the change, the current time if None
+        """
+        if timestamp is None:
+            timestamp = clock.get_clock().now()
+        bit = 1 << index
+        if bit > self._full:
+            raise error.GremlinError(f"Invalid chord button index {index}")
+
+        changed = False
+        with self._lock:
+            if is_pressed:
+                if self._mask == 0:
+                    self._start = timestamp
+                self._mask |= bit
+                if self._mask == self._full and not self._is_active and \
+                        timestamp - self._start <= self._window:
+                    self._is_active = changed = True
+            else:
+                self._mask &= ~bit
+                if self._is_active:
+                    self._is_active = False
+                    changed = True
+            is_active = self._is_active
+        if changed:
+            self._callback(is_active)
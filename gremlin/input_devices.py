@@ -21,20 +21,23 @@ from collections.abc import Callable
 import functools
 import heapq
 import inspect
+import itertools
 import logging
 import time
 import threading
+from typing import Dict, Hashable, List, Optional, Tuple
 import uuid
 
 from PySide6 import QtCore
 
+import gremlin.clock
 import gremlin.common
 import gremlin.keyboard
 import gremlin.types
 from dill import UUID_Invalid
 
 from gremlin import common, error, event_handler, joystick_handling, \
-    mode_manager
+    mode_manager, output_arbiter
 from gremlin.input_cache import Joystick, Keyboard
 
 
@@ -79,16 +82,86 @@ class CallbackRegistry:
         self._registry = {}
 
 
+class PeriodicStatistics:
+
+    """Execution statistics of a periodic callback."""
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.count = 0
+        self.total_time = 0.0
+        self.min_time = float("inf")
+        self.max_time = 0.0
+        self.overruns = 0
+        self.skipped = 0
+
+    @property
+    def mean_time(self) -> float:
+        """Returns the average execution time of the callback.
+
+        Returns:
+            Average execution time in seconds
+        """
+        return self.total_time / self.count if self.count > 0 else 0.0
+
+    def record(self, duration: float) -> None:
+        """Records a single execution of the callback.
+
+        Args:
+            duration: execution time in seconds
+        """
+        self.count += 1
+        self.total_time += duration
+        self.min_time = min(self.min_time, duration)
+        self.max_time = max(self.max_time, duration)
+
+
+class PeriodicEntry:
+
+    """Scheduling state of a single periodic callback."""
+
+    def __init__(
+            self,
+            function: Callable[[], None],
+            callback: Callable[[], None],
+            interval: float,
+            overrun_policy: gremlin.types.OverrunPolicy
+    ):
+        """Creates a new instance.
+
+        Args:
+            function: the function as registered with the registry
+            callback: the function to execute with plugins installed
+            interval: the time between executions
+            overrun_policy: handling of missed executions
+        """
+        self.function = function
+        self.callback = callback
+        self.interval = interval
+        self.overrun_policy = overrun_policy
+        self.statistics = PeriodicStatistics()
+
+
 class PeriodicRegistry:
 
-    """Registry for periodically executed functions."""
+    """Registry for periodically executed functions.
+
+    Callbacks are executed at fixed deadlines, i.e. the next deadline of a
+    callback is its previous deadline plus its interval, which prevents the
+    execution time of callbacks from causing drift. With a virtual clock the
+    callbacks are run by the clock instead of a separate thread.
+    """
 
     def __init__(self):
         """Creates a new instance."""
         self._registry = {}
+        self._entries = {}
         self._running = False
+        self._clock = gremlin.clock.get_clock()
+        self._condition = threading.Condition()
         self._thread = threading.Thread(target=self._thread_loop)
         self._queue = []
+        self._counter = itertools.count()
         self._plugins = []
 
     def start(self):
@@ -99,28 +172,133 @@ class PeriodicRegistry:
 
         # Only create a new thread and start it if the thread is not
         # currently running
-        self._running = True
-        if not self._thread.is_alive():
+        with self._condition:
+            was_running = self._running
+            self._running = True
+            if self._thread.is_alive() or \
+                    was_running and self._clock.is_virtual:
+                return
+            self._clock = gremlin.clock.get_clock()
+
+            # Setup plugins to use
+            self._plugins = [
+                JoystickPlugin(),
+                VJoyPlugin(),
+                KeyboardPlugin()
+            ]
+
+            # Populate the queue
+            self._queue = []
+            self._entries = {}
+            for callback, (interval, policy) in self._registry.items():
+                self._schedule_callback(callback, interval, policy)
+
+            if self._clock.is_virtual:
+                self._clock.register(self)
+                return
             self._thread = threading.Thread(target=self._thread_loop)
             self._thread.start()
 
     def stop(self):
         """Stops the event loop."""
-        self._running = False
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._clock.is_virtual:
+            self._clock.unregister(self)
+            self._clock = gremlin.clock.get_clock()
         if self._thread.is_alive():
             self._thread.join()
 
-    def add(self, callback, interval):
+    def add(
+            self,
+            callback: Callable[[], None],
+            interval: float,
+            overrun_policy: gremlin.types.OverrunPolicy=
+                gremlin.types.OverrunPolicy.Skip
+    ):
         """Adds a function to execute periodically.
 
-        :param callback the function to execute
-        :param interval the time between executions
+        Args:
+            callback: the function to execute
+            interval: the time between executions
+            overrun_policy: handling of executions missed because the
+                callback took longer than its interval
         """
-        self._registry[callback] = (interval, callback)
+        with self._condition:
+            self._registry[callback] = (interval, overrun_policy)
+            if self._running:
+                self._schedule_callback(callback, interval, overrun_policy)
+                self._condition.notify()
 
     def clear(self):
         """Clears the registry."""
-        self._registry = {}
+        with self._condition:
+            self._registry = {}
+            self._entries = {}
+            self._queue = []
+
+    def statistics(self) -> Dict[Callable[[], None], PeriodicStatistics]:
+        """Returns the execution statistics of all running callbacks.
+
+        Returns:
+            Statistics of each callback keyed by the registered function
+        """
+        with self._condition:
+            return {
+                callback: entry.statistics
+                for callback, entry in self._entries.items()
+            }
+
+    def next_deadline(self) -> Optional[float]:
+        """Returns the deadline of the next callback to execute.
+
+        Returns:
+            Deadline of the next callback or None if nothing is scheduled
+        """
+        with self._condition:
+            if not self._running or len(self._queue) == 0:
+                return None
+            return self._queue[0][0]
+
+    def run_due(self, now: float) -> None:
+        """Executes all callbacks whose deadline has been reached.
+
+        Args:
+            now: the current time
+        """
+        while True:
+            with self._condition:
+                if not self._running or len(self._queue) == 0 or \
+                        self._queue[0][0] > now:
+                    return
+                deadline, _, entry = heapq.heappop(self._queue)
+            self._execute(deadline, entry)
+
+    def _schedule_callback(
+            self,
+            callback: Callable[[], None],
+            interval: float,
+            overrun_policy: gremlin.types.OverrunPolicy
+    ) -> None:
+        """Creates the scheduling entry of a callback and queues it.
+
+        Args:
+            callback: the function to execute
+            interval: the time between executions
+            overrun_policy: handling of missed executions
+        """
+        entry = PeriodicEntry(
+            callback,
+            self._install_plugins(callback),
+            interval,
+            overrun_policy
+        )
+        self._entries[callback] = entry
+        heapq.heappush(
+            self._queue,
+            (self._clock.now() + interval, next(self._counter), entry)
+        )
 
     def _install_plugins(self, callback):
         """Installs the current plugins into the given callback.
@@ -140,40 +318,59 @@ class PeriodicRegistry:
 
     def _thread_loop(self):
         """Main execution loop run in a separate thread."""
-        # Setup plugins to use
-        self._plugins = [
-            JoystickPlugin(),
-            VJoyPlugin(),
-            KeyboardPlugin()
-        ]
-        callback_map = {}
-
-        # Populate the queue
-        self._queue = []
-        for item in self._registry.values():
-            plugin_cb = self._install_plugins(item[1])
-            callback_map[plugin_cb] = item[0]
-            heapq.heappush(
-                self._queue,
-                (time.time() + callback_map[plugin_cb], plugin_cb)
-            )
-
-        # Main thread loop
-        while self._running:
-            # Process all events that require running
-            while self._queue[0][0] < time.time():
-                item = heapq.heappop(self._queue)
-                item[1]()
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                if len(self._queue) == 0:
+                    self._condition.wait()
+                    continue
+
+                # Sleep until the next function needs to be run unless
+                # woken by a change of the registry
+                delay = self._queue[0][0] - self._clock.now()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                deadline, _, entry = heapq.heappop(self._queue)
+
+            self._execute(deadline, entry)
+
+    def _execute(self, deadline: float, entry: PeriodicEntry) -> None:
+        """Executes a callback and schedules its next execution.
 
+        Args:
+            deadline: the deadline at which the callback was due
+            entry: the scheduling entry of the callback
+        """
+        start = self._clock.now()
+        try:
+            entry.callback()
+        except Exception:
+            logging.getLogger("system").exception(
+                "Error in periodic callback"
+            )
+        now = self._clock.now()
+        entry.statistics.record(now - start)
+
+        # Schedule relative to the previous deadline to avoid drift and
+        # handle deadlines that have already been missed
+        next_deadline = deadline + entry.interval
+        if next_deadline <= now:
+            entry.statistics.overruns += 1
+            if entry.overrun_policy == gremlin.types.OverrunPolicy.Skip:
+                missed = int((now - next_deadline) // entry.interval) + 1
+                entry.statistics.skipped += missed
+                next_deadline += missed * entry.interval
+
+        with self._condition:
+            # Drop entries removed from the registry while running
+            if self._entries.get(entry.function) is entry:
                 heapq.heappush(
                     self._queue,
-                    (time.time() + callback_map[item[1]], item[1])
+                    (next_deadline, next(self._counter), entry)
                 )
 
-            # Sleep until either the next function needs to be run or
-            # our timeout expires
-            time.sleep(min(self._queue[0][0] - time.time(), 1.0))
-
 
 # Global registry of all registered callbacks
 callback_registry = CallbackRegistry()
@@ -371,7 +568,8 @@ class ButtonReleaseActions(QtCore.QObject):
         self,
         vjoy_input: int,
         physical_event: event_handler.Event,
-        activate_on: bool
+        activate_on: bool,
+        source: Hashable=None
     ):
         """Registers a physical and vjoy button pair for tracking.
 
@@ -385,6 +583,9 @@ class ButtonReleaseActions(QtCore.QObject):
                 (vjoy_device_id, vjoy_button_id)
             physical_event: the button event when release should
                 trigger the release of the vjoy button
+            activate_on: button state of the physical event triggering
+                the release
+            source: output writer that pressed the vjoy button
         """
         release_evt = physical_event.clone()
         release_evt.is_pressed = activate_on
@@ -393,21 +594,32 @@ class ButtonReleaseActions(QtCore.QObject):
             self._registry[release_evt] = []
         # Record current mode so we only release if we've changed mode
         self._registry[release_evt].append(ButtonReleaseEntry(
-            lambda: self._release_callback_prototype(vjoy_input),
+            lambda: self._release_callback_prototype(vjoy_input, source),
             release_evt,
             self._current_mode
         ))
 
-    def _release_callback_prototype(self, vjoy_input: int) -> None:
+    def _release_callback_prototype(
+        self,
+        vjoy_input: int,
+        source: Hashable
+    ) -> None:
         """Prototype of a button release callback, used with lambdas.
 
         Args:
             vjoy_input: the vjoy input data to use in the release
+            source: output writer that pressed the vjoy button
         """
         vjoy = joystick_handling.VJoyProxy()
         # Check if the button is valid otherwise we cause Gremlin to crash
         if vjoy[vjoy_input[0]].is_button_valid(vjoy_input[1]):
-            vjoy[vjoy_input[0]].button(vjoy_input[1]).is_pressed = False
+            output_arbiter.OutputArbiter().write(
+                vjoy_input[0],
+                gremlin.types.InputType.JoystickButton,
+                vjoy_input[1],
+                False,
+                source
+            )
         else:
             logging.getLogger("system").warning(
                 f"Attempted to use non existent button: " +
@@ -500,24 +712,25 @@ class JoystickInputSignificant:
         Returns:
             True if it should be processed, False otherwise
         """
+        now = gremlin.clock.get_clock().now()
         if event in self._event_registry:
             # Reset everything if we have no recent data
-            if self._time_registry[event] + 5.0 < time.time():
+            if self._time_registry[event] + 5.0 < now:
                 self._event_registry[event] = event
-                self._time_registry[event] = time.time()
+                self._time_registry[event] = now
                 return False
             # Update state
             else:
-                self._time_registry[event] = time.time()
+                self._time_registry[event] = now
                 if abs(self._event_registry[event].value - event.value) > 0.25:
                     self._event_registry[event] = event
-                    self._time_registry[event] = time.time()
+                    self._time_registry[event] = now
                     return True
                 else:
                     return False
         else:
             self._event_registry[event] = event
-            self._time_registry[event] = time.time()
+            self._time_registry[event] = now
             return False
 
     def _process_button(self, event: event_handler.Event) -> bool:
@@ -543,6 +756,177 @@ class JoystickInputSignificant:
         return event.value != (0, 0)
 
 
+class RelativeAxisState:
+
+    """Integration state of a single vJoy axis driven in relative mode."""
+
+    def __init__(self, rate: float, timestamp: float):
+        """Creates a new instance.
+
+        Args:
+            rate: change of the axis value per second
+            timestamp: time at which the axis was last integrated
+        """
+        self.rate = rate
+        self.is_idle = False
+        self.last_update = timestamp
+        self.last_step = timestamp
+        self.value = None
+        self.written_value = None
+
+
+@common.SingletonDecorator
+class RelativeAxisIntegrator:
+
+    """Integrates all relative vJoy axes in a single fixed rate thread.
+
+    Each axis changes its value based on the rate of change provided via
+    set_rate. The integration uses the actual time elapsed between two steps,
+    which keeps the motion consistent even if individual steps are delayed.
+    """
+
+    # Duration between two integration steps in seconds
+    tick_interval = 0.01
+
+    # Duration without updates after which an idle axis is released
+    idle_timeout = 1.0
+
+    def __init__(self):
+        """Creates a new instance."""
+        self._axes = {}
+        self._condition = threading.Condition()
+        self._is_running = False
+        self._thread = threading.Thread(target=self._integration_loop)
+
+    def start(self) -> None:
+        """Starts the thread integrating the relative axes."""
+        with self._condition:
+            if self._is_running:
+                return
+            self._is_running = True
+        self._thread = threading.Thread(target=self._integration_loop)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the integration thread and discards all axis states."""
+        with self._condition:
+            self._is_running = False
+            self._axes = {}
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def set_rate(
+            self,
+            vjoy_id: int,
+            axis_id: int,
+            rate: float,
+            is_idle: bool=False
+    ) -> None:
+        """Sets the rate of change of a relative axis.
+
+        Args:
+            vjoy_id: id of the vJoy device the axis belongs to
+            axis_id: id of the axis to change
+            rate: change of the axis value per second
+            is_idle: whether the input driving the axis is at rest, in which
+                case the axis is released if no further updates arrive
+        """
+        now = time.perf_counter()
+        with self._condition:
+            state = self._axes.get((vjoy_id, axis_id))
+            if state is None:
+                state = RelativeAxisState(rate, now)
+                self._axes[(vjoy_id, axis_id)] = state
+                self._condition.notify()
+            state.rate = rate
+            state.is_idle = is_idle
+            state.last_update = now
+
+    def _integration_loop(self) -> None:
+        """Advances all relative axes once every tick.
+
+        The vJoy devices are written without holding the lock, such that
+        set_rate never waits on driver calls.
+        """
+        next_tick = time.perf_counter()
+        while True:
+            with self._condition:
+                while self._is_running and len(self._axes) == 0:
+                    self._condition.wait()
+                    next_tick = time.perf_counter()
+                if not self._is_running:
+                    return
+                axes = list(self._axes.items())
+
+            now = time.perf_counter()
+            stale = self._step(now, axes)
+
+            with self._condition:
+                for key, state in stale:
+                    if self._axes.get(key) is state:
+                        del self._axes[key]
+                for key, state in list(self._axes.items()):
+                    if state.is_idle and \
+                            state.last_update + self.idle_timeout < now:
+                        del self._axes[key]
+
+                next_tick += self.tick_interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    self._condition.wait(delay)
+                else:
+                    next_tick = time.perf_counter()
+
+    def _step(
+            self,
+            now: float,
+            axes: List[Tuple[Tuple[int, int], RelativeAxisState]]
+    ) -> List[Tuple[Tuple[int, int], RelativeAxisState]]:
+        """Performs a single integration step of the given relative axes.
+
+        Args:
+            now: timestamp of the integration step
+            axes: the (vjoy id, axis id) keys and states of the axes to
+                advance
+
+        Returns:
+            Keys and states of the axes which can no longer be driven
+        """
+        vjoy = joystick_handling.VJoyProxy()
+        device_owned = {}
+        stale = []
+        for key, state in axes:
+            vjoy_id, axis_id = key
+            try:
+                # Abort if the vJoy device is no longer valid
+                if vjoy_id not in device_owned:
+                    device_owned[vjoy_id] = vjoy[vjoy_id].is_owned()
+                if not device_owned[vjoy_id]:
+                    stale.append((key, state))
+                    continue
+
+                axis = vjoy[vjoy_id].axis(axis_id)
+                if state.value is None:
+                    state.value = axis.value
+                # Stop driving the axis if something else changed its value
+                # since the last integration step
+                elif abs(axis.value - state.written_value) > 0.0001:
+                    stale.append((key, state))
+                    continue
+
+                state.value = min(1.0, max(
+                    -1.0,
+                    state.value + state.rate * (now - state.last_step)
+                ))
+                state.last_step = now
+                axis.value = state.value
+                state.written_value = axis.value
+            except error.VJoyError:
+                stale.append((key, state))
+        return stale
+
+
 def _button(button_id, device_guid, mode):
     """Decorator for button callbacks.
 
@@ -643,11 +1027,17 @@ def keyboard(key_name, mode):
     return wrap
 
 
-def periodic(interval: float):
+def periodic(
+        interval: float,
+        overrun_policy: gremlin.types.OverrunPolicy=
+            gremlin.types.OverrunPolicy.Skip
+):
     """Decorator for periodic function callbacks.
 
     Args:
         interval: the duration between executions of the function
+        overrun_policy: handling of executions missed because the function
+            took longer than its interval
     """
 
     def wrap(callback):
@@ -656,7 +1046,7 @@ def periodic(interval: float):
         def wrapper_fn(*args, **kwargs):
             callback(*args, **kwargs)
 
-        periodic_registry.add(wrapper_fn, interval)
+        periodic_registry.add(wrapper_fn, interval, overrun_policy)
 
         return wrapper_fn
 
@@ -32,6 +32,11 @@ _joystick_devices = []
 # Joystick initialization lock
 _joystick_init_lock = threading.Lock()
 
+# Fingerprint of the vJoy devices and the vJoy id of each device's GUID as
+# determined by the last probe of the vJoy devices
+_vjoy_topology = None
+_vjoy_ids = {}
+
 
 class VJoyProxy:
 
@@ -187,7 +192,7 @@ def joystick_devices_initialization():
     Amongst other things this also ensures that each vJoy device has a correct
     windows id assigned to it.
     """
-    global _joystick_devices, _joystick_init_lock
+    global _joystick_devices, _joystick_init_lock, _vjoy_topology, _vjoy_ids
 
     _joystick_init_lock.acquire()
 
@@ -204,33 +209,91 @@ def joystick_devices_initialization():
         info = dill.DILL.get_device_information_by_index(i)
         devices.append(info)
 
-    # Process all devices again to detect those that have been added and those
-    # that have been removed since the last time this function ran.
-
-    # Compare existing versus observed devices and only proceed if there
-    # is a change to avoid unnecessary work.
-    device_added = False
-    device_removed = False
-    for new_dev in devices:
-        if new_dev not in _joystick_devices:
-            device_added = True
-            syslog.debug("Added: name={} guid={}".format(
-                new_dev.name,
-                new_dev.device_guid
-            ))
-    for old_dev in _joystick_devices:
-        if old_dev not in devices:
-            device_removed = True
-            syslog.debug("Removed: name={} guid={}".format(
-                old_dev.name,
-                old_dev.device_guid
-            ))
+    # Compare existing versus observed devices based on their GUID and only
+    # proceed if there is a change to avoid unnecessary work.
+    old_devices = {dev.device_guid: dev for dev in _joystick_devices}
+    new_devices = {dev.device_guid: dev for dev in devices}
+    added = new_devices.keys() - old_devices.keys()
+    removed = old_devices.keys() - new_devices.keys()
+    for guid in added:
+        syslog.debug("Added: name={} guid={}".format(
+            new_devices[guid].name,
+            guid
+        ))
+    for guid in removed:
+        syslog.debug("Removed: name={} guid={}".format(
+            old_devices[guid].name,
+            guid
+        ))
 
     # Terminate if no change occurred
-    if not device_added and not device_removed:
+    if not added and not removed:
         _joystick_init_lock.release()
         return
 
+    # Only probe the vJoy devices if their configuration changed, otherwise
+    # the previously established vJoy ids are reused. Probing acquires every
+    # vJoy device which interferes with other programs using them.
+    virtual_devices = [dev for dev in devices if dev.is_virtual]
+    topology = vjoy_topology(virtual_devices)
+    if topology == _vjoy_topology:
+        syslog.debug("vJoy topology unchanged, reusing vJoy ids")
+        for dev in virtual_devices:
+            dev.set_vjoy_id(_vjoy_ids[dev.device_guid])
+    else:
+        try:
+            _match_vjoy_devices(virtual_devices)
+        except error.GremlinError:
+            _joystick_init_lock.release()
+            raise
+        _vjoy_topology = topology
+        _vjoy_ids = {dev.device_guid: dev.vjoy_id for dev in virtual_devices}
+
+    # Update device list which will be used when queries for joystick devices
+    # are made. Order the devices such that vJoy devices are last and the
+    # physical devices are ordered by name.
+    sorted_devices = sorted(
+        [dev for dev in devices if not dev.is_virtual],
+        key=lambda x: x.name
+    )
+    sorted_devices.extend(sorted(virtual_devices, key=lambda x: x.vjoy_id))
+
+    _joystick_devices = sorted_devices
+
+    _joystick_init_lock.release()
+
+
+def vjoy_topology(virtual_devices):
+    """Returns a fingerprint of the vJoy device configuration.
+
+    Parameters
+    ==========
+    virtual_devices : list
+        Device summaries of all vJoy devices
+
+    Return
+    ======
+    frozenset
+        Fingerprint which changes whenever a vJoy device is added, removed,
+        or its layout is modified
+    """
+    return frozenset(
+        (dev.device_guid, dev.axis_count, dev.button_count, dev.hat_count)
+        for dev in virtual_devices
+    )
+
+
+def _match_vjoy_devices(virtual_devices):
+    """Associates the vJoy devices with their DILL device summaries.
+
+    Parameters
+    ==========
+    virtual_devices : list
+        Device summaries of all vJoy devices, their vJoy id is set by
+        this function
+    """
+    syslog = logging.getLogger("system")
+
     # In order to associate vJoy devices and their ids correctly with SDL
     # device ids a hash is constructed from the number of axes, buttons, and
     # hats. This information is used to attempt to find unambiguous mappings
@@ -238,7 +301,7 @@ def joystick_devices_initialization():
     # terminate as this is a non-recoverable error.
 
     vjoy_lookup = {}
-    for dev in [dev for dev in devices if dev.is_virtual]:
+    for dev in virtual_devices:
         hash_value = (dev.axis_count, dev.button_count, dev.hat_count)
         syslog.debug(
             "vJoy guid={}: {}".format(dev.device_guid, hash_value)
@@ -307,19 +370,3 @@ def joystick_devices_initialization():
 
     # Reset all devices so we don't hog the ones we aren't actually using
     vjoy_proxy.reset()
-
-    # Update device list which will be used when queries for joystick devices
-    # are made. Order the devices such that vJoy devices are last and the
-    # physical devices are ordered by name.
-    sorted_devices = sorted(
-        [dev for dev in devices if not dev.is_virtual],
-        key=lambda x: x.name
-    )
-    sorted_devices.extend(sorted(
-        [dev for dev in devices if dev.is_virtual],
-        key=lambda x: x.vjoy_id
-    ))
-
-    _joystick_devices = sorted_devices
-
-    _joystick_init_lock.release()
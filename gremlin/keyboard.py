@@ -21,7 +21,6 @@ from ctypes import wintypes
 import logging
 from typing import List
 
-import win32api
 import win32con
 
 import gremlin
@@ -245,8 +244,7 @@ def send_key_down(key):
 
     :param key the key for which to send the KEYDOWN event
     """
-    flags = win32con.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
-    win32api.keybd_event(key.virtual_code, key.scan_code, flags, 0)
+    gremlin.sendinput.key_down(key.virtual_code, key.scan_code, key.is_extended)
 
 
 def send_key_up(key):
@@ -254,9 +252,7 @@ def send_key_up(key):
 
     :param key the key for which to send the KEYUP event
     """
-    flags = win32con.KEYEVENTF_EXTENDEDKEY if key.is_extended else 0
-    flags |= win32con.KEYEVENTF_KEYUP
-    win32api.keybd_event(key.virtual_code, key.scan_code, flags, 0)
+    gremlin.sendinput.key_up(key.virtual_code, key.scan_code, key.is_extended)
 
 
 def key_from_name(name):
@@ -19,10 +19,11 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 import collections
-import functools
+import heapq
+import itertools
 import logging
-import time
 from threading import Event, Lock, Thread
+from typing import List, Optional
 import uuid
 from xml.etree import ElementTree
 
@@ -30,69 +31,158 @@ from win32security import POLICY_READ
 
 import dill
 import gremlin
-from gremlin import mode_manager, util
+from gremlin import clock, mode_manager, output_arbiter, scheduler, util
 from gremlin.base_classes import AbstractActionData
 from gremlin.common import SingletonDecorator
+from gremlin.config import Configuration
 from gremlin.keyboard import send_key_down, send_key_up, key_from_code, \
     key_from_name, Key
 from gremlin.sendinput import MouseMotion
 from gremlin.types import AxisMode, InputType, MouseButton, PropertyType
 
-MacroEntry = collections.namedtuple(
-    "MacroEntry",
-    ["macro", "state"]
+# Actions of a compiled macro which run together, offset is the time in
+# seconds since the start of the macro at which they run
+MacroStep = collections.namedtuple(
+    "MacroStep",
+    ["offset", "actions"]
 )
 
+# Immutable executable form of a macro, duration includes trailing pauses
+CompiledMacro = collections.namedtuple(
+    "CompiledMacro",
+    ["steps", "duration", "default_delay"]
+)
+
+
+class MacroExecution:
+
+    """Execution state of a single running macro."""
+
+    def __init__(self, macro: Macro, compiled: CompiledMacro, start: float):
+        """Creates the execution state for the given macro.
+
+        Args:
+            macro: the macro being executed
+            compiled: the compiled form of the macro
+            start: time of the macro's start
+        """
+        self.macro = macro
+        self.compiled = compiled
+        # Start time of the current repetition
+        self.start = start
+        # Index of the next step to run
+        self.index = 0
+        # Number of completed repetitions of the sequence
+        self.count = 0
+
 
 @SingletonDecorator
 class MacroManager:
 
-    """Manages the proper dispatching and scheduling of macros."""
+    """Manages the proper dispatching and scheduling of macros.
+
+    All macros are executed by the scheduler thread. A running macro is
+    advanced step by step, a step being the actions between two pauses, and
+    waits for its next step in a heap ordered by the step's deadline. With a
+    virtual clock the steps are run by the clock instead of the thread.
+    """
 
     def __init__(self):
         """Initializes the instance."""
         self._active = {}
-        self._queue = []
+        # Queued macros grouped by macro id in the order they were first
+        # queued, and ids of macros to terminate
+        self._queue = collections.OrderedDict()
+        self._terminations = collections.deque()
         self._flags = {}
         self._flags_lock = Lock()
         self._queue_lock = Lock()
 
+        # Running macros ordered by the deadline of their next step
+        self._executions = []
+        self._execution_counter = itertools.count()
+
+        # Lateness of the most recent steps with respect to their deadline
+        self._timing_errors = collections.deque(maxlen=1000)
+
         # Default delay between subsequent message dispatch. This is to get
         # around some games not picking up messages if they are sent in too
         # quick a succession.
         self.default_delay = 0.05
 
+        # Time before a step's deadline spent spinning instead of sleeping
+        self.spin_budget = scheduler.DEFAULT_SPIN_BUDGET
+
         self._is_executing_exclusive = False
         self._is_running = False
         self._schedule_event = Event()
 
+        self._clock = clock.get_clock()
         self._run_scheduler_thread = None
 
     def start(self) -> None:
         """Starts the scheduler."""
         self._active = {}
         self._flags = {}
+        self._executions = []
+        self.spin_budget = self._configured_spin_budget()
         self._is_running = True
+        self._clock = clock.get_clock()
+        if self._clock.is_virtual:
+            self._clock.register(self)
+            return
         if self._run_scheduler_thread is None:
             self._run_scheduler_thread = Thread(target=self._run_scheduler)
         if not self._run_scheduler_thread.is_alive():
             self._run_scheduler_thread.start()
 
     def stop(self) -> None:
-        """Stops the scheduler."""
+        """Stops the scheduler.
+
+        Running macros are aborted, steps that have not yet run are dropped.
+        """
         self._is_running = False
-        if self._run_scheduler_thread is not None and \
-                self._run_scheduler_thread.is_alive():
 
+        # Terminate any macro that is still active
+        with self._flags_lock:
+            for key in self._flags:
+                self._flags[key] = False
+
+        if self._clock.is_virtual:
+            self._clock.unregister(self)
+        elif self._run_scheduler_thread is not None and \
+                self._run_scheduler_thread.is_alive():
             # Terminate the scheduler
             self._schedule_event.set()
             self._run_scheduler_thread.join()
             self._run_scheduler_thread = None
 
-            # Terminate any macro that is still active
-            with self._flags_lock:
-                for key in self._flags:
-                    self._flags[key] = False
+        self._executions = []
+        self._active = {}
+        self._is_executing_exclusive = False
+
+    def _configured_spin_budget(self) -> float:
+        """Returns the spin budget set in the configuration.
+
+        Returns:
+            Spin budget in seconds, the default one if the option is not
+            registered with the configuration
+        """
+        try:
+            return Configuration().value(
+                "action", "macro", "spin-budget"
+            ) / 1000.0
+        except gremlin.error.GremlinError:
+            return scheduler.DEFAULT_SPIN_BUDGET
+
+    def timing_errors(self) -> List[float]:
+        """Returns the lateness of the most recently executed macro steps.
+
+        Returns:
+            Delay in seconds between the deadline and the actual execution
+            of each recent step
+        """
+        return list(self._timing_errors)
 
     def queue_macro(self, macro: Macro) -> None:
         """Queues a macro in the schedule taking the repeat type into account.
@@ -103,10 +193,11 @@ class MacroManager:
         if isinstance(macro.repeat, ToggleRepeat) and macro.id in self._active:
             self.terminate_macro(macro)
         else:
-            # Preprocess macro to contain pauses as necessary
-            self._preprocess_macro(macro)
+            compiled = macro.compile(self.default_delay)
             with self._queue_lock:
-                self._queue.append(MacroEntry(macro, True))
+                if macro.id not in self._queue:
+                    self._queue[macro.id] = collections.deque()
+                self._queue[macro.id].append((macro, compiled))
             self._schedule_event.set()
 
     def terminate_macro(self, macro: Macro) -> None:
@@ -115,138 +206,230 @@ class MacroManager:
         Args:
             macro: the macro to terminate
         """
-        self._queue.append(MacroEntry(macro, False))
+        with self._queue_lock:
+            self._terminations.append(macro.id)
         self._schedule_event.set()
 
+    def next_deadline(self) -> Optional[float]:
+        """Returns the time at which the manager next needs to run.
+
+        Returns:
+            The current time if requests are pending, otherwise the deadline
+            of the next step or None if no macro is running
+        """
+        if self._schedule_event.is_set():
+            return self._clock.now()
+        if len(self._executions) > 0:
+            return self._executions[0][0]
+        return None
+
+    def run_due(self, now: float) -> None:
+        """Processes pending requests and runs all due macro steps.
+
+        Args:
+            now: the current time
+        """
+        self._schedule_event.clear()
+        if self._is_running:
+            self._process_queue()
+            self._run_due_steps(now)
+
     def _run_scheduler(self) -> None:
-        """Dispatches macros as required."""
+        """Dispatches macros and runs their steps as they become due."""
         while self._is_running:
-            # Wake up when the event triggers and reset it
-            self._schedule_event.wait()
+            # Wake up when the event triggers or the next step is due
+            if len(self._executions) > 0:
+                scheduler.wait_until(
+                    int(self._executions[0][0] * 1e9),
+                    self.spin_budget,
+                    self._schedule_event
+                )
+            else:
+                self._schedule_event.wait()
             self._schedule_event.clear()
 
-            # Run scheduled macros and ensure exclusive ones run separately
+            if self._is_running:
+                self._process_queue()
+                self._run_due_steps(self._clock.now())
+
+    def _process_queue(self) -> None:
+        """Starts and terminates macros based on the queued requests."""
+        with self._queue_lock:
+            # Run queued macros and ensure exclusive ones run separately
             # from all other macros
-            with self._queue_lock:
-                entries_to_remove = []
-                has_exclusive = False
-                for entry in self._queue:
-                    # Terminate macro if needed
-                    if entry.state is False:
-                        if entry.macro.id in self._flags \
-                                and self._flags[entry.macro.id]:
-                            # Terminate currently running macro
-                            with self._flags_lock:
-                                self._flags[entry.macro.id] = False
-
-                            # Remove all queued up macros with the same id as
-                            # they should have been impossible to queue up
-                            # in the first place
-                            removal_list = []
-                            for queue_entry in self._queue:
-                                if queue_entry.macro.id == entry.macro.id:
-                                    removal_list.append(queue_entry)
-                            for queue_entry in removal_list:
-                                self._queue.remove(queue_entry)
-                    # Don't run a queued macro if the same instance is already
-                    # running
-                    elif entry.macro.id in self._active:
+            has_exclusive = False
+            for macro_id in list(self._queue.keys()):
+                # Don't run a queued macro if the same instance is already
+                # running
+                if macro_id in self._active:
+                    continue
+
+                entries = self._queue[macro_id]
+                macro, compiled = entries[0]
+                # Handle exclusive macros
+                if macro.is_exclusive:
+                    has_exclusive = True
+                    if len(self._active) > 0:
                         continue
-                    # Handle exclusive macros
-                    elif entry.macro.is_exclusive:
-                        has_exclusive = True
-                        if len(self._active) == 0:
-                            self._dispatch_macro(entry.macro)
-                            self._is_executing_exclusive = True
-                            entries_to_remove.append(entry)
-                    # Start a queued up macro
-                    elif not has_exclusive and not self._is_executing_exclusive:
-                        self._dispatch_macro(entry.macro)
-                        entries_to_remove.append(entry)
-
-                # Remove all entries we've processed
-                for entry in entries_to_remove:
-                    if entry in self._queue:
-                        self._queue.remove(entry)
-
-    def _dispatch_macro(self, macro: Macro) -> None:
+                    self._is_executing_exclusive = True
+                # Start a queued up macro
+                elif has_exclusive or self._is_executing_exclusive:
+                    continue
+
+                entries.popleft()
+                if len(entries) == 0:
+                    del self._queue[macro_id]
+                self._dispatch_macro(macro, compiled)
+
+            while len(self._terminations) > 0:
+                macro_id = self._terminations.popleft()
+                if self._flags.get(macro_id, False):
+                    # Terminate currently running macro
+                    with self._flags_lock:
+                        self._flags[macro_id] = False
+
+                    # Remove all queued up macros with the same id as they
+                    # should have been impossible to queue up in the first
+                    # place
+                    self._queue.pop(macro_id, None)
+
+    def _dispatch_macro(self, macro: Macro, compiled: CompiledMacro) -> None:
         """Dispatches a single macro to be run.
 
         Args:
             macro: the macro to dispatch
+            compiled: the compiled form of the macro to run
         """
         if macro.id not in self._active:
             self._active[macro.id] = macro
-            Thread(target=functools.partial(self._execute_macro, macro)).start()
+            if macro.repeat is not None:
+                with self._flags_lock:
+                    self._flags[macro.id] = True
+            execution = MacroExecution(macro, compiled, self._clock.now())
+            self._schedule_execution(
+                execution,
+                execution.start + self._step_offset(execution)
+            )
         else:
             logging.getLogger("system").warning(
                 "Attempting to dispatch an already running macro"
             )
 
-    def _execute_macro(self, macro: Macro)  :
-        """Executes a given macro in a separate thread.
+    def _schedule_execution(
+            self,
+            execution: MacroExecution,
+            deadline: float
+    ) -> None:
+        """Schedules the next step of a running macro.
+
+        Args:
+            execution: the running macro
+            deadline: time at which to run the step
+        """
+        heapq.heappush(
+            self._executions,
+            (deadline, next(self._execution_counter), execution)
+        )
 
-        This method will run all provided actions and once they all have been
-        executed will remove the macro from the set of active macros and
-        inform the scheduler of the completion.
+    def _run_due_steps(self, now: float) -> None:
+        """Runs the next step of every macro whose deadline has passed.
 
         Args:
-            macro: the macro object to be executed
+            now: the current time
         """
-        # Handle macros with a repeat mode
-        if macro.repeat is not None:
-            delay = macro.repeat.delay
+        # Each macro runs at most one step per pass, which allows queued
+        # requests to be processed in between
+        due = []
+        while len(self._executions) > 0 and self._executions[0][0] <= now:
+            due.append(heapq.heappop(self._executions))
+
+        for deadline, _, execution in due:
+            self._timing_errors.append(self._clock.now() - deadline)
+
+            try:
+                next_deadline = self._run_step(execution)
+            except Exception:
+                logging.getLogger("system").exception(
+                    "Error while executing macro"
+                )
+                next_deadline = None
 
-            with self._flags_lock:
-                self._flags[macro.id] = True
+            if next_deadline is None:
+                self._complete_macro(execution.macro)
+            else:
+                self._schedule_execution(execution, next_deadline)
 
-            # Handle count repeat mode
-            if isinstance(macro.repeat, CountRepeat):
-                count = 0
-                while count < macro.repeat.count and self._flags[macro.id]:
-                    for action in macro.sequence:
-                        action()
-                    count += 1
-                    time.sleep(delay)
+    def _run_step(self, execution: MacroExecution) -> Optional[float]:
+        """Runs the next step of a macro.
 
-            # Handle continuous repeat modes
-            elif type(macro.repeat) in [HoldRepeat, ToggleRepeat]:
-                while self._flags[macro.id]:
-                    for action in macro.sequence:
-                        action()
-                    time.sleep(delay)
+        Keyboard, mouse, and vJoy outputs of the actions of a step are
+        submitted together.
 
-        # Handle simple one shot macros
-        else:
-            for action in macro.sequence:
-                action()
+        Args:
+            execution: the running macro to advance
+
+        Returns:
+            Deadline of the next step or None if the macro completed
+        """
+        macro = execution.macro
+        steps = execution.compiled.steps
+        if execution.index < len(steps):
+            with gremlin.sendinput.batched_output(), \
+                    output_arbiter.OutputArbiter().tick():
+                for action in steps[execution.index].actions:
+                    action()
+            execution.index += 1
+
+            # Wait for the next step or the end of trailing pauses
+            if execution.index < len(steps) or \
+                    execution.compiled.duration > steps[-1].offset:
+                return execution.start + self._step_offset(execution)
+
+        # The sequence has been completed, determine if it has to be repeated
+        if macro.repeat is None:
+            return None
+
+        execution.count += 1
+        if not self._flags.get(macro.id, False):
+            return None
+        if isinstance(macro.repeat, CountRepeat) and \
+                execution.count >= macro.repeat.count:
+            return None
+
+        execution.start += execution.compiled.duration + macro.repeat.delay
+        execution.index = 0
+        return execution.start + self._step_offset(execution)
+
+    def _step_offset(self, execution: MacroExecution) -> float:
+        """Returns the offset of the next step of a running macro.
+
+        Args:
+            execution: the running macro
+
+        Returns:
+            Time since the start of the repetition at which the next step
+            runs, the end of the repetition if all steps have run
+        """
+        steps = execution.compiled.steps
+        if execution.index < len(steps):
+            return steps[execution.index].offset
+        return execution.compiled.duration
+
+    def _complete_macro(self, macro: Macro) -> None:
+        """Removes a completed macro from the set of active macros.
 
-        # Remove macro from active set, notify manager, and remove any
-        # potential callbacks
+        Args:
+            macro: the macro that completed
+        """
         del self._active[macro.id]
         if macro.is_exclusive:
             self._is_executing_exclusive = False
         with self._flags_lock:
             if macro.id in self._flags:
                 self._flags[macro.id] = False
+        # Queued macros may be waiting on this one to complete
         self._schedule_event.set()
 
-    def _preprocess_macro(self, macro: Macro) -> None:
-        """Inserts pauses as necessary into the macro.
-
-        Args:
-            macro: the macro instance to modify
-        """
-        new_sequence = [macro.sequence[0]]
-        for a1, a2 in zip(macro.sequence[:-1], macro.sequence[1:]):
-            if isinstance(a1, PauseAction) or isinstance(a2, PauseAction):
-                new_sequence.append(a2)
-            else:
-                new_sequence.append(PauseAction(self.default_delay))
-                new_sequence.append(a2)
-        macro._sequence = new_sequence
-
-
 class Macro:
 
     """Represents a macro which can be executed."""
@@ -257,6 +440,9 @@ class Macro:
     def __init__(self):
         """Creates a new macro instance."""
         self._sequence = []
+        # Indices of actions which run together with the preceding action
+        self._simultaneous = set()
+        self._compiled = None
         self._id = Macro._next_macro_id
         Macro._next_macro_id += 1
         self.repeat = None
@@ -280,13 +466,64 @@ class Macro:
         """
         return self._sequence
 
-    def add_action(self, action: AbstractActionData) -> None:
+    def compile(self, default_delay: float) -> CompiledMacro:
+        """Returns the executable form of this macro.
+
+        Consecutive actions not separated by a pause are spaced by the
+        default delay, unless they were added to run simultaneously. The
+        result is cached until the macro is modified.
+
+        Args:
+            default_delay: delay in seconds between actions without an
+                explicit pause between them
+
+        Returns:
+            Compiled macro with the time offset of every step
+        """
+        if self._compiled is not None and \
+                self._compiled.default_delay == default_delay:
+            return self._compiled
+
+        steps = []
+        offset = 0.0
+        previous_is_action = False
+        for index, action in enumerate(self._sequence):
+            if isinstance(action, PauseAction):
+                offset += action.duration
+                previous_is_action = False
+                continue
+
+            if previous_is_action and index not in self._simultaneous:
+                offset += default_delay
+            if len(steps) > 0 and steps[-1][0] == offset:
+                steps[-1][1].append(action)
+            else:
+                steps.append((offset, [action]))
+            previous_is_action = True
+
+        self._compiled = CompiledMacro(
+            tuple(MacroStep(step[0], tuple(step[1])) for step in steps),
+            offset,
+            default_delay
+        )
+        return self._compiled
+
+    def add_action(
+            self,
+            action: AbstractActionData,
+            with_previous: bool=False
+    ) -> None:
         """Adds an action to the list of actions to perform.
 
         Args:
             action: the action to add
+            with_previous: if True the action runs together with the
+                preceding action instead of after the default delay
         """
+        if with_previous:
+            self._simultaneous.add(len(self._sequence))
         self._sequence.append(action)
+        self._compiled = None
 
     def pause(self, duration: float) -> None:
         """Adds a pause of the given duration to the macro.
@@ -294,7 +531,7 @@ class Macro:
         Args:
             duration: the duration of the pause in seconds
         """
-        self._sequence.append(PauseAction(duration))
+        self.add_action(PauseAction(duration))
 
     def press(self, key: Key) -> None:
         """Presses the specified key down.
@@ -321,13 +558,33 @@ class Macro:
         self.action(key, True)
         self.action(key, False)
 
-    def action(self, key: Key | str, is_pressed: bool) -> None:
+    def chord(self, keys: List[Key | str], is_pressed: bool) -> None:
+        """Presses or releases all specified keys at the same time.
+
+        The keys are sent in the given order as part of a single output.
+
+        Args:
+            keys: the keys involved in the action
+            is_pressed: boolean indicating if the keys are pressed
+                (True) or released (False)
+        """
+        for i, key in enumerate(keys):
+            self.action(key, is_pressed, i > 0)
+
+    def action(
+            self,
+            key: Key | str,
+            is_pressed: bool,
+            with_previous: bool=False
+    ) -> None:
         """Adds the specified action to the sequence.
 
         Args:
             key: the key involved in the action
             is_pressed: boolean indicating if the key is pressed
                 (True) or released (False)
+            with_previous: if True the action runs together with the
+                preceding action
         """
         if isinstance(key, str):
             key = key_from_name(key)
@@ -336,7 +593,7 @@ class Macro:
         else:
             raise gremlin.error.KeyboardError("Invalid key specified")
 
-        self._sequence.append(KeyAction(key, is_pressed))
+        self.add_action(KeyAction(key, is_pressed), with_previous)
 
 
 class AbstractAction(ABC):
@@ -655,7 +912,7 @@ class PauseAction(AbstractAction):
         return PauseAction(0.0)
 
     def __call__(self) -> None:
-        time.sleep(self.duration)
+        scheduler.precise_sleep(self.duration)
 
     def to_xml(self) -> ElementTree.Element:
         node = self._create_node(self.tag)
@@ -705,19 +962,17 @@ class VJoyAction(AbstractAction):
         return VJoyAction(1, InputType.JoystickButton, 1, False)
 
     def __call__(self) -> None:
-        vjoy = gremlin.joystick_handling.VJoyProxy()[self.vjoy_id]
-        if self.input_type == InputType.JoystickAxis:
-            if self.axis_type == "absolute":
-                vjoy.axis(self.input_id).value = self.value
-            elif self.axis_type == "relative":
-                vjoy.axis(self.input_id).value = max(
-                    -1.0,
-                    min(1.0, vjoy.axis(self.input_id).value + self.value)
-                )
-        elif self.input_type == InputType.JoystickButton:
-            vjoy.button(self.input_id).is_pressed = self.value
-        elif self.input_type == InputType.JoystickHat:
-            vjoy.hat(self.input_id).direction = self.value
+        value = self.value
+        if self.input_type == InputType.JoystickAxis and \
+                self.axis_mode == AxisMode.Relative:
+            vjoy = gremlin.joystick_handling.VJoyProxy()[self.vjoy_id]
+            value = max(
+                -1.0,
+                min(1.0, vjoy.axis(self.input_id).value + self.value)
+            )
+        output_arbiter.OutputArbiter().write(
+            self.vjoy_id, self.input_type, self.input_id, value, self
+        )
 
     def to_xml(self) -> ElementTree.Element:
         node = self._create_node(self.tag)
@@ -900,3 +1155,19 @@ class HoldRepeat(AbstractRepeat):
             node XML node containing data with which to populate the instance
         """
         pass
+
+
+Configuration().register(
+    "action",
+    "macro",
+    "spin-budget",
+    PropertyType.Float,
+    2.0,
+    "Time in milliseconds before a macro step is due during which Gremlin "
+    "spins instead of sleeping to improve timing accuracy.",
+    {
+        "min": 0.0,
+        "max": 20.0
+    },
+    True
+)
@@ -107,6 +107,8 @@ class ModeManager(QtCore.QObject):
 
         self._mode_stack = [Mode("Invalid", None)]
         self._config = Configuration()
+        # Created on first use as the option may not be registered yet
+        self._resolution_mode = None
 
     @property
     def current(self) -> Mode:
@@ -148,9 +150,11 @@ class ModeManager(QtCore.QObject):
     def switch_to(self, mode: Mode) -> None:
         # Detect cycle in the mode stack and resolve it
         if self._exists(mode):
-            resolution_mode = Configuration().value(
-                "profile", "mode-change", "resolution-mode"
-            )
+            if self._resolution_mode is None:
+                self._resolution_mode = self._config.accessor(
+                    "profile", "mode-change", "resolution-mode"
+                )
+            resolution_mode = self._resolution_mode.value
             idx = self._mode_stack.index(mode)
 
             if not mode.is_temporary:
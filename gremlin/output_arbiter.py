@@ -0,0 +1,363 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Arbitration of concurrent writes to the same vJoy input.
+
+Actions do not write to vJoy directly but submit their value to the
+OutputArbiter together with an identifier of the writer. All writes to an
+input occurring within a tick are combined according to the input's policy
+and the resulting value is written to vJoy once at the end of the tick.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from gremlin import common, error, joystick_handling, mode_manager, util
+from gremlin.types import InputType, OutputPolicy
+
+
+# Identifies a single vJoy input as (vjoy_id, input_type, input_id)
+OutputKey = Tuple[int, InputType, int]
+
+
+class WriterState:
+
+    """Most recent value submitted by a single writer."""
+
+    def __init__(self, value: Any, mode: str, sequence: int) -> None:
+        """Creates a new writer state.
+
+        Args:
+            value: value submitted by the writer
+            mode: name of the mode active when the value was submitted
+            sequence: global order of the write
+        """
+        self.value = value
+        self.mode = mode
+        self.sequence = sequence
+
+
+class PolicyEntry:
+
+    """Policy configuration of a single vJoy input."""
+
+    def __init__(
+            self,
+            policy: OutputPolicy,
+            mode_priorities: Optional[Dict[str, int]]=None
+    ) -> None:
+        """Creates a new policy configuration.
+
+        Args:
+            policy: policy used to combine the values of all writers
+            mode_priorities: priority of each mode, used by the mode priority
+                policy, modes not listed have the lowest priority
+        """
+        self.policy = policy
+        self.mode_priorities = mode_priorities or {}
+
+
+def resolve(
+        policy: PolicyEntry,
+        input_type: InputType,
+        writers: List[WriterState]
+) -> Any:
+    """Combines the values of all writers of an input into a single value.
+
+    Policies which have no sensible meaning for an input type, i.e. numeric
+    combinations of hat directions, fall back to the last writer.
+
+    Args:
+        policy: the policy configuration of the input
+        input_type: type of the input
+        writers: current state of every writer of the input
+
+    Returns:
+        Value to write to the vJoy input
+    """
+    last = max(writers, key=lambda w: w.sequence)
+    if policy.policy == OutputPolicy.LastWriter or \
+            input_type == InputType.JoystickHat and \
+            policy.policy != OutputPolicy.ModePriority:
+        return last.value
+
+    values = [w.value for w in writers]
+    if policy.policy == OutputPolicy.Maximum:
+        return max(values)
+    elif policy.policy == OutputPolicy.Minimum:
+        return min(values)
+    elif policy.policy == OutputPolicy.SumClamped:
+        if input_type == InputType.JoystickButton:
+            return any(values)
+        return util.clamp(sum(values), -1.0, 1.0)
+    elif policy.policy == OutputPolicy.ModePriority:
+        priorities = policy.mode_priorities
+        return max(
+            writers,
+            key=lambda w: (priorities.get(w.mode, -1), w.sequence)
+        ).value
+    return last.value
+
+
+@common.SingletonDecorator
+class OutputArbiter:
+
+    """Combines the writes of multiple actions to the same vJoy input.
+
+    Writes are staged per thread and resolved when the outermost tick of the
+    thread ends. Inputs whose combined value did not change are not written
+    to vJoy again.
+    """
+
+    default_policy = PolicyEntry(OutputPolicy.LastWriter)
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._sequence = 0
+        self._policies = {}
+        self._writers = {}
+        # Last resolved value of each input and the vJoy value it produced
+        self._flushed = {}
+
+    def set_policy(
+            self,
+            vjoy_id: int,
+            input_type: InputType,
+            input_id: int,
+            policy: OutputPolicy,
+            mode_priorities: Optional[Dict[str, int]]=None
+    ) -> None:
+        """Sets the policy used to combine writes to a vJoy input.
+
+        Args:
+            vjoy_id: id of the vJoy device
+            input_type: type of the input
+            input_id: id of the input
+            policy: the policy to use
+            mode_priorities: priority of each mode for the mode priority
+                policy, higher values take precedence
+        """
+        if policy == OutputPolicy.ModePriority and not mode_priorities:
+            raise error.GremlinError(
+                "Mode priority policy requires mode priorities"
+            )
+        with self._lock:
+            self._policies[(vjoy_id, input_type, input_id)] = \
+                PolicyEntry(policy, mode_priorities)
+
+    def policy(
+            self,
+            vjoy_id: int,
+            input_type: InputType,
+            input_id: int
+    ) -> OutputPolicy:
+        """Returns the policy used by a vJoy input.
+
+        Args:
+            vjoy_id: id of the vJoy device
+            input_type: type of the input
+            input_id: id of the input
+
+        Returns:
+            Policy used to combine writes to the input
+        """
+        return self._policies.get(
+            (vjoy_id, input_type, input_id),
+            self.default_policy
+        ).policy
+
+    def write(
+            self,
+            vjoy_id: int,
+            input_type: InputType,
+            input_id: int,
+            value: Any,
+            source: Hashable=None
+    ) -> None:
+        """Submits the value of a writer for a vJoy input.
+
+        Outside of a tick the value is resolved and written immediately.
+
+        Args:
+            vjoy_id: id of the vJoy device
+            input_type: type of the input
+            input_id: id of the input
+            value: value of the input, a float for axes, a bool for buttons,
+                and a direction tuple for hats
+            source: identifier of the writer, writers without an identifier
+                share a single entry
+        """
+        if input_type not in (
+                InputType.JoystickAxis,
+                InputType.JoystickButton,
+                InputType.JoystickHat
+        ):
+            raise error.GremlinError(
+                f"Invalid vJoy output type {InputType.to_string(input_type)}"
+            )
+
+        key = (vjoy_id, input_type, input_id)
+        mode = mode_manager.ModeManager().current.name
+        with self._lock:
+            self._sequence += 1
+            self._writers.setdefault(key, {})[source] = \
+                WriterState(value, mode, self._sequence)
+        self._pending()[key] = True
+
+        if self._depth() == 0:
+            self.flush()
+
+    def release(
+            self,
+            vjoy_id: int,
+            input_type: InputType,
+            input_id: int,
+            source: Hashable=None
+    ) -> None:
+        """Removes the contribution of a writer from a vJoy input.
+
+        Args:
+            vjoy_id: id of the vJoy device
+            input_type: type of the input
+            input_id: id of the input
+            source: identifier of the writer to remove
+        """
+        key = (vjoy_id, input_type, input_id)
+        with self._lock:
+            writers = self._writers.get(key, {})
+            if source not in writers:
+                return
+            del writers[source]
+        self._pending()[key] = True
+
+        if self._depth() == 0:
+            self.flush()
+
+    @contextlib.contextmanager
+    def tick(self) -> Iterator[None]:
+        """Context manager combining all writes within it into one update.
+
+        Ticks can be nested, vJoy is only updated when the outermost tick of
+        the calling thread ends.
+        """
+        self._local.depth = self._depth() + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self.flush()
+
+    def flush(self) -> None:
+        """Writes the combined value of every input changed by this thread."""
+        pending = self._pending()
+        if not pending:
+            return
+
+        keys = list(pending.keys())
+        pending.clear()
+        with self._lock:
+            for key in keys:
+                writers = self._writers.get(key)
+                if not writers:
+                    self._flushed.pop(key, None)
+                    continue
+                value = resolve(
+                    self._policies.get(key, self.default_policy),
+                    key[1],
+                    list(writers.values())
+                )
+                self._apply(key, value)
+
+    def reset(self) -> None:
+        """Removes all policies, writers, and cached output values."""
+        with self._lock:
+            self._policies = {}
+            self._writers = {}
+            self._flushed = {}
+            self._sequence = 0
+        self._pending().clear()
+
+    def _apply(self, key: OutputKey, value: Any) -> None:
+        """Writes a value to vJoy unless the input already holds it.
+
+        Args:
+            key: the vJoy input to write to
+            value: the value to write
+        """
+        vjoy_id, input_type, input_id = key
+        device = joystick_handling.VJoyProxy()[vjoy_id]
+        if input_type == InputType.JoystickAxis:
+            vjoy_input = device.axis(input_id)
+        elif input_type == InputType.JoystickButton:
+            vjoy_input = device.button(input_id)
+        else:
+            vjoy_input = device.hat(input_id)
+
+        # Skip the write if the input holds the value produced by the last
+        # write of the same value, i.e. nothing else modified it since
+        cached = self._flushed.get(key)
+        if cached is not None and cached[0] == value and \
+                cached[1] == self._read(input_type, vjoy_input):
+            return
+
+        if input_type == InputType.JoystickAxis:
+            vjoy_input.value = value
+        elif input_type == InputType.JoystickButton:
+            vjoy_input.is_pressed = value
+        else:
+            vjoy_input.direction = value
+        self._flushed[key] = (value, self._read(input_type, vjoy_input))
+
+    def _read(self, input_type: InputType, vjoy_input: Any) -> Any:
+        """Returns the current value of a vJoy input.
+
+        Args:
+            input_type: type of the input
+            vjoy_input: the vJoy input object
+
+        Returns:
+            Current value of the input
+        """
+        if input_type == InputType.JoystickAxis:
+            return vjoy_input.value
+        elif input_type == InputType.JoystickButton:
+            return vjoy_input.is_pressed
+        else:
+            return vjoy_input.direction
+
+    def _depth(self) -> int:
+        """Returns the tick nesting depth of the calling thread.
+
+        Returns:
+            Number of active ticks of the calling thread
+        """
+        return getattr(self._local, "depth", 0)
+
+    def _pending(self) -> Dict[OutputKey, bool]:
+        """Returns the inputs modified by the calling thread.
+
+        Returns:
+            Inputs requiring resolution, in the order of their first write
+        """
+        if not hasattr(self._local, "pending"):
+            self._local.pending = {}
+        return self._local.pending
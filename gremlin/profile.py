@@ -18,23 +18,23 @@
 from __future__ import annotations
 
 from abc import abstractmethod, ABCMeta
-import codecs
+import itertools
 import logging
-from typing import List, Optional, Set, Tuple, TYPE_CHECKING, Callable
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING, \
+    Callable
 import uuid
-from xml.dom import minidom
 from xml.etree import ElementTree
 
 import dill
 
 import action_plugins
 from gremlin.types import AxisButtonDirection, InputType, HatDirection, \
-    PluginVariableType
+    OutputPolicy, PluginVariableType
 from gremlin import error, plugin_manager
 from gremlin.intermediate_output import IntermediateOutput
 from gremlin.tree import TreeNode
 from gremlin.util import safe_read, safe_format, read_action_ids, read_bool, \
-    read_subelement, create_subelement_node
+    read_subelement, create_subelement_node, write_xml
 
 
 if TYPE_CHECKING:
@@ -194,6 +194,9 @@ class Settings:
         self.parent = parent
         self.vjoy_as_input = {}
         self.vjoy_initial_values = {}
+        # Policy and mode priorities of vJoy outputs not using the last
+        # writer policy, keyed by vJoy id, input type, and input id
+        self.output_policies = {}
         self.startup_mode = None
         self.default_delay = 0.05
 
@@ -232,6 +235,21 @@ class Settings:
                 value = safe_read(axis_node, "value", float, 0.0)
                 self.vjoy_initial_values[vid][aid] = value
 
+        # vJoy output policies
+        self.output_policies = {}
+        for policy_node in node.findall("output-policy"):
+            priorities = {}
+            for mode_node in policy_node.findall("mode"):
+                priorities[safe_read(mode_node, "name", str)] = \
+                    safe_read(mode_node, "priority", int)
+            self.set_output_policy(
+                safe_read(policy_node, "vjoy-id", int),
+                InputType.to_enum(safe_read(policy_node, "input-type", str)),
+                safe_read(policy_node, "input-id", int),
+                OutputPolicy.to_enum(safe_read(policy_node, "policy", str)),
+                priorities
+            )
+
     def to_xml(self) -> ElementTree:
         """Returns an XML node containing the settings.
 
@@ -269,6 +287,20 @@ class Settings:
                 vjoy_node.append(axis_node)
             node.append(vjoy_node)
 
+        # Process vJoy output policies
+        for key, (policy, priorities) in self.output_policies.items():
+            policy_node = ElementTree.Element("output-policy")
+            policy_node.set("vjoy-id", safe_format(key[0], int))
+            policy_node.set("input-type", InputType.to_string(key[1]))
+            policy_node.set("input-id", safe_format(key[2], int))
+            policy_node.set("policy", OutputPolicy.to_string(policy))
+            for mode, priority in priorities.items():
+                mode_node = ElementTree.Element("mode")
+                mode_node.set("name", safe_format(mode, str))
+                mode_node.set("priority", safe_format(priority, int))
+                policy_node.append(mode_node)
+            node.append(policy_node)
+
         return node
 
     def get_initial_vjoy_axis_value(self, vid: int, aid: int) -> float:
@@ -304,6 +336,56 @@ class Settings:
             self.vjoy_initial_values[vid] = {}
         self.vjoy_initial_values[vid][aid] = value
 
+    def get_output_policy(
+        self,
+        vid: int,
+        input_type: InputType,
+        input_id: int
+    ) -> Tuple[OutputPolicy, Dict[str, int]]:
+        """Returns the policy combining concurrent writes to a vJoy output.
+
+        Args:
+            vid the id of the virtual joystick
+            input_type the type of the output
+            input_id the id of the output
+
+        Returns:
+            policy of the output and the priority of each mode
+        """
+        return self.output_policies.get(
+            (vid, input_type, input_id),
+            (OutputPolicy.LastWriter, {})
+        )
+
+    def set_output_policy(
+        self,
+        vid: int,
+        input_type: InputType,
+        input_id: int,
+        policy: OutputPolicy,
+        mode_priorities: Optional[Dict[str, int]]=None
+    ) -> None:
+        """Sets the policy combining concurrent writes to a vJoy output.
+
+        Args:
+            vid the id of the virtual joystick
+            input_type the type of the output
+            input_id the id of the output
+            policy the policy to use
+            mode_priorities priority of each mode for the mode priority
+                policy, higher values take precedence
+        """
+        if policy == OutputPolicy.ModePriority and not mode_priorities:
+            raise error.ProfileError(
+                "Mode priority output policy requires mode priorities"
+            )
+
+        key = (vid, input_type, input_id)
+        if policy == OutputPolicy.LastWriter:
+            self.output_policies.pop(key, None)
+        else:
+            self.output_policies[key] = (policy, dict(mode_priorities or {}))
+
 
 class Library:
 
@@ -311,6 +393,13 @@ class Library:
 
     Each item is a self-contained entry with a UUID assigned to it which
     is used by the input items to reference the actual content.
+
+    Actions read from XML are kept as XML nodes and only instantiated when
+    they are first accessed, together with all actions they reference.
+
+    For every action the library tracks which actions reference it and how
+    often, which is updated as children are inserted into or removed from
+    the actions it stores.
     """
 
     def __init__(self):
@@ -320,13 +409,26 @@ class Library:
         as the items composed of them.
         """
         self._actions: Dict[uuid.UUID, AbstractActionData] = {}
+        # XML nodes of actions not yet instantiated and their ids by type
+        self._unparsed: Dict[uuid.UUID, ElementTree.Element] = {}
+        self._unparsed_types: Dict[str, Set[uuid.UUID]] = {}
+        # Number of references to an action keyed by the referencing action
+        self._parents: Dict[uuid.UUID, Dict[uuid.UUID, int]] = {}
 
     def add_action(self, action: AbstractActionData) -> None:
-        if action.id in self._actions:
+        if self.has_action(action.id):
             logging.getLogger("system").warning(
                 f"Action with id {action.id} already exists, skipping."
             )
+            self._unlink_children(action.id)
+            if action.id in self._unparsed:
+                self._take_unparsed(action.id)
+            else:
+                self._actions[action.id]._library = None
         self._actions[action.id] = action
+        action._library = self
+        for child in action.get_actions()[0]:
+            self._link(action.id, child.id, 1)
 
     def delete_action(self, key: uuid.UUID) -> None:
         """Deletes the action with the given key from the library.
@@ -334,12 +436,16 @@ class Library:
         Args:
             key: the key of the action to delete
         """
-        if key not in self._actions:
+        if not self.has_action(key):
             logging.getLogger("system").warning(
                 f"Attempting to remove non-existant action with id {key}."
             )
+            return
+        self._unlink_children(key)
         if key in self._actions:
-            del self._actions[key]
+            self._actions.pop(key)._library = None
+        else:
+            self._take_unparsed(key)
 
     def remove_unused(
         self,
@@ -353,26 +459,47 @@ class Library:
             recursive: if true all children of the action will be subjected
                 to the same removal check
         """
-        # If the action occurs in another action we can abort any further
-        # processing
-        for entry in self._actions.values():
-            if action in entry.get_actions():
-                return
+        if self.is_referenced(action.id):
+            return
 
-        # Build a list of all actions linked to the provided action and then
-        # attempt to remove them one after the other
-        if recursive:
-            all_actions = [action]
-            index = 0
-            while index < len(all_actions):
-                all_actions.extend(all_actions[index].get_actions())
-                index += 1
-            all_actions.pop(0)
+        # Removing an action releases its references, children which are no
+        # longer referenced by anything are removed in turn
+        pending = [action.id]
+        while len(pending) > 0:
+            key = pending.pop()
+            if not self.has_action(key):
+                continue
+            child_ids = self._child_ids(key)
+            self.delete_action(key)
+            if recursive:
+                pending.extend(
+                    child for child in child_ids
+                    if not self.is_referenced(child)
+                )
+
+    def is_referenced(self, key: uuid.UUID) -> bool:
+        """Returns whether any action in the library references an action.
+
+        Args:
+            key: id of the action to check
+
+        Returns:
+            True if the action is a child of another action, False otherwise
+        """
+        return key in self._parents
+
+    def get_parents(self, key: uuid.UUID) -> List[AbstractActionData]:
+        """Returns all actions referencing the given action.
 
-            for entry in reversed(all_actions):
-                self.remove_unused(entry, True)
+        Args:
+            key: id of the action whose parents to return
 
-        del self._actions[action.id]
+        Returns:
+            Actions that hold the given action as a child
+        """
+        return [
+            self.get_action(parent) for parent in self._parents.get(key, {})
+        ]
 
     def actions_by_type(
             self,
@@ -380,12 +507,20 @@ class Library:
     ) -> List[AbstractActionData]:
         """Returns all actions in the library matching the given type.
 
+        Only the unparsed actions of matching types are instantiated.
+
         Args:
             action_type: type of the action to return
 
         Returns:
             All actions of the given type
         """
+        tag_map = plugin_manager.PluginManager().tag_map
+        for type_key, action_ids in list(self._unparsed_types.items()):
+            if issubclass(tag_map[type_key], action_type):
+                for action_id in list(action_ids):
+                    if action_id in self._unparsed:
+                        self._materialize(action_id)
         return [a for a in self._actions.values() if isinstance(a, action_type)]
 
     def actions_by_predicate(
@@ -400,6 +535,7 @@ class Library:
         Returns:
             List of all actions fulfilling the given predicate
         """
+        self._materialize_all()
         actions = []
         for action in self._actions.values():
             if predicate(action):
@@ -419,7 +555,11 @@ class Library:
             The  instance stored at the given key
         """
         if key not in self._actions:
-            raise error.GremlinError(f"Invalid key for library action: {key}")
+            if key not in self._unparsed:
+                raise error.GremlinError(
+                    f"Invalid key for library action: {key}"
+                )
+            self._materialize(key)
         return self._actions[key]
 
     def has_action(self, key: uuid.UUID) -> bool:
@@ -431,20 +571,19 @@ class Library:
         Returns:
             True if an action exists for the specific key, False otherwise
         """
-        return key in self._actions
+        return key in self._actions or key in self._unparsed
 
     def from_xml(self, node: ElementTree.Element) -> None:
         """Parses a library node to populate this instance.
 
+        The actions are validated but only instantiated once accessed.
+
         Args:
             node: XML node containing the library information
         """
-        parse_later = []
-        can_parse = lambda entry: all([
-            aid in self._actions for aid in read_action_ids(entry)
-        ])
-
-        # Parse all actions
+        # Collect all actions in document order
+        tag_map = plugin_manager.PluginManager().tag_map
+        entries = {}
         for entry in node.findall("./library/action"):
             # Ensure all required attributes are present
             if not set(["id", "type"]).issubset(entry.keys()):
@@ -454,32 +593,62 @@ class Library:
 
             # Ensure the action type is known
             type_key = entry.get("type")
-            if type_key not in plugin_manager.PluginManager().tag_map:
-                action_id = safe_read(entry, "id", uuid.UUID)
+            action_id = safe_read(entry, "id", uuid.UUID)
+            if type_key not in tag_map:
                 raise error.ProfileError(
                     f"Unknown type '{type_key}' in action with id '{action_id}'"
                 )
+            if action_id in entries or self.has_action(action_id):
+                raise error.ProfileError(
+                    f"Duplicate library action entry with id '{action_id}'"
+                )
+            entries[action_id] = entry
+
+        # Build the graph of references between the actions, counting for
+        # each action the number of referenced actions not yet parsed
+        pending = {}
+        dependents = {action_id: [] for action_id in entries}
+        all_references = {}
+        for action_id, entry in entries.items():
+            all_references[action_id] = read_action_ids(entry)
+            references = set(all_references[action_id])
+            for reference in references:
+                if reference not in entries and \
+                        not self.has_action(reference):
+                    raise error.ProfileError(
+                        f"Action with id '{action_id}' references the "
+                        f"non-existent action with id '{reference}'"
+                    )
+            unparsed = [ref for ref in references if ref in entries]
+            pending[action_id] = len(unparsed)
+            for reference in unparsed:
+                dependents[reference].append(action_id)
+
+        # Topologically sort the actions, starting with the ones that do not
+        # reference any other action, to detect reference cycles
+        order = [aid for aid, count in pending.items() if count == 0]
+        index = 0
+        while index < len(order):
+            for dependent in dependents[order[index]]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    order.append(dependent)
+            index += 1
+
+        # Any remaining action is part of or depends on a reference cycle
+        if len(order) != len(entries):
+            cyclic = [str(aid) for aid, count in pending.items() if count > 0]
+            raise error.ProfileError(
+                f"Cyclic references involving library actions with ids: "
+                f"{', '.join(cyclic)}"
+            )
 
-            # Check if all actions referenced by this action have already
-            # been parsed, if yes parse it otherwise attempt to process it
-            # again at a later stage.
-            if can_parse(entry):
-                self._parse_xml_action(entry)
-            else:
-                parse_later.append(entry)
-
-
-        # Parse all actions that have missing child actions and repeat this
-        # until no action with missing child actions remains.
-        # FIXME: Detect when this gets stuck because a child simply doesn't exist
-        while len(parse_later) > 0:
-            entry = parse_later.pop(0)
-            if can_parse(entry):
-                self._parse_xml_action(entry)
-            else:
-                print(self._actions.keys())
-                parse_later.append(entry)
-
+        for action_id, entry in entries.items():
+            self._unparsed[action_id] = entry
+            self._unparsed_types.setdefault(entry.get("type"), set()) \
+                .add(action_id)
+            for reference in all_references[action_id]:
+                self._link(action_id, reference, 1)
 
     def to_xml(self) -> ElementTree.Element:
         """Returns an XML node encoding the content of this library.
@@ -487,6 +656,7 @@ class Library:
         Returns:
             XML node holding the instance's content
         """
+        self._materialize_all()
         node = ElementTree.Element("library")
         for item in [n for n in self._actions.values() if n.is_valid()]:
             node.append(item.to_xml())
@@ -506,6 +676,125 @@ class Library:
                 f"Duplicate library action entry with id '{action_obj.id}'"
             )
         self._actions[action_obj.id] = action_obj
+        action_obj._library = self
+
+    def _add_reference(
+            self,
+            parent: AbstractActionData,
+            child: AbstractActionData
+    ) -> None:
+        """Records that an action was inserted as a child of another.
+
+        Args:
+            parent: the action into which the child was inserted
+            child: the inserted action
+        """
+        if self._actions.get(parent.id) is parent:
+            self._link(parent.id, child.id, 1)
+
+    def _remove_reference(
+            self,
+            parent: AbstractActionData,
+            child: AbstractActionData
+    ) -> None:
+        """Records that a child was removed from an action.
+
+        Args:
+            parent: the action from which the child was removed
+            child: the removed action
+        """
+        if self._actions.get(parent.id) is parent:
+            self._link(parent.id, child.id, -1)
+
+    def _link(self, parent: uuid.UUID, child: uuid.UUID, delta: int) -> None:
+        """Changes the number of references from one action to another.
+
+        Args:
+            parent: id of the referencing action
+            child: id of the referenced action
+            delta: change in the number of references
+        """
+        parents = self._parents.setdefault(child, {})
+        count = parents.get(parent, 0) + delta
+        if count > 0:
+            parents[parent] = count
+        else:
+            parents.pop(parent, None)
+            if len(parents) == 0:
+                del self._parents[child]
+
+    def _unlink_children(self, key: uuid.UUID) -> None:
+        """Releases all references held by an action.
+
+        Args:
+            key: id of the action whose references to release
+        """
+        for child in self._child_ids(key):
+            self._link(key, child, -1)
+
+    def _child_ids(self, key: uuid.UUID) -> List[uuid.UUID]:
+        """Returns the ids of all children of an action.
+
+        Args:
+            key: id of the action
+
+        Returns:
+            Ids of the action's children, once per reference
+        """
+        if key in self._unparsed:
+            return read_action_ids(self._unparsed[key])
+        return [child.id for child in self._actions[key].get_actions()[0]]
+
+    def _materialize(self, key: uuid.UUID) -> None:
+        """Instantiates an unparsed action and the actions it references.
+
+        Referenced actions are instantiated before the actions referencing
+        them, thus parsing an action finds all its children present.
+
+        Args:
+            key: id of the unparsed action to instantiate
+        """
+        order = []
+        visited = {key}
+        stack = [(key, iter(read_action_ids(self._unparsed[key])))]
+        while len(stack) > 0:
+            action_id, references = stack[-1]
+            for reference in references:
+                if reference in self._unparsed and reference not in visited:
+                    visited.add(reference)
+                    stack.append((
+                        reference,
+                        iter(read_action_ids(self._unparsed[reference]))
+                    ))
+                    break
+            else:
+                stack.pop()
+                order.append(action_id)
+
+        for action_id in order:
+            self._parse_xml_action(self._take_unparsed(action_id))
+
+    def _materialize_all(self) -> None:
+        """Instantiates all actions that have not been parsed yet."""
+        for key in list(self._unparsed):
+            if key in self._unparsed:
+                self._materialize(key)
+
+    def _take_unparsed(self, key: uuid.UUID) -> ElementTree.Element:
+        """Removes an unparsed action from the library.
+
+        Args:
+            key: id of the unparsed action to remove
+
+        Returns:
+            XML node of the removed action
+        """
+        entry = self._unparsed.pop(key)
+        action_ids = self._unparsed_types[entry.get("type")]
+        action_ids.discard(key)
+        if len(action_ids) == 0:
+            del self._unparsed_types[entry.get("type")]
+        return entry
 
 
 class Profile:
@@ -516,6 +805,8 @@ class Profile:
 
     def __init__(self):
         self.inputs = {}
+        # InputItem instances keyed by device, input type, input, and mode
+        self._input_index = {}
         self.library = Library()
         self.settings = Settings(self)
         self.modes = ModeHierarchy(self)
@@ -539,9 +830,10 @@ class Profile:
         ):
             self._create_io_input(node)
 
-        # Create library entries and modes
+        # Create library entries, modes, and settings
         self.library.from_xml(root)
         self.modes.from_xml(root)
+        self.settings.from_xml(root.find("settings"))
 
         # Parse individual inputs
         for node in root.findall("./inputs/input"):
@@ -553,6 +845,14 @@ class Profile:
         Args:
             fpath: path to the XML file in which to write the content
         """
+        write_xml(self._build_xml(), fpath)
+
+    def _build_xml(self) -> ElementTree.Element:
+        """Returns the XML representation of the profile's content.
+
+        Returns:
+            Root node of the profile's XML document
+        """
         root = ElementTree.Element("profile")
         root.set("version", str(Profile.current_version))
 
@@ -571,12 +871,7 @@ class Profile:
         for plugin in self.plugins:
             plugins.append(plugin.to_xml())
         root.append(plugins)
-
-        # Serialize XML document
-        ugly_xml = ElementTree.tostring(root, encoding="utf-8")
-        dom_xml = minidom.parseString(ugly_xml)
-        with codecs.open(fpath, "w", "utf-8-sig") as out:
-            out.write(dom_xml.toprettyxml(indent="    "))
+        return root
 
     def get_input_count(
             self,
@@ -597,15 +892,10 @@ class Profile:
         Returns:
             Number of InputItem instances linked with the given information
         """
-        if device_guid not in self.inputs:
-            return 0
-
-        for item in self.inputs[device_guid]:
-            if item.input_type == input_type and item.input_id == input_id \
-                    and item.mode == mode:
-                return len(item.action_sequences)
-
-        return 0
+        item = self._input_index.get(
+            (device_guid, input_type, input_id, mode)
+        )
+        return 0 if item is None else len(item.action_sequences)
 
     def get_input_item(
             self,
@@ -637,28 +927,27 @@ class Profile:
         ):
             raise error.ProfileError("Invalid input specification provided.")
 
-        if device_guid not in self.inputs:
-            if create_if_missing:
-                self.inputs[device_guid] = []
-            else:
-                return None
-
-        for item in self.inputs[device_guid]:
-            if item.input_type == input_type and \
-                    item.input_id == input_id and \
-                    item.mode == mode:
-                return item
-
-        if create_if_missing:
-            item = InputItem(self.library)
-            item.device_id = device_guid
-            item.input_type = input_type
-            item.input_id = input_id
-            item.mode = mode
-            self.inputs[device_guid].append(item)
+        item = self._input_index.get(
+            (device_guid, input_type, input_id, mode)
+        )
+        if item is not None or not create_if_missing:
             return item
-        else:
-            return None
+
+        item = InputItem(self.library)
+        item.device_id = device_guid
+        item.input_type = input_type
+        item.input_id = input_id
+        item.mode = mode
+        self._add_input_item(item)
+        return item
+
+    def all_input_items(self) -> List[InputItem]:
+        """Returns the InputItem instances of all devices.
+
+        Returns:
+            List of all InputItem instances in the profile
+        """
+        return list(itertools.chain.from_iterable(self.inputs.values()))
 
     def remove_action(
         self,
@@ -697,10 +986,31 @@ class Profile:
         """
         item = InputItem(self.library)
         item.from_xml(node)
+        self._add_input_item(item)
+
+    def _add_input_item(self, item: InputItem) -> None:
+        """Stores an InputItem and adds it to the lookup index.
 
+        Args:
+            item: the InputItem to store
+        """
         if item.device_id not in self.inputs:
             self.inputs[item.device_id] = []
         self.inputs[item.device_id].append(item)
+        # Lookups return the first matching item
+        self._input_index.setdefault(
+            (item.device_id, item.input_type, item.input_id, item.mode),
+            item
+        )
+
+    def _rebuild_input_index(self) -> None:
+        """Recreates the lookup index from the stored InputItem instances."""
+        self._input_index = {}
+        for item in itertools.chain.from_iterable(self.inputs.values()):
+            self._input_index.setdefault(
+                (item.device_id, item.input_type, item.input_id, item.mode),
+                item
+            )
 
     def _create_io_input(self, node: ElementTree) -> None:
         """Creates an intermediate output input for the given node.
@@ -805,10 +1115,29 @@ class InputItemBinding:
 
     def __init__(self, input_item: InputItem):
         self.input_item = input_item
-        self.root_action = None
+        self._root_action = None
+        self._root_action_id = None
         self.behavior = None
         self.virtual_button = None
 
+    @property
+    def root_action(self) -> AbstractActionData:
+        """Returns the root action of the binding.
+
+        The action is retrieved from the library on first access.
+
+        Returns:
+            Root action of the binding
+        """
+        if self._root_action is None and self._root_action_id is not None:
+            self._root_action = self.library.get_action(self._root_action_id)
+        return self._root_action
+
+    @root_action.setter
+    def root_action(self, action: AbstractActionData) -> None:
+        self._root_action = action
+        self._root_action_id = None if action is None else action.id
+
     def from_xml(self, node: ElementTree.Element) -> None:
         root_id = read_subelement(node, "root-action")
         if not self.input_item.library.has_action(root_id):
@@ -816,14 +1145,15 @@ class InputItemBinding:
                 f"{self.input_item.descriptor()} links to an invalid library "
                 f"item {root_id}"
             )
-        self.root_action = self.input_item.library.get_action(root_id)
+        self._root_action = None
+        self._root_action_id = root_id
         self.behavior = read_subelement(node, "behavior")
         self.virtual_button = self._parse_virtual_button(node)
 
     def to_xml(self) -> ElementTree.Element:
         node = ElementTree.Element("action-configuration")
         node.append(
-            create_subelement_node("root-action", self.root_action.id)
+            create_subelement_node("root-action", self._root_action_id)
         )
         node.append(create_subelement_node("behavior", self.behavior))
         vb_node = self._write_virtual_button()
@@ -1005,6 +1335,7 @@ class ModeHierarchy:
             self._profile.inputs[device_id] = [
                 x for x in input_items if x.mode != mode_name
             ]
+        self._profile._rebuild_input_index()
 
     def rename_mode(self, old_name: str, new_name: str) -> None:
         """Changes the name of an existing mode.
@@ -1036,6 +1367,7 @@ class ModeHierarchy:
         # Find all actions associated to the old mode name
         for action in self._actions_with_mode(old_name):
             action.mode = new_name
+        self._profile._rebuild_input_index()
 
     def set_parent(self, mode_name: str, parent_name: str | None) -> None:
         """Sets the parent of the specified mode.
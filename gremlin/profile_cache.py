@@ -0,0 +1,332 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compiled cache of parsed profiles.
+
+Parsing a profile's XML document queries every property individually and
+instantiates every action. The parsed profile is therefore stored in a
+binary form in the user's profile folder and restored from there as long as
+the XML content, the profile format, and the set of action plugins are
+unchanged. Whenever the cache is missing, stale, or unreadable the XML file
+is parsed.
+
+Restoring a cache unpickles its content, which can execute arbitrary code.
+Every cache is therefore authenticated with a secret unique to the
+installation and only restored if its authentication code is valid.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+import uuid
+
+from gremlin import error, plugin_manager, util
+from gremlin.config import Configuration
+from gremlin.intermediate_output import IntermediateOutput
+from gremlin.profile import Profile
+from gremlin.types import InputType, PropertyType
+
+
+# Version of the cache file layout, changing it invalidates all caches
+FORMAT_VERSION = 3
+
+# Intermediate output inputs as tuples of input type, id, and label
+IOInputs = List[Tuple[InputType, uuid.UUID, str]]
+
+
+class CacheStatistics:
+
+    """Usage statistics of the profile cache."""
+
+    def __init__(self):
+        """Creates a new instance."""
+        self.hits = 0
+        self.misses = 0
+        self.last_load_time = 0.0
+        self.last_was_hit = False
+
+    def record(self, is_hit: bool, duration: float) -> None:
+        """Records a single profile load.
+
+        Args:
+            is_hit: whether the profile was restored from the cache
+            duration: time in seconds the load took
+        """
+        if is_hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.last_load_time = duration
+        self.last_was_hit = is_hit
+
+
+_statistics = CacheStatistics()
+
+
+def statistics() -> CacheStatistics:
+    """Returns the statistics of all profiles loaded via the cache.
+
+    Returns:
+        Cache hit and miss counts as well as the duration of the last load
+    """
+    return _statistics
+
+
+def cache_directory() -> str:
+    """Returns the folder holding all profile caches.
+
+    Returns:
+        Path of the folder in the user's profile folder storing the caches
+    """
+    return os.path.join(util.userprofile_path(), "profile_cache")
+
+
+def cache_path(fpath: str) -> str:
+    """Returns the path of the cache file belonging to a profile.
+
+    Args:
+        fpath: path to the profile's XML file
+
+    Returns:
+        Path of the corresponding cache file
+    """
+    name = hashlib.sha256(
+        os.path.normcase(os.path.abspath(fpath)).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(cache_directory(), f"{name}.cache")
+
+
+def cache_key(content: bytes) -> bytes:
+    """Returns the key identifying a cache created from the given content.
+
+    The key covers everything that influences the parsed profile besides
+    the XML content itself, namely the cache and profile formats, the
+    Python version, and the tag, implementation, and version of every
+    action plugin.
+
+    Args:
+        content: raw content of the profile's XML file
+
+    Returns:
+        Hex encoded key of the cache
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        f"{FORMAT_VERSION}:{Profile.current_version}:"
+        f"{sys.version_info.major}.{sys.version_info.minor}".encode("utf-8")
+    )
+    for tag, action in sorted(plugin_manager.PluginManager().tag_map.items()):
+        digest.update(
+            f"|{tag}:{action.__module__}.{action.__qualname__}:"
+            f"{getattr(action, 'version', 0)}".encode("utf-8")
+        )
+    digest.update(b"|")
+    digest.update(content)
+    return digest.hexdigest().encode("ascii")
+
+
+def load_profile(fpath: str) -> Profile:
+    """Returns the profile stored in the given file.
+
+    The profile is restored from its cache if that is valid, otherwise the
+    XML file is parsed and the cache recreated. Intermediate output inputs
+    are created in the same way parsing the XML file does, thus the
+    intermediate output system should be reset beforehand.
+
+    Args:
+        fpath: path to the profile's XML file
+
+    Returns:
+        Profile holding the file's content
+    """
+    start = time.perf_counter()
+    use_cache = _is_enabled()
+
+    with open(fpath, "rb") as fhandle:
+        key = cache_key(fhandle.read())
+
+    profile = _read_cache(cache_path(fpath), key) if use_cache else None
+    is_hit = profile is not None
+    if not is_hit:
+        profile = Profile()
+        profile.from_xml(fpath)
+        if use_cache:
+            _write_cache(cache_path(fpath), key, profile)
+    profile.fpath = fpath
+
+    duration = time.perf_counter() - start
+    _statistics.record(is_hit, duration)
+    logging.getLogger("system").info(
+        f"Loaded profile {fpath} {'from cache' if is_hit else 'from XML'} "
+        f"in {duration * 1000.0:.1f} ms"
+    )
+    return profile
+
+
+def _is_enabled() -> bool:
+    """Returns whether the cache is enabled in the configuration.
+
+    Returns:
+        True if the cache is enabled or the option is not registered with
+        the configuration, False otherwise
+    """
+    try:
+        return Configuration().value("profile", "cache", "enabled")
+    except error.GremlinError:
+        return True
+
+
+def _secret() -> bytes:
+    """Returns the secret used to authenticate cache files.
+
+    The secret is created the first time it is needed and stored in the
+    cache folder, readable only by the current user.
+
+    Returns:
+        Secret unique to this installation
+    """
+    path = os.path.join(cache_directory(), "secret")
+    os.makedirs(cache_directory(), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "rb") as fhandle:
+            return fhandle.read()
+    secret = os.urandom(32)
+    with os.fdopen(fd, "wb") as fhandle:
+        fhandle.write(secret)
+    return secret
+
+
+def _signature(key: bytes, payload: bytes) -> bytes:
+    """Returns the authentication code of a cache's content.
+
+    Args:
+        key: key identifying the profile's content
+        payload: pickled content of the cache
+
+    Returns:
+        Hex encoded authentication code
+    """
+    code = hmac.new(_secret(), key + b"\n", hashlib.sha256)
+    code.update(payload)
+    return code.hexdigest().encode("ascii")
+
+
+def _read_cache(path: str, key: bytes) -> Optional[Profile]:
+    """Restores a profile from a cache file.
+
+    Args:
+        path: path of the cache file
+        key: key the cache has to match to be valid
+
+    Returns:
+        The cached profile, None if the cache is missing or invalid
+    """
+    try:
+        with open(path, "rb") as fhandle:
+            # The key is checked before reading the remainder of the file
+            if fhandle.readline().rstrip(b"\n") != key:
+                return None
+            signature = fhandle.readline().rstrip(b"\n")
+            payload = fhandle.read()
+        # Only unpickle content this installation created itself
+        if not hmac.compare_digest(signature, _signature(key, payload)):
+            logging.getLogger("system").warning(
+                f"Ignoring profile cache {path} with an invalid signature"
+            )
+            return None
+        io_inputs, profile = pickle.loads(payload)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logging.getLogger("system").warning(
+            f"Ignoring invalid profile cache {path}", exc_info=True
+        )
+        return None
+
+    io = IntermediateOutput()
+    for input_type, guid, label in io_inputs:
+        io.create(input_type, guid, label)
+    return profile
+
+
+def _write_cache(path: str, key: bytes, profile: Profile) -> None:
+    """Stores a profile in a cache file.
+
+    Failing to create the cache is logged but otherwise ignored, as the
+    profile can always be parsed from its XML file.
+
+    Args:
+        path: path of the cache file
+        key: key identifying the profile's content
+        profile: the profile to store
+    """
+    io_inputs = [
+        (entry.type, entry.guid, entry.label)
+        for entry in IntermediateOutput().inputs_of_type(None)
+    ]
+    try:
+        payload = pickle.dumps(
+            (io_inputs, profile),
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+        signature = _signature(key, payload)
+        fd, tmp_path = tempfile.mkstemp(
+            suffix=".tmp",
+            dir=os.path.dirname(os.path.abspath(path))
+        )
+        try:
+            with os.fdopen(fd, "wb") as fhandle:
+                fhandle.write(key + b"\n")
+                fhandle.write(signature + b"\n")
+                fhandle.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except (
+            OSError,
+            pickle.PicklingError,
+            AttributeError,
+            TypeError,
+            RecursionError
+    ):
+        logging.getLogger("system").warning(
+            f"Unable to create profile cache {path}", exc_info=True
+        )
+
+
+Configuration().register(
+    "profile",
+    "cache",
+    "enabled",
+    PropertyType.Bool,
+    True,
+    "Stores parsed profiles in the user's profile folder to speed up "
+    "loading them.",
+    {},
+    True
+)
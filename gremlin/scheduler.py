@@ -0,0 +1,297 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Runs delayed callbacks from a single shared thread.
+
+Instead of creating a threading.Timer for every timeout, subsystems schedule
+their callbacks with the scheduler which executes all of them from one
+thread in the order of their deadlines.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from gremlin.clock import Clock, get_clock
+
+
+# Default duration in seconds before a deadline that is spent spinning rather
+# than sleeping, this has to exceed the granularity of the system's sleep
+DEFAULT_SPIN_BUDGET = 0.002
+
+
+class TimerHandle:
+
+    """Handle of a scheduled callback allowing its cancellation."""
+
+    __slots__ = ("deadline", "callback", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[[], None]) -> None:
+        """Creates a new handle.
+
+        Args:
+            deadline: time at which to run the callback
+            callback: the function to run
+        """
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Prevents the callback from being run.
+
+        Cancelling a callback that already ran has no effect.
+        """
+        self.cancelled = True
+
+    @property
+    def is_pending(self) -> bool:
+        """Returns whether the callback is still waiting to be run.
+
+        Returns:
+            True if the callback has neither run nor been cancelled
+        """
+        return not self.cancelled and self.callback is not None
+
+
+class Scheduler:
+
+    """Executes delayed callbacks in deadline order from a single thread.
+
+    Pending callbacks are stored in a heap. Cancellation only flags the
+    handle, the entry is discarded once it reaches the top of the heap or
+    when cancelled entries make up the majority of the heap.
+
+    With a virtual clock no thread is used, instead callbacks are run by the
+    clock as it is advanced.
+    """
+
+    def __init__(self, clock: Optional[Clock]=None) -> None:
+        """Creates a new scheduler, its thread is started on first use.
+
+        Args:
+            clock: the clock to use, the globally installed one if None
+        """
+        self._clock = clock
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(
+            self,
+            delay: float,
+            callback: Callable[[], None]
+    ) -> TimerHandle:
+        """Runs a callback after the given delay.
+
+        Args:
+            delay: time in seconds after which to run the callback
+            callback: the function to run, it is executed on the scheduler
+                thread and should not block
+
+        Returns:
+            Handle which can be used to cancel the callback
+        """
+        clock = self.clock
+        handle = TimerHandle(clock.now() + max(0.0, delay), callback)
+        with self._condition:
+            self._compact()
+            heapq.heappush(
+                self._queue,
+                (handle.deadline, next(self._counter), handle)
+            )
+            if clock.is_virtual:
+                clock.register(self)
+            elif self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            # Only wake the thread if the new callback is the next one due
+            if self._queue[0][2] is handle:
+                self._condition.notify()
+        return handle
+
+    @property
+    def clock(self) -> Clock:
+        """Returns the clock used by the scheduler.
+
+        Returns:
+            Clock against which deadlines are evaluated
+        """
+        return self._clock if self._clock is not None else get_clock()
+
+    def next_deadline(self) -> Optional[float]:
+        """Returns the deadline of the next pending callback.
+
+        Returns:
+            Deadline of the next callback or None if none is pending
+        """
+        with self._condition:
+            self._drop_cancelled()
+            return self._queue[0][0] if len(self._queue) > 0 else None
+
+    def run_due(self, now: float) -> None:
+        """Runs all callbacks whose deadline has been reached.
+
+        Args:
+            now: the current time
+        """
+        while True:
+            with self._condition:
+                self._drop_cancelled()
+                if len(self._queue) == 0 or self._queue[0][0] > now:
+                    return
+                callback = self._pop()
+            self._execute(callback)
+
+    def pending(self) -> int:
+        """Returns the number of callbacks waiting to be run.
+
+        Returns:
+            Number of scheduled and not cancelled callbacks
+        """
+        with self._condition:
+            return sum(1 for entry in self._queue if not entry[2].cancelled)
+
+    def _compact(self) -> None:
+        """Removes cancelled entries if they dominate the heap."""
+        if len(self._queue) < 64:
+            return
+        active = [entry for entry in self._queue if not entry[2].cancelled]
+        if len(active) < len(self._queue) // 2:
+            heapq.heapify(active)
+            self._queue = active
+
+    def _drop_cancelled(self) -> None:
+        """Removes cancelled entries from the top of the heap."""
+        while len(self._queue) > 0 and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+
+    def _pop(self) -> Callable[[], None]:
+        """Removes the next entry from the heap.
+
+        Returns:
+            Callback of the removed entry
+        """
+        handle = heapq.heappop(self._queue)[2]
+        callback = handle.callback
+        handle.callback = None
+        return callback
+
+    def _execute(self, callback: Callable[[], None]) -> None:
+        """Runs a callback, logging any errors it raises.
+
+        Args:
+            callback: the callback to run
+        """
+        try:
+            callback()
+        except Exception:
+            logging.getLogger("system").exception(
+                "Error in scheduled callback"
+            )
+
+    def _run(self) -> None:
+        """Runs callbacks whenever their deadline is reached."""
+        while True:
+            with self._condition:
+                self._drop_cancelled()
+                if len(self._queue) == 0:
+                    self._condition.wait()
+                    continue
+
+                delay = self._queue[0][0] - self.clock.now()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                callback = self._pop()
+            self._execute(callback)
+
+
+_scheduler = Scheduler()
+
+
+def schedule(delay: float, callback: Callable[[], None]) -> TimerHandle:
+    """Runs a callback after the given delay on the shared scheduler thread.
+
+    Args:
+        delay: time in seconds after which to run the callback
+        callback: the function to run
+
+    Returns:
+        Handle which can be used to cancel the callback
+    """
+    return _scheduler.schedule(delay, callback)
+
+
+def wait_until(
+        deadline_ns: int,
+        spin_budget: float=DEFAULT_SPIN_BUDGET,
+        event: Optional[threading.Event]=None
+) -> bool:
+    """Waits until the given time with sub-millisecond accuracy.
+
+    Sleeps until the spin budget before the deadline and then spins on
+    time.perf_counter_ns until the deadline is reached.
+
+    Args:
+        deadline_ns: time.perf_counter_ns based time to wait for
+        spin_budget: time in seconds before the deadline spent spinning
+        event: optional event which interrupts the wait when set
+
+    Returns:
+        True if the deadline was reached, False if the event was set
+    """
+    coarse_delay = (deadline_ns - time.perf_counter_ns()) / 1e9 - spin_budget
+    if coarse_delay > 0:
+        if event is None:
+            time.sleep(coarse_delay)
+        elif event.wait(coarse_delay):
+            return False
+
+    while time.perf_counter_ns() < deadline_ns:
+        if event is not None and event.is_set():
+            return False
+        # Release the GIL while spinning
+        time.sleep(0)
+    return True
+
+
+def precise_sleep(
+        duration: float,
+        spin_budget: float=DEFAULT_SPIN_BUDGET
+) -> None:
+    """Sleeps for the given duration with sub-millisecond accuracy.
+
+    Args:
+        duration: time in seconds to sleep for
+        spin_budget: time in seconds before the end spent spinning
+    """
+    clock = get_clock()
+    if clock.is_virtual:
+        clock.sleep(duration)
+        return
+    wait_until(
+        time.perf_counter_ns() + int(duration * 1e9),
+        spin_budget
+    )
@@ -16,13 +16,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import contextlib
 import ctypes
 import ctypes.wintypes
 import enum
 import math
 import threading
 import time
-from typing import Tuple
+from typing import Callable, Iterator, Optional, Tuple
 
 from gremlin.common import SingletonDecorator
 from gremlin.types import MouseButton
@@ -52,6 +53,14 @@ MOUSEEVENTF_XDOWN = 0x0080
 MOUSEEVENTF_XUP = 0x0100
 
 
+"""Defines flags used when specifying KEYBDINPUT structures.
+
+https://msdn.microsoft.com/en-us/library/ms646271(v=vs.85).aspx
+"""
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+
+
 """Defines data structure type for INPUT structures.
 
 https://msdn.microsoft.com/en-us/library/ms646270(v=vs.85).aspx
@@ -72,9 +81,6 @@ class MouseMotion:
 
     """Base class of all mouse motion behaviors."""
 
-    # Time step between calls
-    delta_t = 0.01
-
     def __init__(self, dx: float=0, dy: float=0):
         """Creates a new instance.
 
@@ -85,53 +91,25 @@ class MouseMotion:
         self.dx = dx
         self.dy = dy
 
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
-
-        self._dx_timestamp = 0
-        self._dy_timestamp = 0
-
-    def __call__(self) -> Tuple[int, int]:
-        """Returns the change in x and y for this point in time.
+    @property
+    def is_moving(self) -> bool:
+        """Returns whether the behavior produces any motion.
 
         Returns:
-            The change in (dx, dy) for this time point
+            True if motion is produced, False otherwise
         """
-        if self._tick_dx_value == 0 and self._tick_dy_value == 0:
-            return 0, 0
-
-        delta_x = 0
-        delta_y = 0
-
-        cur_time = time.time()
-        if self._dx_timestamp < cur_time:
-            delta_x = self._tick_dx_value
-            self._dx_timestamp = cur_time + self._tick_dx_time
-        if self._dy_timestamp < cur_time:
-            delta_y = self._tick_dy_value
-            self._dy_timestamp = cur_time + self._tick_dy_time
+        return abs(self.dx) > 1e-6 or abs(self.dy) > 1e-6
 
-        return delta_x, delta_y
-
-    def _compute_values(self, delta: float) -> Tuple[int, float]:
-        """Computes discretization values to send integer motions.
+    def __call__(self, delta_t: float) -> Tuple[float, float]:
+        """Returns the change in x and y over the given duration.
 
         Args:
-            delta: the amount of change in pixels per second to discretize for
+            delta_t: time elapsed since the previous call in seconds
 
         Returns:
-            Discretization information in terms of cursor movement amount
-            and movement interval
+            The change in (dx, dy) in pixels over the duration
         """
-        delta = 0.0 if abs(delta) < 1e-6 else delta
-        tick_value = math.ceil(abs(delta) / 100.0)
-        if tick_value == 0:
-            tick_time = MouseMotion.delta_t
-        else:
-            tick_time = 1.0 / (abs(delta) / tick_value)
-            tick_value = int(math.copysign(tick_value, delta))
-
-        return tick_value, tick_time
+        return self.dx * delta_t, self.dy * delta_t
 
 
 class FixedMouseMotion(MouseMotion):
@@ -154,7 +132,6 @@ class FixedMouseMotion(MouseMotion):
             value: speed in pixels per second along the x-axis
         """
         self.dx = value
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
 
     def set_dy(self, value: float) -> None:
         """Updates the y velocity.
@@ -163,7 +140,6 @@ class FixedMouseMotion(MouseMotion):
             value speed in pixels per second along the y-axis
         """
         self.dy = value
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
 
 
 class AcceleratedMouseMotion(MouseMotion):
@@ -199,8 +175,15 @@ class AcceleratedMouseMotion(MouseMotion):
         self.current_velocity = self.min_velocity
         self.dx, self.dy = \
             self._decompose_xy(self.direction, self.current_velocity)
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
+
+    @property
+    def is_moving(self) -> bool:
+        """Returns whether the behavior produces any motion.
+
+        Returns:
+            True if motion is produced, False otherwise
+        """
+        return self.max_velocity > 1e-6
 
     def set_direction(self, direction: int):
         """Sets the direction for which to emit position changes.
@@ -211,8 +194,6 @@ class AcceleratedMouseMotion(MouseMotion):
         self.direction = direction - 90
         self.dx, self.dy = \
             self._decompose_xy(self.direction, self.current_velocity)
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
 
     def _decompose_xy(self, direction: int, value: float) -> Tuple[float, float]:
         """Returns x and y values corresponding to a direction and value.
@@ -229,42 +210,73 @@ class AcceleratedMouseMotion(MouseMotion):
         return value * math.cos(deg2rad(direction)),\
             value * math.sin(deg2rad(direction))
 
-    def __call__(self) -> Tuple[float, float]:
-        """Returns the change in x and y for this point in time.
+    def __call__(self, delta_t: float) -> Tuple[float, float]:
+        """Returns the change in x and y over the given duration.
+
+        Args:
+            delta_t: time elapsed since the previous call in seconds
 
         Returns:
-            The change in (dx, dy) for this time point
+            The change in (dx, dy) in pixels over the duration
         """
-        # Get values to return using current integration step values
-        dx, dy = super().__call__()
-
-        # Apply acceleration to obtain next integration step values
-        self.current_velocity = min(
+        # Integrate the motion using the mean velocity across the time step
+        velocity = min(
             self.max_velocity,
-            self.current_velocity + self.acceleration * MouseMotion.delta_t
+            self.current_velocity + self.acceleration * delta_t
         )
+        distance = 0.5 * (self.current_velocity + velocity) * delta_t
+        self.current_velocity = velocity
         self.dx, self.dy = \
             self._decompose_xy(self.direction, self.current_velocity)
-        self._tick_dx_value, self._tick_dx_time = self._compute_values(self.dx)
-        self._tick_dy_value, self._tick_dy_time = self._compute_values(self.dy)
 
-        # Return cached values
-        return dx, dy
+        return self._decompose_xy(self.direction, distance)
 
 
 @SingletonDecorator
 class MouseController:
 
-    """Centralizes sending mouse events in a organized manner."""
+    """Centralizes sending mouse events in a organized manner.
+
+    Motion is computed from the time elapsed between updates, fractional
+    pixel amounts are carried over to subsequent updates. While no motion
+    is requested the update thread sleeps until woken by a new motion.
+    """
+
+    # Default and maximum number of motion updates per second
+    default_tick_rate = 100
+    max_tick_rate = 1000
 
     def __init__(self):
         """Creates a new instance."""
         self._motion_type = MotionType.Fixed
         self._delta_generator = FixedMouseMotion(0, 0)
+        self._tick_rate = self.default_tick_rate
+        self._remainder = [0.0, 0.0]
 
         self._is_running = False
+        self._condition = threading.Condition()
         self._thread = threading.Thread(target=self._control_loop)
 
+    @property
+    def tick_rate(self) -> int:
+        """Returns the number of motion updates per second.
+
+        Returns:
+            Number of motion updates sent per second
+        """
+        return self._tick_rate
+
+    @tick_rate.setter
+    def tick_rate(self, value: int) -> None:
+        """Sets the number of motion updates per second.
+
+        Args:
+            value: number of updates per second, limited to [1, 1000]
+        """
+        with self._condition:
+            self._tick_rate = \
+                int(min(self.max_tick_rate, max(1, value)))
+
     def set_absolute_motion(
             self,
             dx: int|None=None,
@@ -278,17 +290,20 @@ class MouseController:
             dx: velocity along the x-axis in pixels per second
             dy: velocity along the y-axis in pixels per second
         """
-        if self._motion_type == MotionType.Fixed:
-            if dx is not None:
-                self._delta_generator.set_dx(dx)
-            if dy is not None:
-                self._delta_generator.set_dy(dy)
-        else:
-            self._motion_type = MotionType.Fixed
-            self._delta_generator = FixedMouseMotion(
-                dx if dx is not None else 0,
-                dy if dy is not None else 0
-            )
+        with self._condition:
+            was_moving = self._delta_generator.is_moving
+            if self._motion_type == MotionType.Fixed:
+                if dx is not None:
+                    self._delta_generator.set_dx(dx)
+                if dy is not None:
+                    self._delta_generator.set_dy(dy)
+            else:
+                self._motion_type = MotionType.Fixed
+                self._delta_generator = FixedMouseMotion(
+                    dx if dx is not None else 0,
+                    dy if dy is not None else 0
+                )
+            self._wake_if_started_moving(was_moving)
 
     def set_accelerated_motion(
             self,
@@ -305,38 +320,90 @@ class MouseController:
             max_speed: maximum speed in pixels per second
             time_to_max_speed: time to reach max_speed
         """
-        if self._motion_type == MotionType.Accelerated:
-            self._delta_generator.set_direction(direction)
-        else:
-            self._delta_generator = AcceleratedMouseMotion(
-                direction,
-                min_speed,
-                max_speed,
-                time_to_max_speed
-            )
-            self._motion_type = MotionType.Accelerated
+        with self._condition:
+            was_moving = self._delta_generator.is_moving
+            if self._motion_type == MotionType.Accelerated:
+                self._delta_generator.set_direction(direction)
+            else:
+                self._delta_generator = AcceleratedMouseMotion(
+                    direction,
+                    min_speed,
+                    max_speed,
+                    time_to_max_speed
+                )
+                self._motion_type = MotionType.Accelerated
+            self._wake_if_started_moving(was_moving)
 
     def start(self) -> None:
         """Starts the thread that will send motions when required."""
-        if not self._is_running:
-            self._thread = threading.Thread(target=self._control_loop)
-            self._thread.start()
+        with self._condition:
+            if self._is_running:
+                return
+            self._is_running = True
+        self._thread = threading.Thread(target=self._control_loop)
+        self._thread.start()
 
     def stop(self) -> None:
         """Stops the thread that sends motion events."""
-        if self._thread.is_alive():
+        with self._condition:
             self._is_running = False
+            self._condition.notify()
+        if self._thread.is_alive():
             self._thread.join()
 
+    def _wake_if_started_moving(self, was_moving: bool) -> None:
+        """Wakes the idle control loop if motion has just been requested.
+
+        Has to be called while holding the condition lock.
+
+        Args:
+            was_moving: whether motion was requested before the change
+        """
+        if not was_moving and self._delta_generator.is_moving:
+            self._condition.notify()
+
     def _control_loop(self) -> None:
         """Loop responsible for creating and sending mouse motion events."""
-        self._is_running = True
-
-        while self._is_running:
-            dx, dy = self._delta_generator()
-            if dx != 0 or dy != 0:
-                mouse_relative_motion(int(dx), int(dy))
-            time.sleep(0.01)
+        last_time = None
+        next_tick = 0.0
+        while True:
+            with self._condition:
+                # Sleep until motion is requested, discarding any leftover
+                # fractional motion
+                while self._is_running and \
+                        not self._delta_generator.is_moving:
+                    self._remainder = [0.0, 0.0]
+                    last_time = None
+                    self._condition.wait()
+                if not self._is_running:
+                    return
+
+                interval = 1.0 / self._tick_rate
+                now = time.perf_counter()
+                if last_time is None:
+                    last_time = now - interval
+                    next_tick = now
+                dx, dy = self._delta_generator(now - last_time)
+                last_time = now
+
+                # Only send whole pixels and carry over the remainder
+                self._remainder[0] += dx
+                self._remainder[1] += dy
+                motion_x = int(self._remainder[0])
+                motion_y = int(self._remainder[1])
+                self._remainder[0] -= motion_x
+                self._remainder[1] -= motion_y
+
+            if motion_x != 0 or motion_y != 0:
+                mouse_relative_motion(motion_x, motion_y)
+
+            with self._condition:
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    self._condition.wait(delay)
+                else:
+                    next_tick = time.perf_counter()
 
 
 class _MOUSEINPUT(ctypes.Structure):
@@ -398,6 +465,132 @@ class _INPUT(ctypes.Structure):
     )
 
 
+class InputBatch:
+
+    """Collects inputs in order to submit them with a single SendInput call.
+
+    Inputs are copied into a preallocated array which is handed to the
+    output sink when the batch is flushed.
+    """
+
+    def __init__(self, capacity: int=32):
+        """Creates a new instance.
+
+        Args:
+            capacity: number of inputs that can be held before the batch
+                has to be flushed
+        """
+        self._inputs = (_INPUT * capacity)()
+        self._capacity = capacity
+        self._count = 0
+        self.depth = 0
+
+    def __len__(self) -> int:
+        """Returns the number of inputs waiting to be submitted.
+
+        Returns:
+            Number of inputs held by the batch
+        """
+        return self._count
+
+    def add(self, *inputs: _INPUT) -> None:
+        """Adds inputs to the batch.
+
+        Args:
+            inputs: the inputs to add
+        """
+        for entry in inputs:
+            if self._count == self._capacity:
+                self.flush()
+            self._inputs[self._count] = entry
+            self._count += 1
+
+    def flush(self) -> None:
+        """Submits all inputs held by the batch."""
+        if self._count > 0:
+            count = self._count
+            self._count = 0
+            _output_sink(self._inputs, count)
+
+
+def _win32_send_input(inputs: ctypes.Array, count: int) -> int:
+    """Submits inputs to the system via SendInput.
+
+    Args:
+        inputs: array of INPUT structures
+        count: number of valid entries at the start of the array
+
+    Returns:
+        Number of inputs successfully inserted into the input stream
+    """
+    return ctypes.windll.user32.SendInput(
+        count,
+        inputs,
+        ctypes.c_int(ctypes.sizeof(_INPUT))
+    )
+
+
+# Function receiving the inputs to submit and the per thread input batches
+_output_sink = _win32_send_input
+_thread_data = threading.local()
+
+
+def set_output_sink(
+        sink: Optional[Callable[[ctypes.Array, int], int]]
+) -> None:
+    """Replaces the function used to submit inputs.
+
+    The sink receives the INPUT array and the number of valid entries. This
+    allows the output to be recorded instead of being sent to the system.
+
+    Args:
+        sink: the function receiving inputs, None restores SendInput
+    """
+    global _output_sink
+    _output_sink = _win32_send_input if sink is None else sink
+
+
+def _thread_batch() -> InputBatch:
+    """Returns the input batch belonging to the calling thread.
+
+    Returns:
+        Input batch of the calling thread
+    """
+    batch = getattr(_thread_data, "batch", None)
+    if batch is None:
+        batch = InputBatch()
+        _thread_data.batch = batch
+    return batch
+
+
+@contextlib.contextmanager
+def batched_output() -> Iterator[InputBatch]:
+    """Submits all keyboard and mouse inputs sent within the context at once.
+
+    Nested contexts are merged into the outermost one which submits the
+    inputs when it is exited.
+
+    Returns:
+        The batch collecting the inputs of the calling thread
+    """
+    batch = _thread_batch()
+    batch.depth += 1
+    try:
+        yield batch
+    finally:
+        batch.depth -= 1
+        if batch.depth == 0:
+            batch.flush()
+
+
+def key_down(virtual_code: int, scan_code: int, is_extended: bool):
+    _send_input(_keyboard_input(virtual_code, scan_code, is_extended, False))
+
+
+def key_up(virtual_code: int, scan_code: int, is_extended: bool):
+    _send_input(_keyboard_input(virtual_code, scan_code, is_extended, True))
+
+
 def mouse_relative_motion(dx: int, dy: int):
     _send_input(
         _mouse_input(MOUSEEVENTF_MOVE, dx, dy)
@@ -434,6 +627,21 @@ def mouse_wheel(motion: int):
     _send_input(_mouse_input(MOUSEEVENTF_WHEEL, data=-motion*WHEEL_DELTA))
 
 
+def _keyboard_input(
+        virtual_code: int,
+        scan_code: int,
+        is_extended: bool,
+        is_release: bool
+):
+    flags = KEYEVENTF_EXTENDEDKEY if is_extended else 0
+    if is_release:
+        flags |= KEYEVENTF_KEYUP
+    return _INPUT(
+        INPUT_KEYBOARD,
+        _INPUTunion(ki=_KEYBDINPUT(virtual_code, scan_code, flags, 0, None))
+    )
+
+
 def _mouse_input(flags, dx: int=0, dy: int=0, data: int=0):
     return _INPUT(
         INPUT_MOUSE,
@@ -442,9 +650,9 @@ def _mouse_input(flags, dx: int=0, dy: int=0, data: int=0):
 
 
 def _send_input(*inputs):
-    nInputs = len(inputs)
-    LPINPUT = _INPUT * nInputs
-    pInputs = LPINPUT(*inputs)
-    cbSize = ctypes.c_int(ctypes.sizeof(_INPUT))
-
-    return ctypes.windll.user32.SendInput(nInputs, pInputs, cbSize)
+    # Inputs sent within a batched_output context are submitted when the
+    # context exits, otherwise they are submitted immediately
+    batch = _thread_batch()
+    batch.add(*inputs)
+    if batch.depth == 0:
+        batch.flush()
@@ -16,7 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-import threading
+from gremlin import scheduler
 
 
 """Stores global state that needs to be shared between various
@@ -63,8 +63,7 @@ def delayed_input_highlighting_suspension():
     if _suspend_timer is not None:
         _suspend_timer.cancel()
 
-    _suspend_timer = threading.Timer(
+    _suspend_timer = scheduler.schedule(
             2,
             lambda: set_suspend_input_highlighting(False)
     )
-    _suspend_timer.start()
@@ -202,3 +202,41 @@ class CubicBezierSpline:
         high = self._lookup[index][interval[1]][1]
 
         return low.y + (x - low.x) * ((high.y - low.y) / (high.x - low.x))
+
+
+class LookupTable:
+
+    """Dense lookup table approximation of a function over [-1, 1].
+
+    The function is sampled once at evenly spaced positions, evaluating the
+    table afterwards only requires a single index computation and a linear
+    interpolation between the two neighbouring samples.
+    """
+
+    def __init__(self, fn, resolution):
+        """Creates a new LookupTable object.
+
+        :param fn the function to approximate
+        :param resolution number of intervals the [-1, 1] range is split into
+        """
+        self.resolution = max(2, int(resolution))
+        self._scale = self.resolution / 2.0
+        self._values = [
+            fn(-1.0 + i / self._scale) for i in range(self.resolution + 1)
+        ]
+
+    def __call__(self, x):
+        """Returns the interpolated function value at the desired position.
+
+        :param x the location at which to evaluate the function
+        :return function value at the provided position
+        """
+        position = (x + 1.0) * self._scale
+        if position <= 0.0:
+            return self._values[0]
+        index = int(position)
+        if index >= self.resolution:
+            return self._values[-1]
+
+        low = self._values[index]
+        return low + (position - index) * (self._values[index+1] - low)
@@ -419,6 +419,50 @@ _AxisMode_to_enum_lookup = {
 }
 
 
+class OutputPolicy(enum.Enum):
+
+    """Policies combining the values of several writers of one vJoy input."""
+
+    LastWriter = 1
+    Maximum = 2
+    Minimum = 3
+    SumClamped = 4
+    ModePriority = 5
+
+    @staticmethod
+    def to_string(value: OutputPolicy) -> str:
+        try:
+            return _OutputPolicy_to_string_lookup[value]
+        except KeyError:
+            raise gremlin.error.GremlinError(
+                "Invalid OutputPolicy in lookup"
+            )
+
+    @staticmethod
+    def to_enum(value: str) -> OutputPolicy:
+        try:
+            return _OutputPolicy_to_enum_lookup[value.lower()]
+        except KeyError:
+            raise gremlin.error.GremlinError(
+                "Invalid OutputPolicy in lookup"
+            )
+
+_OutputPolicy_to_string_lookup = {
+    OutputPolicy.LastWriter: "last-writer",
+    OutputPolicy.Maximum: "maximum",
+    OutputPolicy.Minimum: "minimum",
+    OutputPolicy.SumClamped: "sum-clamped",
+    OutputPolicy.ModePriority: "mode-priority"
+}
+_OutputPolicy_to_enum_lookup = {
+    "last-writer": OutputPolicy.LastWriter,
+    "maximum": OutputPolicy.Maximum,
+    "minimum": OutputPolicy.Minimum,
+    "sum-clamped": OutputPolicy.SumClamped,
+    "mode-priority": OutputPolicy.ModePriority
+}
+
+
 class HatDirection(enum.Enum):
 
     """Represents the possible directions a hat can take on."""
@@ -603,6 +647,18 @@ class ActionProperty(enum.Enum):
     ActivateDisabled = 6
 
 
+class OverrunPolicy(enum.Enum):
+
+    """Handling of periodic callbacks that miss their deadline.
+
+    Skip drops the missed executions and continues with the next deadline in
+    the future while CatchUp runs all missed executions back to back.
+    """
+
+    Skip = 1
+    CatchUp = 2
+
+
 class ActionActivationMode(enum.Enum):
 
     """Possible activation modes of button-like inputs."""
@@ -25,7 +25,7 @@ from PySide6 import QtCore
 from PySide6.QtCore import Property, Signal, Slot
 
 from gremlin import code_runner, common, config, error, event_handler, \
-    mode_manager, profile, shared_state, types
+    mode_manager, profile, profile_cache, shared_state, types
 from gremlin.intermediate_output import IntermediateOutput
 from gremlin.signal import signal
 
@@ -57,6 +57,15 @@ class Backend(QtCore.QObject):
         self._ui_mode = self.profile.modes.first_mode
         self.runner = code_runner.CodeRunner()
 
+        # Apply edits to the running profile once they settle
+        self._reload_timer = QtCore.QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(250)
+        self._reload_timer.timeout.connect(self.applyProfileChanges)
+        signal.reloadUi.connect(self._schedule_profile_reload)
+        signal.reloadCurrentInputItem.connect(self._schedule_profile_reload)
+        signal.inputItemChanged.connect(self._schedule_profile_reload)
+
         # Hookup various mode change related callbacks
         mode_manager.ModeManager().mode_changed.connect(self._emit_change)
         self.profileChanged.connect(mode_manager.ModeManager().reset)
@@ -124,6 +133,17 @@ class Backend(QtCore.QObject):
             # self.ui.tray_icon.setIcon(QtGui.QIcon("gfx/icon.ico"))
         self.activityChanged.emit()
 
+    @Slot()
+    def applyProfileChanges(self) -> None:
+        """Applies edits of the profile to the running profile."""
+        self._reload_timer.stop()
+        self.runner.reload()
+
+    def _schedule_profile_reload(self, *args) -> None:
+        """Schedules applying edits to the running profile."""
+        if self.runner.is_running():
+            self._reload_timer.start()
+
     @Slot(InputIdentifier, result=int)
     def getActionCount(self, identifier: InputIdentifier) -> int:
         """Returns the number of actions associated with an input.
@@ -237,6 +257,7 @@ class Backend(QtCore.QObject):
         self.profile.fpath = fpath
         self.profile.to_xml(self.profile.fpath)
         self.windowTitleChanged.emit()
+        self.applyProfileChanges()
 
     @Slot(result=str)
     def profilePath(self) -> str:
@@ -322,8 +343,7 @@ class Backend(QtCore.QObject):
             # self.profile = profile.Profile()
             # self.profile.from_xml(fpath)
             IntermediateOutput().reset()
-            new_profile = profile.Profile()
-            profile_was_converted = new_profile.from_xml(fpath)
+            new_profile = profile_cache.load_profile(fpath)
 
             profile_folder = os.path.dirname(fpath)
             if profile_folder not in sys.path:
@@ -336,12 +356,6 @@ class Backend(QtCore.QObject):
             # self._update_window_title()
             shared_state.current_profile = self.profile
             self.windowTitleChanged.emit()
-
-            # Save the profile at this point if it was converted from a prior
-            # profile version, as otherwise the change detection logic will
-            # trip over insignificant input item additions.
-            if profile_was_converted:
-                self.profile.to_xml(fpath)
         except (KeyError, TypeError) as e:
             # An error occurred while parsing an existing profile,
             # creating an empty profile instead
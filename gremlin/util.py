@@ -22,6 +22,7 @@ import math
 import os
 import re
 import sys
+import tempfile
 import threading
 import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
@@ -641,6 +642,99 @@ def create_action_ids(name: str, action_ids: List[uuid.UUID]) -> ElementTree.Ele
     return node
 
 
+def write_xml(
+        node: ElementTree.Element,
+        fpath: str,
+        indent: str="    "
+) -> None:
+    """Writes an XML tree to a file as indented text.
+
+    The document is streamed directly to the file, producing the same output
+    as pretty printing it with minidom. The file is written to a temporary
+    location first which then replaces the target file.
+
+    Args:
+        node: root node of the XML tree to write
+        fpath: path of the file to write
+        indent: string used to indent each level of the tree
+    """
+    directory = os.path.dirname(os.path.abspath(fpath))
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(
+                fd,
+                "w",
+                encoding="utf-8-sig",
+                newline="",
+                buffering=1 << 16
+        ) as out:
+            out.write("<?xml version=\"1.0\" ?>\n")
+            _write_xml_element(out, node, indent, 0)
+        os.replace(tmp_path, fpath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_xml_element(
+        out: Any,
+        node: ElementTree.Element,
+        indent: str,
+        level: int
+) -> None:
+    """Writes a single XML node and its children.
+
+    Args:
+        out: file handle to write to
+        node: the XML node to write
+        indent: string used to indent each level of the tree
+        level: depth of the node within the tree
+    """
+    prefix = indent * level
+    out.write(f"{prefix}<{node.tag}")
+    for key, value in node.items():
+        out.write(f" {key}=\"{_escape_xml(value)}\"")
+
+    children = list(node)
+    text = node.text
+    if len(children) == 0:
+        if text:
+            out.write(f">{_escape_xml(text)}</{node.tag}>\n")
+        else:
+            out.write("/>\n")
+        return
+
+    out.write(">\n")
+    if text:
+        out.write(f"{prefix}{indent}{_escape_xml(text)}\n")
+    for child in children:
+        _write_xml_element(out, child, indent, level + 1)
+        if child.tail:
+            out.write(f"{prefix}{indent}{_escape_xml(child.tail)}\n")
+    out.write(f"{prefix}</{node.tag}>\n")
+
+
+def _escape_xml(text: str) -> str:
+    """Escapes the characters minidom escapes in text and attributes.
+
+    Args:
+        text: the text to escape
+
+    Returns:
+        Text safe to use as XML character data or attribute value
+    """
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
 def determine_value_type(
         value: Any,
         property_type: PropertyType | List[PropertyType]
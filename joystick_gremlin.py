@@ -111,6 +111,9 @@ def shutdown_cleanup() -> None:
     # Relinquish control over all VJoy devices used
     gremlin.joystick_handling.VJoyProxy.reset()
 
+    # Write configuration changes which have not been saved yet
+    gremlin.config.Configuration().flush()
+
 
 def register_config_options() -> None:
     cfg = gremlin.config.Configuration()
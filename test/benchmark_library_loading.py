@@ -0,0 +1,97 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""Reports the time needed to load generated libraries of various shapes.
+
+Run from the repository root with: python test/benchmark_library_loading.py
+"""
+
+import sys
+sys.path.append(".")
+
+import argparse
+import time
+import uuid
+from xml.etree import ElementTree
+
+import gremlin.plugin_manager
+from gremlin.profile import Library
+
+
+def description_action(action_id):
+    return (
+        f'<action id="{action_id}" type="description">'
+        f'<property type="string"><name>description</name>'
+        f'<value>{action_id}</value></property>'
+        f'<property type="string"><name>action-label</name><value></value>'
+        f'</property></action>'
+    )
+
+
+def root_action(action_id, children):
+    ids = "".join(f"<action-id>{child}</action-id>" for child in children)
+    return (
+        f'<action id="{action_id}" type="root"><actions>{ids}</actions>'
+        f'<property type="string"><name>action-label</name><value></value>'
+        f'</property></action>'
+    )
+
+
+def generate(count, shape):
+    """Returns library XML with parents listed before their children.
+
+    Args:
+        count: number of actions in the library
+        shape: "flat" for root actions with ten children each, "chain" for
+            a single chain of nested root actions
+    """
+    ids = [uuid.uuid4() for _ in range(count)]
+    actions = []
+    if shape == "chain":
+        for i in range(count - 1):
+            actions.append(root_action(ids[i], [ids[i+1]]))
+        actions.append(description_action(ids[-1]))
+    else:
+        for i in range(0, count, 11):
+            children = ids[i+1:i+11]
+            actions.append(root_action(ids[i], children))
+            actions.extend(description_action(child) for child in children)
+    return ElementTree.fromstring(
+        f"<profile><library>{''.join(actions)}</library></profile>"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    gremlin.plugin_manager.PluginManager()
+    for shape in ["flat", "chain"]:
+        for count in [1000, 10000, 50000]:
+            node = generate(count, shape)
+            timings = []
+            for _ in range(args.repeat):
+                library = Library()
+                start = time.perf_counter()
+                library.from_xml(node)
+                timings.append(time.perf_counter() - start)
+            print(
+                f"{shape:>6} {count:6d} actions: "
+                f"best {min(timings) * 1000.0:9.1f} ms "
+                f"mean {sum(timings) / len(timings) * 1000.0:9.1f} ms"
+            )
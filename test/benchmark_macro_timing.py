@@ -0,0 +1,99 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""Reports the step timing error of macros for different spin budgets.
+
+Run from the repository root with: python test/benchmark_macro_timing.py
+"""
+
+import sys
+sys.path.append(".")
+
+import argparse
+import statistics
+import time
+
+import gremlin.macro as macro
+
+
+class NoOpAction(macro.AbstractAction):
+
+    @classmethod
+    def create(cls):
+        return NoOpAction()
+
+    def __call__(self):
+        pass
+
+    def to_xml(self):
+        pass
+
+    def from_xml(self, node):
+        pass
+
+
+def run(spin_budget: float, macro_count: int, steps: int, interval: float):
+    manager = macro.MacroManager.klass()
+    manager.start()
+    manager.spin_budget = spin_budget
+
+    macros = []
+    for _ in range(macro_count):
+        m = macro.Macro()
+        for _ in range(steps):
+            m.add_action(NoOpAction())
+            m.pause(interval)
+        macros.append(m)
+    for m in macros:
+        manager.queue_macro(m)
+
+    while any(m.id in manager._active for m in macros) or \
+            len(manager._queue) > 0:
+        time.sleep(0.05)
+    manager.stop()
+    return manager.timing_errors()
+
+
+def report(label: str, errors):
+    errors = sorted(e * 1000.0 for e in errors)
+    quantiles = statistics.quantiles(errors, n=100)
+    print(
+        f"{label:>18}: n={len(errors):5d} "
+        f"mean={statistics.mean(errors):7.3f} ms "
+        f"p50={quantiles[49]:7.3f} ms "
+        f"p90={quantiles[89]:7.3f} ms "
+        f"p99={quantiles[98]:7.3f} ms "
+        f"max={errors[-1]:7.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--macros", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    print(
+        f"{args.macros} concurrent macros, {args.steps} steps each, "
+        f"{args.interval * 1000.0:.1f} ms between steps"
+    )
+    for budget in [0.0, 0.001, 0.002, 0.005]:
+        report(
+            f"spin {budget * 1000.0:.0f} ms",
+            run(budget, args.macros, args.steps, args.interval)
+        )
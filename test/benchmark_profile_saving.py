@@ -0,0 +1,158 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""Compares peak memory and time of saving large generated profiles.
+
+The streaming writer used by Profile.to_xml is compared against pretty
+printing the document via minidom.
+
+Run from the repository root with: python test/benchmark_profile_saving.py
+"""
+
+import sys
+sys.path.append(".")
+
+import argparse
+import codecs
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from xml.dom import minidom
+from xml.etree import ElementTree
+
+import gremlin.plugin_manager
+from gremlin.profile import Profile
+
+
+def description_action(action_id):
+    return (
+        f'<action id="{action_id}" type="description">'
+        f'<property type="string"><name>description</name>'
+        f'<value>Action {action_id}</value></property>'
+        f'<property type="string"><name>action-label</name><value></value>'
+        f'</property><property type="activation-mode">'
+        f'<name>activation-mode</name><value>deactivated</value></property>'
+        f'</action>'
+    )
+
+
+def root_action(action_id, children):
+    ids = "".join(f"<action-id>{child}</action-id>" for child in children)
+    return (
+        f'<action id="{action_id}" type="root"><actions>{ids}</actions>'
+        f'<property type="string"><name>action-label</name><value></value>'
+        f'</property><property type="activation-mode">'
+        f'<name>activation-mode</name><value>deactivated</value></property>'
+        f'</action>'
+    )
+
+
+def generate(fpath, count):
+    """Writes a profile with the given number of bound inputs.
+
+    Every input is bound to a root action holding three description actions.
+
+    Args:
+        fpath: path of the file to write
+        count: number of inputs in the profile
+    """
+    device_guid = uuid.uuid4()
+    inputs = []
+    actions = []
+    for i in range(count):
+        root_id = uuid.uuid4()
+        children = [uuid.uuid4() for _ in range(3)]
+        inputs.append(
+            f"<input><device-id>{device_guid}</device-id>"
+            f"<input-type>button</input-type><input-id>{i + 1}</input-id>"
+            f"<mode>Default</mode><action-configuration>"
+            f"<root-action>{root_id}</root-action>"
+            f"<behavior>button</behavior></action-configuration></input>"
+        )
+        actions.append(root_action(root_id, children))
+        actions.extend(description_action(child) for child in children)
+    with open(fpath, "w", encoding="utf-8") as out:
+        out.write(
+            f'<profile version="{Profile.current_version}">'
+            f'<inputs>{"".join(inputs)}</inputs>'
+            f'<library>{"".join(actions)}</library>'
+            f'<modes><mode>Default</mode></modes></profile>'
+        )
+
+
+def save_minidom(profile, fpath):
+    ugly_xml = ElementTree.tostring(profile._build_xml(), encoding="utf-8")
+    dom_xml = minidom.parseString(ugly_xml)
+    with codecs.open(fpath, "w", "utf-8-sig") as out:
+        out.write(dom_xml.toprettyxml(indent="    "))
+
+
+def save_streaming(profile, fpath):
+    profile.to_xml(fpath)
+
+
+def measure(function, profile, fpath, repeat):
+    """Returns the best time and the peak memory of a save function.
+
+    Args:
+        function: the save function to measure
+        profile: the profile to save
+        fpath: path of the file to write
+        repeat: number of timed runs
+
+    Returns:
+        Tuple of the best time in seconds and the peak memory in bytes
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(profile, fpath)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(profile, fpath)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    gremlin.plugin_manager.PluginManager()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.xml")
+        target = os.path.join(directory, "target.xml")
+        for count in [1000, 10000, 50000]:
+            generate(source, count)
+            profile = Profile()
+            profile.from_xml(source)
+            for name, function in [
+                ("minidom", save_minidom),
+                ("streaming", save_streaming)
+            ]:
+                duration, peak = measure(function, profile, target, args.repeat)
+                print(
+                    f"{name:>9} {count:6d} inputs: "
+                    f"best {duration * 1000.0:9.1f} ms "
+                    f"peak {peak / 2**20:8.1f} MiB "
+                    f"size {os.path.getsize(target) / 2**20:6.1f} MiB"
+                )
@@ -5,6 +5,7 @@ import pytest
 
 import dill
 
+import gremlin.clock
 import gremlin.event_handler
 import gremlin.joystick_handling
 
@@ -19,4 +20,11 @@ def joystick_init():
 def terminate_event_listener(request):
     request.addfinalizer(
         lambda: gremlin.event_handler.EventListener().terminate()
-    )
\ No newline at end of file
+    )
+
+@pytest.fixture
+def clock():
+    instance = gremlin.clock.VirtualClock()
+    gremlin.clock.set_clock(instance)
+    yield instance
+    gremlin.clock.set_clock(None)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import pytest
+
+import gremlin.clock
+import gremlin.macro as macro
+from gremlin.input_devices import PeriodicRegistry
+from gremlin.scheduler import Scheduler
+
+
+class RecordAction(macro.AbstractAction):
+
+    def __init__(self, log, clock):
+        self.log = log
+        self.clock = clock
+
+    @classmethod
+    def create(cls):
+        return RecordAction([], None)
+
+    def __call__(self):
+        self.log.append(self.clock.now())
+
+    def to_xml(self):
+        pass
+
+    def from_xml(self, node):
+        pass
+
+
+def test_system_clock():
+    gremlin.clock.set_clock(None)
+    clock = gremlin.clock.get_clock()
+    assert not clock.is_virtual
+    start = clock.now()
+    clock.sleep(0.01)
+    assert clock.now() - start >= 0.01
+
+
+def test_scheduler(clock):
+    scheduler = Scheduler()
+    calls = []
+    handle = scheduler.schedule(
+        3600.0,
+        lambda: calls.append(("late", clock.now()))
+    )
+    scheduler.schedule(1.5, lambda: calls.append(("early", clock.now())))
+    scheduler.schedule(60.0, lambda: handle.cancel())
+
+    clock.advance(1.0)
+    assert calls == []
+    clock.advance(7200.0)
+    assert calls == [("early", 1.5)]
+    assert not handle.is_pending
+    assert clock.now() == 7201.0
+
+
+def test_periodic_registry(clock):
+    registry = PeriodicRegistry()
+    timestamps = []
+    registry.add(lambda: timestamps.append(clock.now()), 0.02)
+    registry.start()
+
+    # Ten simulated minutes execute without any real waiting
+    clock.advance(600.0)
+    registry.stop()
+    clock.advance(1.0)
+
+    assert len(timestamps) == 30000
+    assert timestamps[-1] == pytest.approx(600.0)
+    stats = list(registry.statistics().values())[0]
+    assert stats.count == 30000
+    assert stats.overruns == 0
+
+
+def test_macro(clock):
+    manager = macro.MacroManager.klass()
+    manager.start()
+
+    log = []
+    m = macro.Macro()
+    m.add_action(RecordAction(log, clock))
+    m.pause(30.0)
+    m.add_action(RecordAction(log, clock))
+    m.repeat = macro.CountRepeat(2, 10.0)
+    manager.queue_macro(m)
+
+    clock.advance(0.0)
+    assert log == [0.0]
+    clock.advance(100.0)
+    assert log == pytest.approx([0.0, 30.0, 40.0, 70.0])
+    assert max(manager.timing_errors()) == 0.0
+    assert m.id not in manager._active
+
+    manager.stop()
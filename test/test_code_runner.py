@@ -0,0 +1,121 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import uuid
+
+import gremlin.plugin_manager
+from gremlin.code_runner import CodeRunner
+from gremlin.event_handler import Event, EventHandler
+from gremlin.profile import InputItemBinding, Profile
+from gremlin.types import InputType
+
+from action_plugins.description import DescriptionData
+from action_plugins.root import RootData
+
+
+def bind(profile, guid, input_id, mode, description):
+    item = profile.get_input_item(
+        guid, InputType.JoystickButton, input_id, mode, create_if_missing=True
+    )
+    root = RootData(InputType.JoystickButton)
+    action = DescriptionData()
+    action.description = description
+    root.insert_action(action, "children")
+    profile.library.add_action(action)
+    profile.library.add_action(root)
+
+    binding = InputItemBinding(item)
+    binding.root_action = root
+    binding.behavior = InputType.JoystickButton
+    item.action_sequences.append(binding)
+    return binding
+
+
+def test_reload():
+    gremlin.plugin_manager.PluginManager()
+
+    guid = uuid.uuid4()
+    profile = Profile()
+    profile.modes.add_mode("Child")
+    profile.modes.set_parent("Child", "Default")
+    profile.modes.add_mode("Other")
+    changed = bind(profile, guid, 1, "Default", "changed")
+    deleted = bind(profile, guid, 2, "Default", "deleted")
+    renamed = bind(profile, guid, 4, "Other", "renamed")
+
+    runner = CodeRunner()
+    runner.event_handler = EventHandler.klass()
+    runner._profile = profile
+    runner._setup_profile()
+    runner._running = True
+    callbacks = runner.event_handler.callbacks[guid]
+
+    def event(input_id, mode):
+        return Event(InputType.JoystickButton, input_id, guid, mode)
+
+    def installed(binding):
+        return runner._bindings[binding][3]
+
+    unchanged = installed(changed)
+    assert callbacks["Child"][event(1, "Child")] == [unchanged]
+    assert callbacks["Child"][event(2, "Child")] == [installed(deleted)]
+
+    # Reloading an unmodified profile keeps all callbacks
+    runner.reload()
+    assert installed(changed) is unchanged
+
+    changed.root_action.get_actions()[0][0].description = "modified"
+    added = bind(profile, guid, 3, "Default", "added")
+    deleted.input_item.action_sequences.remove(deleted)
+    profile.modes.rename_mode("Other", "Renamed")
+    profile.modes.set_parent("Renamed", "Default")
+    runner.reload()
+    callbacks = runner.event_handler.callbacks[guid]
+
+    # Changed bindings replace their callback in place, including in
+    # inheriting modes
+    assert installed(changed) is not unchanged
+    assert callbacks["Default"][event(1, "Default")] == [installed(changed)]
+    assert callbacks["Child"][event(1, "Child")] == [installed(changed)]
+
+    # Added bindings are inherited and deleted ones removed
+    assert callbacks["Child"][event(3, "Child")] == [installed(added)]
+    assert deleted not in runner._bindings
+    assert event(2, "Default") not in callbacks["Default"]
+    assert event(2, "Child") not in callbacks["Child"]
+
+    # Bindings of a renamed mode move to the new mode name, which inherits
+    # from its new parent
+    assert runner._bindings[renamed][1].mode == "Renamed"
+    assert callbacks["Renamed"][event(4, "Renamed")] == [installed(renamed)]
+    assert event(4, "Other") not in callbacks.get("Other", {})
+    assert callbacks["Renamed"][event(1, "Renamed")] == [installed(changed)]
+
+    # Changing only the parent of a mode updates the inherited callbacks
+    profile.modes.set_parent("Child", "Renamed")
+    runner.reload()
+    assert callbacks["Child"][event(4, "Child")] == [installed(renamed)]
+
+    # Deleting a mode removes its bindings and reconnects its children
+    profile.modes.delete_mode("Renamed")
+    runner.reload()
+    assert renamed not in runner._bindings
+    assert event(4, "Child") not in callbacks["Child"]
+    assert callbacks["Child"][event(1, "Child")] == [installed(changed)]
@@ -124,4 +124,50 @@ def test_exceptions():
         c.set("test", "some", "other", "test")
 
     with pytest.raises(gremlin.error.GremlinError):
-        c.value("does", "not", "exist")
\ No newline at end of file
+        c.value("does", "not", "exist")
+def test_write_behind(modify_config):
+    c = gremlin.config.Configuration()
+    c.register("test", "case", "1", PropertyType.Int, 42, "", {"min": 1, "max": 20})
+    c.flush()
+    mtime = os.stat(gremlin.config._config_file_path).st_mtime_ns
+
+    # Changes are not written synchronously
+    c.set("test", "case", "1", 37)
+    assert os.stat(gremlin.config._config_file_path).st_mtime_ns == mtime
+
+    c.flush()
+    c.load()
+    assert c.value("test", "case", "1") == 37
+    assert [f for f in os.listdir(os.path.dirname(gremlin.config._config_file_path))
+            if f.startswith("configuration.") and f.endswith(".tmp")] == []
+
+def test_accessor(modify_config):
+    c = gremlin.config.Configuration()
+    c.register("test", "case", "1", PropertyType.Int, 42, "", {"min": 1, "max": 20})
+    c.register("test", "case", "2", PropertyType.String, "a", "", {})
+
+    first = c.accessor("test", "case", "1")
+    second = c.accessor("test", "case", "2")
+    assert first is c.accessor("test", "case", "1")
+    assert first.value == 42
+
+    changes = []
+    first.subscribe(lambda value: changes.append(("1", value)))
+    second.subscribe(lambda value: changes.append(("2", value)))
+    c.set("test", "case", "1", 37)
+    c.set("test", "case", "1", 37)
+    assert first.value == 37
+    assert changes == [("1", 37)]
+
+    # Only parameters whose value changed in the file notify subscribers
+    c.set("test", "case", "2", "b")
+    c.flush()
+    c.set("test", "case", "2", "c")
+    changes.clear()
+    c._file_state = None
+    c.load()
+    assert second.value == "b"
+    assert changes == [("2", "b")]
+
+    with pytest.raises(gremlin.error.GremlinError):
+        c.accessor("does", "not", "exist")
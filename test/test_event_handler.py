@@ -0,0 +1,107 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import threading
+import uuid
+
+from PySide6 import QtCore
+
+from gremlin import util
+from gremlin.error import VJoyError
+from gremlin.event_handler import Event, EventHandler
+from gremlin.profile import Profile
+from gremlin.types import InputType
+
+
+def test_callback_table_updates():
+    modes = Profile().modes
+    modes.add_mode("Child")
+    modes.set_parent("Child", "Default")
+
+    guid = uuid.uuid4()
+    event = Event(InputType.JoystickButton, 1, guid, "Default")
+    handler = EventHandler.klass()
+    first = handler.add_callback(guid, "Default", event, lambda evt: 1)
+    handler.build_event_lookup(modes)
+    assert handler.callbacks[guid]["Child"][event] == [first]
+
+    # Replacing a callback also replaces it in inheriting modes
+    second = handler.replace_callback(
+        guid, "Default", event, first, lambda evt: 2
+    )
+    assert handler.callbacks[guid]["Child"][event] == [second]
+
+    # A mode's own callback takes precedence over inherited ones
+    own = handler.add_callback(guid, "Child", event, lambda evt: 3)
+    assert handler.callbacks[guid]["Child"][event] == [own]
+    assert handler.callbacks[guid]["Default"][event] == [second]
+
+    handler.remove_callback(guid, "Child", event, own)
+    handler.rebuild_event_lookup(modes)
+    assert handler.callbacks[guid]["Child"][event] == [second]
+
+    handler.remove_callback(guid, "Default", event, second)
+    handler.rebuild_event_lookup(modes)
+    assert event not in handler.callbacks[guid]["Child"]
+    assert event not in handler.callbacks[guid]["Default"]
+
+
+def test_process_event_vjoy_error(monkeypatch):
+    monkeypatch.setattr(util, "display_error", lambda msg: None)
+
+    guid = uuid.uuid4()
+    event = Event(InputType.JoystickButton, 1, guid, "Default")
+    handler = EventHandler.klass()
+    handler.process_callbacks = True
+    calls = []
+
+    def failing(evt):
+        calls.append("failing")
+        raise VJoyError("Failed setting button value")
+
+    for callback in [failing, lambda evt: calls.append("second")]:
+        handler.add_callback(guid, "Default", event, callback)
+
+    # An error in one callback does not prevent the remaining ones from
+    # running but pauses the processing of further events
+    handler.process_event(event)
+    assert calls == ["failing", "second"]
+    assert not handler.process_callbacks
+
+
+def test_call_in_event_thread():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    handler = EventHandler.klass()
+    calls = []
+
+    # Calls from the event thread run immediately
+    handler.call_in_event_thread(lambda: calls.append(threading.get_ident()))
+    assert calls == [threading.get_ident()]
+
+    # Calls from other threads are queued for the event thread
+    thread = threading.Thread(
+        target=handler.call_in_event_thread,
+        args=(lambda: calls.append(threading.get_ident()),)
+    )
+    thread.start()
+    thread.join()
+    assert len(calls) == 1
+    app.processEvents()
+    assert calls == [threading.get_ident()] * 2
@@ -0,0 +1,80 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import pytest
+
+from gremlin.error import GremlinError
+from gremlin.fsm import CompiledFiniteStateMachine, Transition
+
+
+def create_transitions(log):
+    return {
+        ("up", "press"): Transition(lambda: log.append("p") or True, "down"),
+        ("up", "release"): Transition(lambda: False, "up"),
+        ("down", "release"): Transition(lambda: log.append("r") or True, "up"),
+        ("down", "press"): Transition(lambda: False, "down")
+    }
+
+
+def test_perform():
+    log = []
+    fsm = CompiledFiniteStateMachine(
+        "up",
+        ["up", "down"],
+        ["press", "release"],
+        create_transitions(log)
+    )
+    press = fsm.action_id("press")
+    release = fsm.action_id("release")
+
+    assert fsm.current_state == "up"
+    assert fsm.perform(press) is True
+    assert fsm.current_state == "down"
+    assert fsm.perform(press) is False
+    assert fsm.perform(release) is True
+    assert fsm.perform(release) is False
+    assert fsm.current_state == "up"
+    assert log == ["p", "r"]
+
+
+def test_validation():
+    transitions = create_transitions([])
+    with pytest.raises(GremlinError):
+        CompiledFiniteStateMachine(
+            "left", ["up", "down"], ["press", "release"], transitions
+        )
+
+    del transitions[("down", "press")]
+    with pytest.raises(GremlinError):
+        CompiledFiniteStateMachine(
+            "up", ["up", "down"], ["press", "release"], transitions
+        )
+
+    transitions[("down", "press")] = Transition(lambda: False, "left")
+    with pytest.raises(GremlinError):
+        CompiledFiniteStateMachine(
+            "up", ["up", "down"], ["press", "release"], transitions
+        )
+
+    fsm = CompiledFiniteStateMachine(
+        "up", ["up", "down"], ["press", "release"], create_transitions([])
+    )
+    with pytest.raises(GremlinError):
+        fsm.action_id("toggle")
@@ -0,0 +1,118 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import pytest
+
+from gremlin.error import GremlinError
+from gremlin.gesture import ChordRecognizer, GestureRecognizer, Hold, Tap
+
+
+def tap(recognizer, clock, count=1, duration=0.05, gap=0.1):
+    for i in range(count):
+        recognizer.process(True)
+        clock.advance(duration)
+        recognizer.process(False)
+        if i < count - 1:
+            clock.advance(gap)
+
+
+def test_multi_tap(clock):
+    log = []
+    recognizer = GestureRecognizer(
+        [Tap(1), Tap(2), Tap(3)],
+        lambda i, active: log.append((i, active, clock.now())),
+        tap_window=0.25
+    )
+
+    # A single tap is only reported once no further tap can follow
+    tap(recognizer, clock)
+    assert log == []
+    clock.advance(1.0)
+    assert log == [(0, True, pytest.approx(0.3))]
+
+    # The highest tap count is reported on release
+    log.clear()
+    tap(recognizer, clock, 3)
+    assert log == [(2, True, pytest.approx(1.4))]
+    assert recognizer.is_idle
+
+    # Taps spaced too far apart are reported individually
+    log.clear()
+    tap(recognizer, clock, 2, gap=0.5)
+    clock.advance(1.0)
+    assert [entry[0] for entry in log] == [0, 0]
+
+
+def test_hold(clock):
+    log = []
+    recognizer = GestureRecognizer(
+        [Tap(1), Hold(0.5, 0.2)],
+        lambda i, active: log.append((i, active, clock.now()))
+    )
+
+    recognizer.process(True)
+    clock.advance(1.0)
+    recognizer.process(False)
+    assert log == [
+        (1, True, 0.5),
+        (1, True, pytest.approx(0.7)),
+        (1, True, pytest.approx(0.9)),
+        (1, False, 1.0)
+    ]
+
+    # Events whose timestamp passed a timeout which did not run yet are
+    # processed in timestamp order
+    log.clear()
+    recognizer.process(True, 2.0)
+    recognizer.process(False, 2.6)
+    assert log == [(1, True, 1.0), (1, False, 1.0)]
+    assert recognizer.is_idle
+
+
+def test_invalid_gestures():
+    with pytest.raises(GremlinError):
+        GestureRecognizer([Tap(2), Tap(2)], lambda i, active: None)
+    with pytest.raises(GremlinError):
+        GestureRecognizer([Hold(0.5), Hold(1.0)], lambda i, active: None)
+    with pytest.raises(GremlinError):
+        Tap(0)
+
+
+def test_chord(clock):
+    log = []
+    chord = ChordRecognizer(3, 0.1, log.append)
+
+    chord.process(0, True)
+    clock.advance(0.05)
+    chord.process(2, True)
+    chord.process(1, True)
+    assert log == [True]
+    chord.process(2, False)
+    assert log == [True, False]
+    assert not chord.is_active
+
+    # Pressing the buttons too far apart does not form a chord
+    for i in [0, 1]:
+        chord.process(i, False)
+    chord.process(0, True)
+    clock.advance(0.2)
+    chord.process(1, True)
+    chord.process(2, True)
+    assert log == [True, False]
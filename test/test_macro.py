@@ -0,0 +1,197 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import threading
+import time
+
+import pytest
+
+import gremlin.macro as macro
+
+
+class RecordAction(macro.AbstractAction):
+
+    def __init__(self, log, name):
+        self.log = log
+        self.name = name
+
+    @classmethod
+    def create(cls):
+        return RecordAction([], "")
+
+    def __call__(self):
+        self.log.append((self.name, threading.get_ident()))
+
+    def to_xml(self):
+        pass
+
+    def from_xml(self, node):
+        pass
+
+
+def create_macro(log, name, pauses=1, pause=0.01):
+    m = macro.Macro()
+    m.add_action(RecordAction(log, name))
+    for _ in range(pauses):
+        m.pause(pause)
+        m.add_action(RecordAction(log, name))
+    return m
+
+
+def wait_for(predicate, timeout=2.0):
+    end = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < end:
+        time.sleep(0.005)
+    return predicate()
+
+
+@pytest.fixture
+def manager():
+    instance = macro.MacroManager.klass()
+    instance.start()
+    yield instance
+    instance.stop()
+
+
+@pytest.fixture
+def virtual_manager(clock):
+    instance = macro.MacroManager.klass()
+    instance.start()
+    yield instance
+    instance.stop()
+
+
+def test_concurrent_macros_share_thread(manager):
+    log = []
+    macros = [create_macro(log, i, pauses=3) for i in range(10)]
+    for m in macros:
+        manager.queue_macro(m)
+
+    assert wait_for(lambda: len(log) == 40)
+    assert len(set(ident for _, ident in log)) == 1
+    for i in range(10):
+        assert [name for name, _ in log].count(i) == 4
+    assert len(manager.timing_errors()) >= 40
+    assert wait_for(lambda: len(manager._active) == 0)
+
+
+def test_exclusive_macro(virtual_manager, clock):
+    log = []
+    regular = create_macro(log, "regular", pauses=2, pause=0.02)
+    exclusive = create_macro(log, "exclusive", pauses=2, pause=0.02)
+    exclusive.is_exclusive = True
+
+    virtual_manager.queue_macro(regular)
+    virtual_manager.queue_macro(exclusive)
+
+    clock.advance(0.03)
+    assert [name for name, _ in log] == ["regular"] * 2
+    clock.advance(1.0)
+    assert [name for name, _ in log] == ["regular"] * 3 + ["exclusive"] * 3
+
+
+def test_count_and_hold_repeat(virtual_manager, clock):
+    log = []
+    counted = create_macro(log, "count", pauses=0)
+    counted.repeat = macro.CountRepeat(3, 0.01)
+    virtual_manager.queue_macro(counted)
+    clock.advance(1.0)
+    assert len(log) == 3
+
+    held = create_macro(log, "hold", pauses=0)
+    held.repeat = macro.HoldRepeat(0.01)
+    virtual_manager.queue_macro(held)
+    clock.advance(0.035)
+    assert len(log) == 7
+    virtual_manager.terminate_macro(held)
+
+    # The pending repetition still runs before the macro terminates
+    clock.advance(1.0)
+    assert held.id not in virtual_manager._active
+    assert len(log) == 8
+
+
+def test_stop_aborts_running(manager):
+    log = []
+    m = create_macro(log, "long", pauses=1, pause=60.0)
+    manager.queue_macro(m)
+    assert wait_for(lambda: len(log) == 1)
+
+    # Stopping drops the remaining steps instead of waiting for them
+    start = time.perf_counter()
+    manager.stop()
+    assert time.perf_counter() - start < 1.0
+    assert len(log) == 1
+    assert len(manager._active) == 0
+
+
+def test_compile():
+    log = []
+    m = macro.Macro()
+    for name in ["a", "b"]:
+        m.add_action(RecordAction(log, name))
+    m.pause(0.5)
+    m.add_action(RecordAction(log, "c"))
+    m.pause(0.25)
+
+    compiled = m.compile(0.05)
+    assert [step.offset for step in compiled.steps] == \
+        pytest.approx([0.0, 0.05, 0.55])
+    assert [len(step.actions) for step in compiled.steps] == [1, 1, 1]
+    assert compiled.duration == pytest.approx(0.8)
+    assert len(m.sequence) == 5
+
+    # Compilation is cached until the macro changes
+    assert m.compile(0.05) is compiled
+    assert m.compile(0.0).steps[0].actions == tuple(m.sequence[:2])
+    m.add_action(RecordAction(log, "d"))
+    assert len(m.compile(0.0).steps) == 3
+
+
+def test_compile_chord():
+    m = macro.Macro()
+    m.chord(["leftcontrol", "leftshift", "f1"], True)
+    m.pause(0.1)
+    m.chord(["f1", "leftshift", "leftcontrol"], False)
+    m.press("a")
+
+    compiled = m.compile(0.05)
+    assert [step.offset for step in compiled.steps] == \
+        pytest.approx([0.0, 0.1, 0.15])
+    assert [len(step.actions) for step in compiled.steps] == [3, 3, 1]
+    assert [action.key.name for action in compiled.steps[0].actions] == \
+        ["Left Control", "Left Shift", "F1"]
+
+
+def test_terminate_drops_queued(virtual_manager, clock):
+    log = []
+    held = create_macro(log, "hold", pauses=0)
+    held.repeat = macro.HoldRepeat(0.01)
+
+    virtual_manager.queue_macro(held)
+    clock.advance(0.0)
+    assert held.id in virtual_manager._active
+    virtual_manager.queue_macro(held)
+    virtual_manager.queue_macro(held)
+    virtual_manager.terminate_macro(held)
+
+    clock.advance(0.05)
+    assert held.id not in virtual_manager._active
+    assert held.id not in virtual_manager._queue
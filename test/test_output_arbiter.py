@@ -0,0 +1,131 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import pytest
+
+import gremlin.output_arbiter as output_arbiter
+from gremlin.error import GremlinError
+from gremlin.types import InputType, OutputPolicy
+
+
+class FakeModeManager:
+
+    class Current:
+        name = "Default"
+
+    current = Current()
+
+
+@pytest.fixture
+def arbiter(monkeypatch):
+    monkeypatch.setattr(
+        output_arbiter.mode_manager,
+        "ModeManager",
+        lambda: FakeModeManager
+    )
+    FakeModeManager.current.name = "Default"
+
+    instance = output_arbiter.OutputArbiter.klass()
+    instance.applied = []
+    monkeypatch.setattr(
+        instance,
+        "_apply",
+        lambda key, value: instance.applied.append((key, value))
+    )
+    return instance
+
+
+def test_last_writer(arbiter):
+    arbiter.write(1, InputType.JoystickAxis, 1, 0.5, "a")
+    arbiter.write(1, InputType.JoystickAxis, 1, -0.25, "b")
+    assert arbiter.applied == [
+        ((1, InputType.JoystickAxis, 1), 0.5),
+        ((1, InputType.JoystickAxis, 1), -0.25)
+    ]
+
+
+def test_tick_flushes_once(arbiter):
+    with arbiter.tick():
+        for value in [0.1, 0.2, 0.3]:
+            arbiter.write(1, InputType.JoystickAxis, 1, value, "a")
+        with arbiter.tick():
+            arbiter.write(1, InputType.JoystickButton, 2, True, "a")
+        assert arbiter.applied == []
+    assert arbiter.applied == [
+        ((1, InputType.JoystickAxis, 1), 0.3),
+        ((1, InputType.JoystickButton, 2), True)
+    ]
+
+
+def test_combining_policies(arbiter):
+    arbiter.set_policy(1, InputType.JoystickAxis, 1, OutputPolicy.Maximum)
+    arbiter.set_policy(1, InputType.JoystickAxis, 2, OutputPolicy.Minimum)
+    arbiter.set_policy(1, InputType.JoystickAxis, 3, OutputPolicy.SumClamped)
+    arbiter.set_policy(1, InputType.JoystickButton, 1, OutputPolicy.Maximum)
+    assert arbiter.policy(1, InputType.JoystickAxis, 3) == \
+        OutputPolicy.SumClamped
+    assert arbiter.policy(1, InputType.JoystickAxis, 4) == \
+        OutputPolicy.LastWriter
+
+    with arbiter.tick():
+        for axis_id in [1, 2, 3]:
+            arbiter.write(1, InputType.JoystickAxis, axis_id, 0.75, "a")
+            arbiter.write(1, InputType.JoystickAxis, axis_id, 0.5, "b")
+        arbiter.write(1, InputType.JoystickButton, 1, True, "a")
+        arbiter.write(1, InputType.JoystickButton, 1, False, "b")
+    assert dict(arbiter.applied) == {
+        (1, InputType.JoystickAxis, 1): 0.75,
+        (1, InputType.JoystickAxis, 2): 0.5,
+        (1, InputType.JoystickAxis, 3): 1.0,
+        (1, InputType.JoystickButton, 1): True
+    }
+
+    # Releasing a writer removes its contribution
+    arbiter.applied.clear()
+    arbiter.release(1, InputType.JoystickButton, 1, "a")
+    assert arbiter.applied == [((1, InputType.JoystickButton, 1), False)]
+
+
+def test_mode_priority(arbiter):
+    with pytest.raises(GremlinError):
+        arbiter.set_policy(
+            1, InputType.JoystickHat, 1, OutputPolicy.ModePriority
+        )
+    arbiter.set_policy(
+        1,
+        InputType.JoystickHat,
+        1,
+        OutputPolicy.ModePriority,
+        {"Default": 1, "Override": 2}
+    )
+
+    FakeModeManager.current.name = "Override"
+    arbiter.write(1, InputType.JoystickHat, 1, (0, 1), "override")
+    FakeModeManager.current.name = "Default"
+    arbiter.write(1, InputType.JoystickHat, 1, (1, 0), "default")
+    assert arbiter.applied[-1] == ((1, InputType.JoystickHat, 1), (0, 1))
+
+    arbiter.release(1, InputType.JoystickHat, 1, "override")
+    assert arbiter.applied[-1] == ((1, InputType.JoystickHat, 1), (1, 0))
+
+
+def test_invalid_output(arbiter):
+    with pytest.raises(GremlinError):
+        arbiter.write(1, InputType.Keyboard, 1, True)
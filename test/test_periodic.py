@@ -0,0 +1,90 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import time
+
+import pytest
+
+from gremlin.input_devices import PeriodicRegistry
+from gremlin.types import OverrunPolicy
+
+
+def test_no_drift(clock):
+    registry = PeriodicRegistry()
+    timestamps = []
+
+    def callback():
+        timestamps.append(clock.now())
+        clock.advance(0.005)
+
+    registry.add(callback, 0.02)
+    registry.start()
+    clock.advance(0.51)
+    registry.stop()
+
+    # The execution time of the callback must not extend the period
+    assert timestamps == pytest.approx([0.02 * i for i in range(1, 26)])
+
+    stats = registry.statistics()[callback]
+    assert stats.count == len(timestamps)
+    assert stats.min_time == pytest.approx(0.005)
+    assert stats.overruns == 0
+
+
+def test_overrun_policies(clock):
+    registry = PeriodicRegistry()
+
+    def skip():
+        clock.advance(0.025)
+
+    def catch_up():
+        clock.advance(0.025)
+
+    registry.add(skip, 0.01, OverrunPolicy.Skip)
+    registry.add(catch_up, 0.01, OverrunPolicy.CatchUp)
+    registry.start()
+    clock.advance(0.3)
+    registry.stop()
+
+    stats = registry.statistics()
+    assert stats[skip].overruns > 0
+    assert stats[skip].skipped > 0
+    assert stats[catch_up].overruns > 0
+    assert stats[catch_up].skipped == 0
+
+
+def test_wakeup():
+    registry = PeriodicRegistry()
+    registry.add(lambda: None, 5.0)
+    registry.start()
+
+    # Adding a callback wakes the thread before the pending deadline
+    timestamps = []
+    fast = lambda: timestamps.append(time.perf_counter())
+    registry.add(fast, 0.01)
+    end = time.perf_counter() + 1.0
+    while len(timestamps) <= 5 and time.perf_counter() < end:
+        time.sleep(0.005)
+    assert len(timestamps) > 5
+
+    # Stopping does not wait for the pending deadline
+    start = time.perf_counter()
+    registry.stop()
+    assert time.perf_counter() - start < 0.1
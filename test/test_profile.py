@@ -21,12 +21,13 @@ sys.path.append(".")
 import os
 import pytest
 import uuid
+from xml.dom import minidom
 from xml.etree import ElementTree
 
 import gremlin.plugin_manager
 from gremlin.config import Configuration
-from gremlin.error import GremlinError
-from gremlin.types import AxisMode, InputType
+from gremlin.error import GremlinError, ProfileError
+from gremlin.types import AxisMode, InputType, OutputPolicy
 
 from gremlin.profile import Profile
 
@@ -108,4 +109,230 @@ def test_mode_hierarchy():
     assert p.modes.find_mode("Levels").parent.value == "Three"
 
     assert p.modes.find_mode("Default").parent.value == ""
-    assert p.modes.find_mode("Default").parent == p.modes._hierarchy
\ No newline at end of file
+    assert p.modes.find_mode("Default").parent == p.modes._hierarchy
+
+def _action_xml(action_id, children):
+    ids = "".join(f"<action-id>{child}</action-id>" for child in children)
+    return (
+        f'<action id="{action_id}" type="root"><actions>{ids}</actions>'
+        f'<property type="string"><name>action-label</name><value></value>'
+        f'</property><property type="activation-mode">'
+        f'<name>activation-mode</name><value>deactivated</value></property>'
+        f'</action>'
+    )
+
+
+def _library_xml(references):
+    actions = [
+        _action_xml(action_id, children)
+        for action_id, children in references.items()
+    ]
+    return ElementTree.fromstring(
+        f"<profile><library>{''.join(actions)}</library></profile>"
+    )
+
+
+def _profile_xml(fpath, device_guid, bindings):
+    """Writes a profile binding buttons to root actions.
+
+    Args:
+        fpath: path of the file to write
+        device_guid: guid of the device the buttons belong to
+        bindings: mapping of button id to the root action's children
+    """
+    inputs = []
+    actions = []
+    for input_id, children in bindings.items():
+        root_id = uuid.uuid4()
+        inputs.append(
+            f"<input><device-id>{device_guid}</device-id>"
+            f"<input-type>button</input-type><input-id>{input_id}</input-id>"
+            f"<mode>Default</mode><action-configuration>"
+            f"<root-action>{root_id}</root-action>"
+            f"<behavior>button</behavior></action-configuration></input>"
+        )
+        actions.append(_action_xml(root_id, children))
+        actions.extend(_action_xml(child, []) for child in children)
+    with open(fpath, "w", encoding="utf-8") as out:
+        out.write(
+            f'<profile version="{Profile.current_version}">'
+            f'<inputs>{"".join(inputs)}</inputs>'
+            f'<library>{"".join(actions)}</library>'
+            f'<modes><mode>Default</mode></modes></profile>'
+        )
+
+
+def test_library_dependency_order():
+    gremlin.plugin_manager.PluginManager()
+
+    ids = [uuid.uuid4() for _ in range(4)]
+    library = gremlin.profile.Library()
+    library.from_xml(_library_xml({
+        ids[0]: [ids[1], ids[2]],
+        ids[1]: [ids[3]],
+        ids[2]: [ids[3]],
+        ids[3]: []
+    }))
+    root = library.get_action(ids[0])
+    assert [a.id for a in root.get_actions()[0]] == [ids[1], ids[2]]
+    assert library.get_action(ids[1]).get_actions()[0][0] is \
+        library.get_action(ids[3])
+
+
+def test_library_lazy_loading():
+    gremlin.plugin_manager.PluginManager()
+
+    ids = [uuid.uuid4() for _ in range(4)]
+    library = gremlin.profile.Library()
+    library.from_xml(_library_xml({
+        ids[0]: [ids[1]],
+        ids[1]: [],
+        ids[2]: [ids[3]],
+        ids[3]: []
+    }))
+    assert len(library._actions) == 0
+    assert library.has_action(ids[3])
+
+    # Accessing an action only instantiates it and the actions it references
+    library.get_action(ids[0])
+    assert set(library._actions) == {ids[0], ids[1]}
+
+    library.delete_action(ids[2])
+    assert not library.has_action(ids[2])
+    root_type = gremlin.plugin_manager.PluginManager().tag_map["root"]
+    assert len(library.actions_by_type(root_type)) == 3
+    assert len(library._unparsed) == 0
+
+
+def test_library_references():
+    gremlin.plugin_manager.PluginManager()
+
+    ids = [uuid.uuid4() for _ in range(5)]
+    library = gremlin.profile.Library()
+    library.from_xml(_library_xml({
+        ids[0]: [ids[1], ids[2]],
+        ids[1]: [ids[3]],
+        ids[2]: [ids[3]],
+        ids[3]: [],
+        ids[4]: []
+    }))
+    assert not library.is_referenced(ids[0])
+    assert {a.id for a in library.get_parents(ids[3])} == {ids[1], ids[2]}
+
+    # Removing a child updates the references
+    library.get_action(ids[1]).remove_action(0, "children")
+    assert [a.id for a in library.get_parents(ids[3])] == [ids[2]]
+    library.get_action(ids[1]).insert_action(
+        library.get_action(ids[4]), "children"
+    )
+    assert [a.id for a in library.get_parents(ids[4])] == [ids[1]]
+
+    # Referenced actions are kept, unreferenced ones removed with all their
+    # no longer referenced children
+    library.remove_unused(library.get_action(ids[4]))
+    assert library.has_action(ids[4])
+    library.remove_unused(library.get_action(ids[0]))
+    assert not any(library.has_action(aid) for aid in ids)
+
+
+def test_library_invalid_references():
+    gremlin.plugin_manager.PluginManager()
+
+    ids = [uuid.uuid4() for _ in range(3)]
+    with pytest.raises(ProfileError, match="non-existent action") as info:
+        gremlin.profile.Library().from_xml(_library_xml({ids[0]: [ids[1]]}))
+    assert str(ids[1]) in str(info.value)
+    with pytest.raises(ProfileError, match="Cyclic references") as info:
+        gremlin.profile.Library().from_xml(_library_xml({
+            ids[0]: [ids[1]],
+            ids[1]: [ids[2]],
+            ids[2]: [ids[1]]
+        }))
+    assert str(ids[1]) in str(info.value) and str(ids[2]) in str(info.value)
+    with pytest.raises(ProfileError, match="Cyclic references") as info:
+        gremlin.profile.Library().from_xml(_library_xml({ids[0]: [ids[0]]}))
+    assert str(ids[0]) in str(info.value)
+
+
+def test_input_item_index(tmp_path):
+    gremlin.plugin_manager.PluginManager()
+
+    guid = uuid.uuid4()
+    fpath = tmp_path / "profile.xml"
+    _profile_xml(fpath, guid, {6: [uuid.uuid4()]})
+    p = Profile()
+    p.from_xml(str(fpath))
+
+    item = p.get_input_item(guid, InputType.JoystickButton, 6, "Default")
+    assert item is p.inputs[guid][0]
+    assert p.get_input_count(guid, InputType.JoystickButton, 6, "Default") == 1
+    assert p.get_input_item(guid, InputType.JoystickButton, 7, "Default") is None
+    assert p.get_input_count(guid, InputType.JoystickButton, 7, "Default") == 0
+
+    created = p.get_input_item(
+        guid, InputType.JoystickAxis, 1, "Default", create_if_missing=True
+    )
+    assert p.get_input_item(guid, InputType.JoystickAxis, 1, "Default") \
+        is created
+    assert len(p.all_input_items()) == 2
+
+    p.modes.rename_mode("Default", "Renamed")
+    assert p.get_input_item(guid, InputType.JoystickButton, 6, "Default") \
+        is None
+    assert p.get_input_item(guid, InputType.JoystickButton, 6, "Renamed") \
+        is item
+
+    p.modes.add_mode("Other")
+    p.modes.delete_mode("Renamed")
+    assert p.get_input_item(guid, InputType.JoystickButton, 6, "Renamed") \
+        is None
+    assert p.all_input_items() == []
+
+
+def test_save_matches_pretty_print(tmp_path):
+    gremlin.plugin_manager.PluginManager()
+
+    source = tmp_path / "source.xml"
+    _profile_xml(source, uuid.uuid4(), {1: [uuid.uuid4()], 2: []})
+    p = Profile()
+    p.from_xml(str(source))
+    os.remove(source)
+    fpath = tmp_path / "profile.xml"
+    p.to_xml(str(fpath))
+
+    expected = minidom.parseString(
+        ElementTree.tostring(p._build_xml(), encoding="utf-8")
+    ).toprettyxml(indent="    ")
+    with open(fpath, encoding="utf-8-sig") as fhandle:
+        assert fhandle.read() == expected
+    assert os.listdir(tmp_path) == ["profile.xml"]
+
+
+def test_output_policy_settings():
+    settings = gremlin.profile.Settings(None)
+    settings.set_output_policy(1, InputType.JoystickAxis, 2, OutputPolicy.Maximum)
+    settings.set_output_policy(
+        1,
+        InputType.JoystickHat,
+        1,
+        OutputPolicy.ModePriority,
+        {"Default": 1, "Override": 2}
+    )
+    with pytest.raises(ProfileError):
+        settings.set_output_policy(
+            1, InputType.JoystickButton, 1, OutputPolicy.ModePriority
+        )
+
+    restored = gremlin.profile.Settings(None)
+    restored.from_xml(settings.to_xml())
+    assert restored.output_policies == settings.output_policies
+    assert restored.get_output_policy(1, InputType.JoystickHat, 1) == \
+        (OutputPolicy.ModePriority, {"Default": 1, "Override": 2})
+    assert restored.get_output_policy(1, InputType.JoystickAxis, 1) == \
+        (OutputPolicy.LastWriter, {})
+
+    # The last writer policy is the default and not stored
+    restored.set_output_policy(
+        1, InputType.JoystickAxis, 2, OutputPolicy.LastWriter
+    )
+    assert len(restored.output_policies) == 1
@@ -0,0 +1,138 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import os
+import pickle
+import uuid
+from xml.etree import ElementTree
+
+import gremlin.plugin_manager
+from gremlin import profile_cache
+from gremlin.intermediate_output import IntermediateOutput
+from gremlin.profile import Profile
+
+
+device_guid = uuid.UUID("{af3d9175-30a7-4d77-aed5-e1b5e0b71efc}")
+root_id = uuid.uuid4()
+description_id = uuid.uuid4()
+
+profile_xml = (
+    f'<profile version="{Profile.current_version}"><inputs><input>'
+    f'<device-id>{device_guid}</device-id><input-type>button</input-type>'
+    f'<input-id>6</input-id><mode>Default</mode><action-configuration>'
+    f'<root-action>{root_id}</root-action><behavior>button</behavior>'
+    f'</action-configuration></input></inputs><library>'
+    f'<action id="{description_id}" type="description">'
+    f'<property type="string"><name>description</name>'
+    f'<value>This is a test</value></property>'
+    f'<property type="string"><name>action-label</name><value></value>'
+    f'</property><property type="activation-mode">'
+    f'<name>activation-mode</name><value>both</value></property></action>'
+    f'<action id="{root_id}" type="root"><actions>'
+    f'<action-id>{description_id}</action-id></actions>'
+    f'<property type="string"><name>action-label</name><value></value>'
+    f'</property><property type="activation-mode">'
+    f'<name>activation-mode</name><value>deactivated</value></property>'
+    f'</action></library><modes><mode>Default</mode></modes></profile>'
+)
+
+executed = []
+
+
+class Exploit:
+
+    def __reduce__(self):
+        return executed.append, ("exploit",)
+
+
+def load(fpath):
+    IntermediateOutput().reset()
+    return profile_cache.load_profile(str(fpath))
+
+
+def serialize(profile):
+    return ElementTree.tostring(profile._build_xml())
+
+
+def test_cache_hit_and_miss(tmp_path):
+    gremlin.plugin_manager.PluginManager()
+    fpath = tmp_path / "profile.xml"
+    fpath.write_text(profile_xml)
+    stats = profile_cache.statistics()
+
+    reference = load(fpath)
+    assert not stats.last_was_hit
+    assert os.path.isfile(profile_cache.cache_path(str(fpath)))
+    assert os.listdir(tmp_path) == ["profile.xml"]
+
+    cached = load(fpath)
+    assert stats.last_was_hit
+    assert cached.fpath == str(fpath)
+    assert serialize(cached) == serialize(reference)
+    assert cached.inputs[device_guid][0].library is cached.library
+
+    # Changing the XML content invalidates the cache
+    with open(fpath, "a") as fhandle:
+        fhandle.write("\n")
+    load(fpath)
+    assert not stats.last_was_hit
+    load(fpath)
+    assert stats.last_was_hit
+
+
+def test_invalid_cache(tmp_path):
+    gremlin.plugin_manager.PluginManager()
+    fpath = tmp_path / "profile.xml"
+    fpath.write_text(profile_xml)
+    reference = load(fpath)
+
+    # Keep the valid key and signature but corrupt the content
+    with open(profile_cache.cache_path(str(fpath)), "rb") as fhandle:
+        key, signature, _ = fhandle.read().split(b"\n", 2)
+    with open(profile_cache.cache_path(str(fpath)), "wb") as fhandle:
+        fhandle.write(key + b"\n" + signature + b"\ninvalid")
+
+    stats = profile_cache.statistics()
+    restored = load(fpath)
+    assert not stats.last_was_hit
+    assert serialize(restored) == serialize(reference)
+    load(fpath)
+    assert stats.last_was_hit
+
+
+def test_tampered_cache(tmp_path):
+    gremlin.plugin_manager.PluginManager()
+    fpath = tmp_path / "profile.xml"
+    fpath.write_text(profile_xml)
+    reference = load(fpath)
+
+    # A cache not created by this installation is never unpickled
+    path = profile_cache.cache_path(str(fpath))
+    with open(path, "rb") as fhandle:
+        key, signature, _ = fhandle.read().split(b"\n", 2)
+    with open(path, "wb") as fhandle:
+        fhandle.write(key + b"\n" + signature + b"\n")
+        fhandle.write(pickle.dumps(Exploit()))
+
+    stats = profile_cache.statistics()
+    restored = load(fpath)
+    assert not stats.last_was_hit
+    assert executed == []
+    assert serialize(restored) == serialize(reference)
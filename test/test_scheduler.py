@@ -0,0 +1,66 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import threading
+
+from gremlin.scheduler import Scheduler
+
+
+def test_deadline_order():
+    scheduler = Scheduler()
+    calls = []
+    done = threading.Event()
+
+    scheduler.schedule(0.06, lambda: (calls.append(3), done.set()))
+    scheduler.schedule(0.02, lambda: calls.append(1))
+    scheduler.schedule(0.04, lambda: calls.append(2))
+
+    assert done.wait(1.0)
+    assert calls == [1, 2, 3]
+    assert scheduler.pending() == 0
+
+
+def test_cancel():
+    scheduler = Scheduler()
+    calls = []
+    done = threading.Event()
+
+    handles = [
+        scheduler.schedule(0.01, lambda i=i: calls.append(i))
+        for i in range(100)
+    ]
+    for handle in handles[::2]:
+        handle.cancel()
+    assert scheduler.pending() == 50
+    scheduler.schedule(0.05, done.set)
+
+    assert done.wait(1.0)
+    assert calls == list(range(1, 100, 2))
+    assert not any(handle.is_pending for handle in handles)
+
+
+def test_callback_error():
+    scheduler = Scheduler()
+    done = threading.Event()
+
+    scheduler.schedule(0.0, lambda: 1 / 0)
+    scheduler.schedule(0.01, done.set)
+
+    assert done.wait(1.0)
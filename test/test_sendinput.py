@@ -0,0 +1,115 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import pytest
+
+import gremlin.sendinput as sendinput
+from gremlin.types import MouseButton
+
+
+class RecordingSink:
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, count):
+        entries = []
+        for i in range(count):
+            if inputs[i].type == sendinput.INPUT_KEYBOARD:
+                ki = inputs[i].union.ki
+                entries.append(("key", ki.wVk, ki.wScan, ki.dwFlags))
+            else:
+                mi = inputs[i].union.mi
+                entries.append(("mouse", mi.dx, mi.dy, mi.dwFlags))
+        self.calls.append(entries)
+        return count
+
+
+@pytest.fixture
+def sink():
+    recorder = RecordingSink()
+    sendinput.set_output_sink(recorder)
+    yield recorder
+    sendinput.set_output_sink(None)
+
+
+def test_unbatched(sink):
+    sendinput.key_down(0x11, 0x1d, False)
+    sendinput.mouse_press(MouseButton.Left)
+
+    assert len(sink.calls) == 2
+    assert sink.calls[0] == [("key", 0x11, 0x1d, 0)]
+    assert sink.calls[1] == [("mouse", 0, 0, sendinput.MOUSEEVENTF_LEFTDOWN)]
+
+
+def test_batched_chord(sink):
+    with sendinput.batched_output():
+        sendinput.key_down(0x11, 0x1d, False)
+        sendinput.key_down(0x10, 0x2a, False)
+        sendinput.key_down(0x70, 0x3b, False)
+        assert len(sink.calls) == 0
+
+    assert len(sink.calls) == 1
+    assert [e[1] for e in sink.calls[0]] == [0x11, 0x10, 0x70]
+
+
+def test_batched_mixed(sink):
+    with sendinput.batched_output():
+        sendinput.key_up(0x2d, 0x52, True)
+        sendinput.mouse_relative_motion(5, -3)
+        sendinput.mouse_release(MouseButton.Right)
+
+    assert sink.calls == [[
+        ("key", 0x2d, 0x52,
+         sendinput.KEYEVENTF_EXTENDEDKEY | sendinput.KEYEVENTF_KEYUP),
+        ("mouse", 5, -3, sendinput.MOUSEEVENTF_MOVE),
+        ("mouse", 0, 0, sendinput.MOUSEEVENTF_RIGHTUP),
+    ]]
+
+
+def test_nested_batches(sink):
+    with sendinput.batched_output():
+        sendinput.mouse_press(MouseButton.Left)
+        with sendinput.batched_output():
+            sendinput.mouse_release(MouseButton.Left)
+        assert len(sink.calls) == 0
+
+    assert len(sink.calls) == 1
+    assert len(sink.calls[0]) == 2
+
+
+def test_explicit_flush(sink):
+    with sendinput.batched_output() as batch:
+        sendinput.mouse_wheel(1)
+        batch.flush()
+        sendinput.mouse_wheel(-1)
+
+    assert len(sink.calls) == 2
+
+
+def test_capacity_overflow(sink):
+    batch = sendinput.InputBatch(capacity=4)
+    batch.depth = 1
+    for i in range(10):
+        batch.add(sendinput._mouse_input(sendinput.MOUSEEVENTF_MOVE, i, 0))
+    batch.flush()
+
+    assert [len(c) for c in sink.calls] == [4, 4, 2]
+    assert [e[1] for c in sink.calls for e in c] == list(range(10))
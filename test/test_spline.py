@@ -0,0 +1,92 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import random
+
+import pytest
+
+from gremlin.spline import CubicSpline, CubicBezierSpline, LookupTable
+from vjoy.vjoy import deadzone
+
+
+# Resolution and quantization step of a default vJoy axis
+resolution = 32767
+output_step = 1.0 / int(resolution / 2)
+
+
+def sample_positions(count=20000):
+    rng = random.Random(42)
+    return [-1.0, -0.5, 0.0, 0.5, 1.0] + \
+        [rng.uniform(-1.0, 1.0) for _ in range(count)]
+
+
+def max_error(fn, table):
+    return max(abs(fn(x) - table(x)) for x in sample_positions())
+
+
+def test_identity():
+    table = LookupTable(lambda x: x, resolution)
+
+    assert table(-1.0) == -1.0
+    assert table(0.0) == 0.0
+    assert table(1.0) == 1.0
+    assert max_error(lambda x: x, table) < 1e-12
+
+
+def test_out_of_range():
+    table = LookupTable(lambda x: x, resolution)
+
+    assert table(-1.5) == -1.0
+    assert table(1.5) == 1.0
+
+
+def test_cubic_spline_accuracy():
+    spline = CubicSpline([
+        (-1.0, -1.0), (-0.5, -0.2), (0.0, 0.0), (0.5, 0.2), (1.0, 1.0)
+    ])
+    table = LookupTable(spline, resolution)
+
+    assert max_error(spline, table) < output_step
+
+
+def test_cubic_bezier_spline_accuracy():
+    spline = CubicBezierSpline([
+        (-1.0, -1.0), (-0.7, -0.3), (-0.3, -0.1),
+        (0.0, 0.0),
+        (0.3, 0.1), (0.7, 0.3), (1.0, 1.0)
+    ])
+    table = LookupTable(spline, resolution)
+
+    assert max_error(spline, table) < output_step
+
+
+@pytest.mark.parametrize("limits", [
+    (-1.0, -0.0, 0.0, 1.0),
+    (-0.9, -0.1, 0.1, 0.9),
+    (-0.8, -0.25, 0.05, 1.0),
+])
+def test_deadzone_and_curve_accuracy(limits):
+    spline = CubicSpline([
+        (-1.0, -1.0), (-0.5, -0.2), (0.0, 0.0), (0.5, 0.2), (1.0, 1.0)
+    ])
+    combined = lambda x: spline(deadzone(x, *limits))
+    table = LookupTable(combined, resolution)
+
+    assert max_error(combined, table) < output_step
@@ -0,0 +1,130 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import sys
+sys.path.append(".")
+
+import os
+
+import pytest
+
+from gremlin.error import GremlinError
+from vjoy import vjoy
+from vjoy.vjoy_interface import VJoyInterface, VJoyState
+from vjoy.vjoy_virtual import VirtualDevice, VirtualVJoyInterface, \
+    map_state_file
+
+
+@pytest.fixture
+def virtual_vjoy(tmp_path):
+    previous = VJoyInterface.backend
+    backend = VirtualVJoyInterface(
+        [
+            VirtualDevice(1, axis_count=8, button_count=32, hat_count=2),
+            VirtualDevice(2, axis_count=3, button_count=8, hat_count=0),
+        ],
+        str(tmp_path / "vjoy_state.bin")
+    )
+    VJoyInterface.set_backend(backend)
+    yield backend
+    if previous is not None:
+        VJoyInterface.set_backend(previous)
+    backend.close()
+
+
+def test_topology(virtual_vjoy):
+    assert vjoy.device_exists(1)
+    assert vjoy.device_exists(2)
+    assert not vjoy.device_exists(3)
+
+    assert vjoy.axis_count(1) == 8
+    assert vjoy.axis_count(2) == 3
+    assert vjoy.button_count(2) == 8
+    assert vjoy.hat_count(1) == 2
+    assert vjoy.hat_configuration_valid(1)
+    assert vjoy.device_available(2)
+
+
+def test_outputs(virtual_vjoy):
+    dev = vjoy.VJoy(1)
+    assert VJoyInterface.GetVJDStatus(1) == VJoyState.Owned.value
+
+    dev.axis(1).value = 1.0
+    dev.axis(2).value = -1.0
+    dev.button(5).is_pressed = True
+    dev.hat(2).direction = (1, 0)
+
+    state = virtual_vjoy.device_state(1)
+    assert state.axes[0] == 32766
+    assert state.axes[1] == 0
+    assert virtual_vjoy.axis_value(1, 1) == pytest.approx(1.0, abs=1e-3)
+    assert state.buttons[4] == 1
+    assert state.buttons[3] == 0
+    assert state.hats[1] == 9000
+    assert state.hats[0] == -1
+
+    dev.invalidate()
+    assert VJoyInterface.GetVJDStatus(1) == VJoyState.Free.value
+
+
+def test_axis_lookup_table(virtual_vjoy):
+    dev = vjoy.VJoy(1)
+    axis = dev.axis(1)
+
+    # Identity mappings are written without a lookup table
+    axis.value = 0.5
+    assert axis._lookup_table is None
+    assert axis.value == pytest.approx(0.5)
+
+    # The table is built once on the first write after the mapping changed
+    axis.set_response_curve(
+        "cubic-spline",
+        [(-1.0, -1.0), (0.0, 0.0), (1.0, 1.0)]
+    )
+    axis.set_deadzone(-1.0, -0.2, 0.2, 1.0)
+    assert axis._lookup_table is None
+    axis.value = 0.1
+    table = axis._lookup_table
+    assert table is not None
+    assert axis.value == pytest.approx(0.0)
+    axis.value = 0.6
+    assert axis._lookup_table is table
+    assert axis.value == pytest.approx(0.5, abs=1e-3)
+
+    dev.invalidate()
+
+
+def test_state_file(virtual_vjoy):
+    buffer, state = map_state_file(virtual_vjoy.path)
+
+    dev = vjoy.VJoy(2)
+    count = state.devices[1].update_count
+    dev.button(3).is_pressed = True
+    assert state.devices[1].buttons[2] == 1
+    assert state.devices[1].update_count == count + 1
+    assert state.devices[1].owner_pid == os.getpid()
+
+    dev.invalidate()
+    del state
+    buffer.close()
+
+
+def test_invalid_configuration():
+    with pytest.raises(GremlinError):
+        VirtualDevice(17)
+    with pytest.raises(GremlinError):
+        VirtualDevice(1, axis_count=9)
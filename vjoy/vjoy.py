@@ -20,8 +20,6 @@ from __future__ import annotations
 import ctypes
 import enum
 import logging
-import threading
-import time
 from typing import Any, Dict, List, Optional, Tuple
 import os
 
@@ -29,6 +27,8 @@ from vjoy.vjoy_interface import VJoyState, VJoyInterface
 
 from gremlin.error import VJoyError
 from gremlin.types import AxisNames
+import gremlin.clock
+import gremlin.scheduler
 import gremlin.spline
 
 
@@ -193,6 +193,11 @@ class Axis:
 
         self._deadzone_fn = lambda x: deadzone(x, -1.0, -0.0, 0.0, 1.0)
         self._response_curve_fn = lambda x: x
+        # Identity mappings need no lookup table, otherwise the table is
+        # built on the first write after the mapping changed
+        self._is_identity_deadzone = True
+        self._is_identity_curve = True
+        self._lookup_table = None
 
         # If this is not the case our value setter needs to change
         if self._min_value != 0:
@@ -211,6 +216,7 @@ class Axis:
             spline_type: the type of spline to use
             control_points: the control points defining the spline
         """
+        self._is_identity_curve = False
         if spline_type == "cubic-spline":
             self._response_curve_fn = gremlin.spline.CubicSpline(control_points)
         elif spline_type == "cubic-bezier-spline":
@@ -219,6 +225,8 @@ class Axis:
         else:
             logging.getLogger("system").error("Invalid spline type specified")
             self._response_curve_fn = lambda x: x
+            self._is_identity_curve = True
+        self._lookup_table = None
 
     def set_deadzone(
             self,
@@ -238,6 +246,34 @@ class Axis:
         self._deadzone_fn = lambda x: deadzone(
             x, low, center_low, center_high, high
         )
+        self._is_identity_deadzone = \
+            (low, center_low, center_high, high) == (-1.0, 0.0, 0.0, 1.0)
+        self._lookup_table = None
+
+    def _map_value(self, value: float) -> float:
+        """Applies the deadzone and response curve to a value.
+
+        The deadzone and response curve are baked into a lookup table the
+        first time a value is mapped after either of them changed. The table
+        resolution matches the value range of the vJoy axis, such that
+        interpolation errors stay below the output quantization.
+
+        Args:
+            value: the value in the range [-1, 1] to map
+
+        Returns:
+            value after applying the deadzone and response curve
+        """
+        if self._is_identity_deadzone and self._is_identity_curve:
+            return value
+        if self._lookup_table is None:
+            deadzone_fn = self._deadzone_fn
+            response_curve_fn = self._response_curve_fn
+            self._lookup_table = gremlin.spline.LookupTable(
+                lambda x: response_curve_fn(deadzone_fn(x)),
+                self._max_value
+            )
+        return self._lookup_table(value)
 
     @property
     def value(self) -> float:
@@ -268,9 +304,7 @@ class Axis:
 
         # Normalize value to [-1, 1] and apply response curve and deadzone
         # settings
-        self._value = self._response_curve_fn(
-            self._deadzone_fn(min(1.0, max(-1.0, value)))
-        )
+        self._value = self._map_value(min(1.0, max(-1.0, value)))
 
         if not VJoyInterface.SetAxis(
                 int(self._half_range + self._half_range * self._value),
@@ -549,12 +583,11 @@ class VJoy:
         self._hat = self._init_hats()
 
         # Timestamp of the last time the device was used
-        self._last_active = time.time()
-        self._keep_alive_timer = threading.Timer(
+        self._last_active = gremlin.clock.get_clock().now()
+        self._keep_alive_handle = gremlin.scheduler.schedule(
             VJoy.keep_alive_timeout,
             self._keep_alive
         )
-        self._keep_alive_timer.start()
 
         # Reset all controls
         self.reset()
@@ -821,33 +854,38 @@ class VJoy:
 
     def used(self) -> None:
         """Updates the timestamp of the last time the device has been used."""
-        self._last_active = time.time()
+        self._last_active = gremlin.clock.get_clock().now()
 
     def invalidate(self) -> None:
         """Releases all resources claimed by this instance.
 
-        Releases the lock on the vjoy device instance as well as terminating
-        the keep alive timer.
+        Releases the lock on the vjoy device instance as well as removing
+        it from the keep alive schedule.
         """
         if self.vjoy_id:
+            self._keep_alive_handle.cancel()
             self.reset()
             VJoyInterface.RelinquishVJD(self.vjoy_id)
             self.vjoy_id = None
-            self._keep_alive_timer.cancel()
 
     def _keep_alive(self) -> None:
-        """Timer callback ensuring the vJoy device stays active.
+        """Resets the device if it has been inactive for too long.
 
-        If the device hasn't been used in the last 60 seconds the device will
-        be reset to ensure it doesn't time out.
+        The check is rescheduled to run when the device next exceeds the
+        inactivity timeout, which avoids rescheduling on every use.
         """
-        if self._last_active + VJoy.keep_alive_timeout < time.time():
+        if self.vjoy_id is None:
+            return
+
+        idle_time = gremlin.clock.get_clock().now() - self._last_active
+        if idle_time >= VJoy.keep_alive_timeout:
             self.reset()
-        self._keep_alive_timer = threading.Timer(
-            VJoy.keep_alive_timeout,
+            self.used()
+            idle_time = 0.0
+        self._keep_alive_handle = gremlin.scheduler.schedule(
+            VJoy.keep_alive_timeout - idle_time,
             self._keep_alive
         )
-        self._keep_alive_timer.start()
 
     def _init_axes(self) -> Dict[int, Axis]:
         """Retrieves all axes present on the vJoy device and creates their
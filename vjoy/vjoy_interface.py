@@ -36,7 +36,13 @@ class VJoyState(enum.Enum):
 
 class VJoyInterface:
 
-    """Allows low level interaction with VJoy devices via ctypes."""
+    """Allows low level interaction with VJoy devices via ctypes.
+
+    The functions listed in api_functions are provided by a backend. By
+    default this is the vJoy dll, however, any object implementing these
+    functions can be installed via set_backend, such as the virtual devices
+    provided by vjoy.vjoy_virtual.
+    """
 
     # Attempt to find the correct location of the dll for development
     # and installed use cases.
@@ -168,6 +174,9 @@ class VJoyInterface:
         },
     }
 
+    # Object currently providing the api functions
+    backend = None
+
     @classmethod
     def initialize(cls):
         """Initializes the functions as class methods."""
@@ -180,7 +189,23 @@ class VJoyInterface:
                 dll_fn.argtypes = params["arguments"]
             if "returns" in params:
                 dll_fn.restype = params["returns"]
-            setattr(cls, fn_name, dll_fn)
+        cls.set_backend(cls.vjoy_dll)
+
+    @classmethod
+    def set_backend(cls, backend):
+        """Installs the functions of the given backend as class methods.
+
+        Args:
+            backend: object implementing all functions of the vJoy api
+        """
+        for fn_name in cls.api_functions:
+            if not hasattr(backend, fn_name):
+                raise GremlinError(
+                    f"vJoy backend does not implement '{fn_name}'"
+                )
+        for fn_name in cls.api_functions:
+            setattr(cls, fn_name, getattr(backend, fn_name))
+        cls.backend = backend
 
 
 # Initialize the class
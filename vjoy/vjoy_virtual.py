@@ -0,0 +1,401 @@
+# -*- coding: utf-8; -*-
+
+# Copyright (C) 2015 - 2024 Lionel Ott
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Virtual stand-in for the vJoy driver.
+
+The VirtualVJoyInterface implements the same functions as the vJoy dll and
+can be installed via VJoyInterface.set_backend. Instead of feeding a driver
+the state of every virtual device is written into a memory-mapped file, which
+allows tests and external tools to inspect the output state without copying.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import mmap
+import os
+from typing import List, Optional, Tuple
+
+from gremlin.error import GremlinError
+from vjoy.vjoy_interface import VJoyState
+
+
+# Identifier and version of the memory-mapped file layout
+STATE_MAGIC = 0x4A4F5956
+STATE_VERSION = 1
+
+# Maximum number of devices and inputs supported by vJoy
+MAX_DEVICES = 16
+MAX_AXES = 8
+MAX_BUTTONS = 128
+MAX_HATS = 4
+
+# Value range of a vJoy axis
+AXIS_MAX_VALUE = 32767
+
+# Code of the first vJoy axis, i.e. the X axis
+AXIS_CODE_OFFSET = 0x30
+
+
+class VirtualDevice:
+
+    """Configuration of a single virtual vJoy device."""
+
+    def __init__(
+            self,
+            vjoy_id: int,
+            axis_count: int=8,
+            button_count: int=128,
+            hat_count: int=4,
+            discrete_hats: bool=False
+    ) -> None:
+        """Creates a new device configuration.
+
+        Args:
+            vjoy_id: id of the device, between 1 and 16
+            axis_count: number of axes, the first axis_count axes exist
+            button_count: number of buttons
+            hat_count: number of hats
+            discrete_hats: whether hats are discrete rather than continuous
+        """
+        if not 1 <= vjoy_id <= MAX_DEVICES:
+            raise GremlinError(f"Invalid virtual vJoy id {vjoy_id}")
+        if not 0 <= axis_count <= MAX_AXES or \
+                not 0 <= button_count <= MAX_BUTTONS or \
+                not 0 <= hat_count <= MAX_HATS:
+            raise GremlinError(
+                f"Invalid input counts for virtual vJoy id {vjoy_id}"
+            )
+
+        self.vjoy_id = vjoy_id
+        self.axis_count = axis_count
+        self.button_count = button_count
+        self.hat_count = hat_count
+        self.discrete_hats = discrete_hats
+
+
+class DeviceState(ctypes.Structure):
+
+    """Memory layout of the state of a single virtual device."""
+
+    _fields_ = (
+        ("exists", ctypes.c_uint8),
+        ("discrete_hats", ctypes.c_uint8),
+        ("axis_count", ctypes.c_uint8),
+        ("hat_count", ctypes.c_uint8),
+        ("button_count", ctypes.c_uint16),
+        ("reserved", ctypes.c_uint16),
+        ("owner_pid", ctypes.c_int32),
+        ("axes", ctypes.c_int32 * MAX_AXES),
+        ("hats", ctypes.c_int32 * MAX_HATS),
+        ("buttons", ctypes.c_uint8 * MAX_BUTTONS),
+        ("update_count", ctypes.c_uint64),
+    )
+
+
+class StateFile(ctypes.Structure):
+
+    """Memory layout of the complete memory-mapped state file."""
+
+    _fields_ = (
+        ("magic", ctypes.c_uint32),
+        ("version", ctypes.c_uint32),
+        ("devices", DeviceState * MAX_DEVICES),
+    )
+
+
+def map_state_file(path: str) -> Tuple[mmap.mmap, StateFile]:
+    """Maps an existing state file written by a VirtualVJoyInterface.
+
+    The returned structure directly references the mapped memory, i.e. it
+    reflects changes made by the writer without any copies.
+
+    Args:
+        path: path to the state file
+
+    Returns:
+        The memory map and the state structure referencing it, the memory map
+        has to be kept alive while the structure is in use
+    """
+    with open(path, "r+b") as fh:
+        buffer = mmap.mmap(fh.fileno(), ctypes.sizeof(StateFile))
+    state = StateFile.from_buffer(buffer)
+    if state.magic != STATE_MAGIC or state.version != STATE_VERSION:
+        del state
+        buffer.close()
+        raise GremlinError(f"'{path}' is not a valid vJoy state file")
+    return buffer, state
+
+
+class VirtualVJoyInterface:
+
+    """Implements the vJoy api on top of virtual devices.
+
+    Device state is stored in a memory-mapped file, either backed by the
+    provided path or anonymous memory if no path is given.
+    """
+
+    def __init__(
+            self,
+            devices: List[VirtualDevice],
+            path: Optional[str]=None
+    ) -> None:
+        """Creates a new virtual vJoy driver.
+
+        Args:
+            devices: configuration of the devices to present
+            path: file to store the device state in, anonymous memory is
+                used if this is None
+        """
+        self.path = path
+        size = ctypes.sizeof(StateFile)
+        if path is None:
+            self._buffer = mmap.mmap(-1, size)
+        else:
+            with open(path, "w+b") as fh:
+                fh.truncate(size)
+                self._buffer = mmap.mmap(fh.fileno(), size)
+        self._state = StateFile.from_buffer(self._buffer)
+        self._state.magic = STATE_MAGIC
+        self._state.version = STATE_VERSION
+
+        for dev in devices:
+            state = self._state.devices[dev.vjoy_id-1]
+            state.exists = 1
+            state.discrete_hats = int(dev.discrete_hats)
+            state.axis_count = dev.axis_count
+            state.button_count = dev.button_count
+            state.hat_count = dev.hat_count
+            self._reset(state)
+
+    def close(self) -> None:
+        """Releases the memory-mapped file."""
+        del self._state
+        self._buffer.close()
+
+    def device_state(self, vjoy_id: int) -> DeviceState:
+        """Returns the live state of a device.
+
+        Args:
+            vjoy_id: id of the device whose state to return
+
+        Returns:
+            Structure referencing the memory-mapped state of the device
+        """
+        return self._state.devices[vjoy_id-1]
+
+    def axis_value(self, vjoy_id: int, axis_index: int) -> float:
+        """Returns the value of an axis normalized to [-1, 1].
+
+        Args:
+            vjoy_id: id of the device
+            axis_index: index of the axis, starting at 1 for the X axis
+
+        Returns:
+            Normalized value of the axis
+        """
+        half_range = AXIS_MAX_VALUE / 2.0
+        raw = self.device_state(vjoy_id).axes[axis_index-1]
+        return (raw - half_range) / half_range
+
+    # General vJoy information
+    def GetvJoyVersion(self) -> int:
+        return 0x218
+
+    def vJoyEnabled(self) -> bool:
+        return True
+
+    def GetvJoyProductString(self) -> str:
+        return "Virtual vJoy Device"
+
+    def GetvJoyManufacturerString(self) -> str:
+        return "Joystick Gremlin"
+
+    def GetvJoySerialNumberString(self) -> str:
+        return "2.1.8"
+
+    # Device properties
+    def GetVJDButtonNumber(self, vjoy_id: int) -> int:
+        state = self._device(vjoy_id)
+        return 0 if state is None else state.button_count
+
+    def GetVJDDiscPovNumber(self, vjoy_id: int) -> int:
+        state = self._device(vjoy_id)
+        if state is None or not state.discrete_hats:
+            return 0
+        return state.hat_count
+
+    def GetVJDContPovNumber(self, vjoy_id: int) -> int:
+        state = self._device(vjoy_id)
+        if state is None or state.discrete_hats:
+            return 0
+        return state.hat_count
+
+    def GetVJDAxisExist(self, vjoy_id: int, axis: int) -> int:
+        state = self._device(vjoy_id)
+        if state is None:
+            return 0
+        return int(0 <= axis - AXIS_CODE_OFFSET < state.axis_count)
+
+    def GetVJDAxisMax(self, vjoy_id: int, axis: int, value) -> bool:
+        if not self.GetVJDAxisExist(vjoy_id, axis):
+            return False
+        value._obj.value = AXIS_MAX_VALUE
+        return True
+
+    def GetVJDAxisMin(self, vjoy_id: int, axis: int, value) -> bool:
+        if not self.GetVJDAxisExist(vjoy_id, axis):
+            return False
+        value._obj.value = 0
+        return True
+
+    # Device management
+    def GetOwnerPid(self, vjoy_id: int) -> int:
+        state = self._device(vjoy_id)
+        return 0 if state is None else state.owner_pid
+
+    def AcquireVJD(self, vjoy_id: int) -> bool:
+        state = self._device(vjoy_id)
+        if state is None or state.owner_pid not in (0, os.getpid()):
+            return False
+        state.owner_pid = os.getpid()
+        return True
+
+    def RelinquishVJD(self, vjoy_id: int) -> None:
+        state = self._device(vjoy_id)
+        if state is not None and state.owner_pid == os.getpid():
+            state.owner_pid = 0
+
+    def UpdateVJD(self, vjoy_id: int, data) -> bool:
+        return self._owned_device(vjoy_id) is not None
+
+    def GetVJDStatus(self, vjoy_id: int) -> int:
+        state = self._device(vjoy_id)
+        if state is None:
+            return VJoyState.Missing.value
+        elif state.owner_pid == 0:
+            return VJoyState.Free.value
+        elif state.owner_pid == os.getpid():
+            return VJoyState.Owned.value
+        else:
+            return VJoyState.Bust.value
+
+    # Reset functions
+    def ResetVJD(self, vjoy_id: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None:
+            return False
+        self._reset(state)
+        return True
+
+    def ResetAll(self) -> None:
+        for state in self._state.devices:
+            if state.exists and state.owner_pid == os.getpid():
+                self._reset(state)
+
+    def ResetButtons(self, vjoy_id: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None:
+            return False
+        ctypes.memset(state.buttons, 0, MAX_BUTTONS)
+        state.update_count += 1
+        return True
+
+    def ResetPovs(self, vjoy_id: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None:
+            return False
+        for i in range(MAX_HATS):
+            state.hats[i] = -1
+        state.update_count += 1
+        return True
+
+    # Set values
+    def SetAxis(self, value: int, vjoy_id: int, axis: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None or not self.GetVJDAxisExist(vjoy_id, axis):
+            return False
+        state.axes[axis - AXIS_CODE_OFFSET] = value
+        state.update_count += 1
+        return True
+
+    def SetBtn(self, value: bool, vjoy_id: int, button_id: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None or not 1 <= button_id <= state.button_count:
+            return False
+        state.buttons[button_id-1] = int(value)
+        state.update_count += 1
+        return True
+
+    def SetDiscPov(self, value: int, vjoy_id: int, hat_id: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None or not state.discrete_hats or \
+                not 1 <= hat_id <= state.hat_count:
+            return False
+        state.hats[hat_id-1] = value
+        state.update_count += 1
+        return True
+
+    def SetContPov(self, value: int, vjoy_id: int, hat_id: int) -> bool:
+        state = self._owned_device(vjoy_id)
+        if state is None or state.discrete_hats or \
+                not 1 <= hat_id <= state.hat_count:
+            return False
+        state.hats[hat_id-1] = value
+        state.update_count += 1
+        return True
+
+    def _device(self, vjoy_id: int) -> Optional[DeviceState]:
+        """Returns the state of an existing device.
+
+        Args:
+            vjoy_id: id of the device
+
+        Returns:
+            State of the device or None if no such device exists
+        """
+        if not 1 <= vjoy_id <= MAX_DEVICES:
+            return None
+        state = self._state.devices[vjoy_id-1]
+        return state if state.exists else None
+
+    def _owned_device(self, vjoy_id: int) -> Optional[DeviceState]:
+        """Returns the state of a device owned by this process.
+
+        Args:
+            vjoy_id: id of the device
+
+        Returns:
+            State of the device or None if the device is not owned
+        """
+        state = self._device(vjoy_id)
+        if state is None or state.owner_pid != os.getpid():
+            return None
+        return state
+
+    def _reset(self, state: DeviceState) -> None:
+        """Resets all inputs of a device to their default values.
+
+        Args:
+            state: the device state to reset
+        """
+        for i in range(MAX_AXES):
+            state.axes[i] = AXIS_MAX_VALUE // 2 + 1
+        for i in range(MAX_HATS):
+            state.hats[i] = -1
+        ctypes.memset(state.buttons, 0, MAX_BUTTONS)
+        state.update_count += 1